@@ -7,6 +7,10 @@ set -e
 echo "Applying database migrations..."
 python manage.py migrate --noinput
 
+# Create the database cache table (a no-op for other cache backends)
+echo "Creating cache table..."
+python manage.py createcachetable
+
 # Collect static files
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
@@ -4,6 +4,8 @@ Django Admin configuration for Parent model.
 """
 
 from django.contrib import admin
+from django.db.models import F, Func, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.html import format_html
 from .models import Parent
 
@@ -16,6 +18,7 @@ class ParentAdmin(admin.ModelAdmin):
         'get_email', 'get_phone', 'children_count',
         'is_pta_member', 'is_active', 'is_verified'
     ]
+    list_select_related = ['user']
     
     list_filter = [
         'parent_type', 'marital_status', 'is_pta_member',
@@ -109,9 +112,20 @@ class ParentAdmin(admin.ModelAdmin):
     parent_type_display.short_description = 'Parent Type'
     
     def children_count(self, obj):
-        """Display number of children"""
-        return obj.get_children_count()
+        """Display number of children (annotated in get_queryset)"""
+        return obj.children_total
     children_count.short_description = 'Children'
+    children_count.admin_order_field = 'children_total'
+    
+    def get_queryset(self, request):
+        """Count each parent's children in the list query instead of once per row"""
+        from students.models import Student
+        children = Student.objects.filter(
+            Q(father=OuterRef('pk')) | Q(mother=OuterRef('pk'))
+        ).order_by().annotate(total=Func(F('id'), function='COUNT')).values('total')
+        return super().get_queryset(request).annotate(
+            children_total=Coalesce(Subquery(children), 0)
+        )
     
     def get_children_list(self, obj):
         """Display children as HTML list"""
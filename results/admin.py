@@ -383,15 +383,26 @@
 Admin configuration for Results App - UPDATED FOR class_level
 """
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db import transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, When
+from django.db.models.functions import Coalesce
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils import timezone
 
 from .models import (
     StudentResult, SubjectScore, PsychomotorSkills,
-    AffectiveDomains, ResultPublishing
+    AffectiveDomains, ResultPublishing, ResultCohortSummary,
+    SubjectClassStatistics, TeacherPerformanceRollup, ReportBookJob,
+    GradingScheme, GradeBoundary, ArchivedResult, ScoreModeration
 )
+from .ranking import cohorts_for
+from .recompute import recompute_results
+from .summaries import refresh_cohort_summaries, _cohort_filter
+from .snapshots import materialize_snapshots
+from .publishing import publish_results, unpublish_results
+from .completeness import get_require_complete, check_complete, IncompleteResults
 
 
 # ============================================
@@ -540,6 +551,8 @@ class StudentResultAdmin(admin.ModelAdmin):
         'term_display', 'percentage', 'overall_grade', 'position_in_class',
         'is_published', 'is_promoted', 'created_at'
     ]
+    list_select_related = ['student', 'student__user', 'session', 'term', 'term__session', 'class_level']
+    list_per_page = 50
     
     list_filter = [
         PublishedFilter, PromotedFilter, TermFilter,
@@ -634,30 +647,46 @@ class StudentResultAdmin(admin.ModelAdmin):
     
     # REMOVED THE BROKEN BADGE METHODS - using simple boolean display instead
     
+    # Actions run one set-based UPDATE over the whole selection, then refresh
+    # summaries and snapshots once per affected cohort
+    
     def publish_results(self, request, queryset):
         """Admin action to publish selected results"""
-        updated = queryset.update(is_published=True)
+        try:
+            updated = publish_results(queryset, request.user)
+        except IncompleteResults as e:
+            self.message_user(request, f'{e}. Nothing was published.', level=messages.ERROR)
+            return
         self.message_user(request, f'{updated} result(s) published successfully.')
     publish_results.short_description = "Publish selected results"
     
     def unpublish_results(self, request, queryset):
         """Admin action to unpublish selected results"""
-        updated = queryset.update(is_published=False)
+        updated = unpublish_results(queryset)
         self.message_user(request, f'{updated} result(s) unpublished successfully.')
     unpublish_results.short_description = "Unpublish selected results"
     
     def promote_students(self, request, queryset):
         """Admin action to promote selected students"""
-        updated = queryset.update(is_promoted=True)
+        with transaction.atomic():
+            scope = StudentResult.objects.filter(pk__in=queryset.order_by().values('pk'))
+            updated = scope.filter(is_promoted=False).update(
+                is_promoted=True, version=F('version') + 1, updated_at=timezone.now()
+            )
+            refresh_cohort_summaries(cohorts_for(scope))
+            materialize_snapshots(scope)
         self.message_user(request, f'{updated} student(s) marked as promoted.')
     promote_students.short_description = "Promote selected students"
     
     def calculate_positions(self, request, queryset):
         """Admin action to recalculate positions"""
-        for result in queryset:
-            result.calculate_position()
-            result.save()
-        self.message_user(request, f'Positions recalculated for {queryset.count()} result(s).')
+        cohorts = cohorts_for(queryset)
+        with transaction.atomic():
+            # Re-ranks and re-summarizes each cohort once
+            recompute_results([], cohorts)
+            if cohorts:
+                materialize_snapshots(StudentResult.objects.filter(_cohort_filter(cohorts)))
+        self.message_user(request, f'Positions recalculated for {len(cohorts)} class cohort(s).')
     calculate_positions.short_description = "Recalculate positions"
     
     def save_model(self, request, obj, form, change):
@@ -670,9 +699,9 @@ class StudentResultAdmin(admin.ModelAdmin):
         """Optimize queryset with select_related"""
         qs = super().get_queryset(request)
         return qs.select_related(
-            'student', 'student__user', 'session', 'term', 'class_level',
+            'student', 'student__user', 'session', 'term', 'term__session', 'class_level',
             'class_teacher', 'headmaster', 'created_by'
-        ).prefetch_related('subject_scores')
+        )
 
 
 @admin.register(SubjectScore)
@@ -683,6 +712,7 @@ class SubjectScoreAdmin(admin.ModelAdmin):
         'student_info', 'subject_display', 'total_score', 'grade',
         'ca_score', 'exam_score', 'observation_conduct', 'teacher_comment_short'
     ]
+    list_select_related = ['result', 'result__student', 'result__student__user', 'subject']
     
     list_filter = ['grade', 'observation_conduct', 'subject_remark', 'subject']
     search_fields = [
@@ -757,6 +787,7 @@ class PsychomotorSkillsAdmin(admin.ModelAdmin):
         'student_info', 'overall_psychomotor_rating',
         'handwriting', 'verbal_fluency', 'sports'
     ]
+    list_select_related = ['result', 'result__student', 'result__student__user']
     
     list_filter = ['handwriting', 'verbal_fluency', 'sports']
     search_fields = [
@@ -805,6 +836,7 @@ class AffectiveDomainsAdmin(admin.ModelAdmin):
         'student_info', 'overall_affective_rating',
         'punctuality', 'neatness', 'honesty', 'attitude'
     ]
+    list_select_related = ['result', 'result__student', 'result__student__user']
     
     list_filter = ['punctuality', 'neatness', 'honesty', 'attitude']
     search_fields = [
@@ -856,6 +888,7 @@ class ResultPublishingAdmin(admin.ModelAdmin):
         'is_published', 'published_by_display', 'published_date_formatted',
         'results_count', 'created_at'
     ]
+    list_select_related = ['session', 'term', 'term__session', 'class_level', 'published_by']
     
     list_filter = ['is_published', 'session', 'term', 'class_level']
     search_fields = [
@@ -909,31 +942,46 @@ class ResultPublishingAdmin(admin.ModelAdmin):
     published_date_formatted.admin_order_field = 'published_date'
     
     def results_count(self, obj):
-        """Count of results for this publishing entry"""
-        from .models import StudentResult
-        count = StudentResult.objects.filter(
-            session=obj.session,
-            term=obj.term
-        )
-        if obj.class_level:
-            count = count.filter(class_level=obj.class_level)
-        return count.count()
+        """Count of results for this publishing entry (annotated in get_queryset)"""
+        return obj.results_total
     results_count.short_description = 'Results Count'
+    results_count.admin_order_field = 'results_total'
     
     # REMOVED THE BROKEN BADGE METHOD
     
+    def _selected_results(self, queryset):
+        """StudentResults covered by the selected publishing records, as one OR filter"""
+        scope = Q(pk__in=[])
+        for session_id, term_id, class_level_id in queryset.values_list('session_id', 'term_id', 'class_level_id'):
+            cohort = Q(session_id=session_id, term_id=term_id)
+            if class_level_id:
+                cohort &= Q(class_level_id=class_level_id)
+            scope |= cohort
+        return StudentResult.objects.filter(scope)
+    
     def publish_results_action(self, request, queryset):
         """Admin action to publish results"""
-        for publishing in queryset:
-            publishing.publish_results(request.user)
-        self.message_user(request, f'{queryset.count()} publishing record(s) published successfully.')
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                publish_results(self._selected_results(queryset), request.user)
+                updated = queryset.update(
+                    is_published=True, published_date=now, published_by=request.user, updated_at=now
+                )
+        except IncompleteResults as e:
+            self.message_user(request, f'{e}. Nothing was published.', level=messages.ERROR)
+            return
+        self.message_user(request, f'{updated} publishing record(s) published successfully.')
     publish_results_action.short_description = "Publish selected results"
     
     def unpublish_results_action(self, request, queryset):
         """Admin action to unpublish results"""
-        for publishing in queryset:
-            publishing.unpublish_results()
-        self.message_user(request, f'{queryset.count()} publishing record(s) unpublished successfully.')
+        with transaction.atomic():
+            unpublish_results(self._selected_results(queryset))
+            updated = queryset.update(
+                is_published=False, published_date=None, published_by=None, updated_at=timezone.now()
+            )
+        self.message_user(request, f'{updated} publishing record(s) unpublished successfully.')
     unpublish_results_action.short_description = "Unpublish selected results"
     
     def save_model(self, request, obj, form, change):
@@ -947,15 +995,179 @@ class ResultPublishingAdmin(admin.ModelAdmin):
             obj.published_by = request.user
             obj.published_date = timezone.now()
         
+        # Newly published records are checked first; incomplete ones are saved unpublished
+        if obj.is_published and get_require_complete() and (not change or 'is_published' in form.changed_data):
+            try:
+                check_complete(
+                    obj.session_id, obj.term_id,
+                    class_level_ids=[obj.class_level_id] if obj.class_level_id else None
+                )
+            except IncompleteResults as e:
+                obj.is_published = False
+                obj.published_by = None
+                obj.published_date = None
+                self.message_user(request, f'{e}. The record was saved unpublished.', level=messages.WARNING)
+        
         super().save_model(request, obj, form, change)
         
         # Actually publish/unpublish results
         if obj.is_published:
-            obj.publish_results(request.user)
+            obj.publish_results(request.user, force=True)
         else:
             obj.unpublish_results()
     
     def get_queryset(self, request):
         """Optimize queryset"""
         qs = super().get_queryset(request)
-        return qs.select_related('session', 'term', 'class_level', 'published_by')
\ No newline at end of file
+        # Counted live: cohort summaries only exist once a cohort has been recomputed
+        results = StudentResult.objects.filter(
+            session_id=OuterRef('session_id'), term_id=OuterRef('term_id')
+        ).order_by().values('session_id').annotate(total=Count('pk')).values('total')
+        return qs.select_related('session', 'term', 'class_level', 'published_by').annotate(
+            results_total=Coalesce(
+                Case(
+                    When(class_level__isnull=True, then=Subquery(results)),
+                    default=Subquery(results.filter(class_level_id=OuterRef('class_level_id')))
+                ),
+                0
+            )
+        )
+
+
+# ============================================
+# GRADING, STATISTICS AND ARCHIVE
+# ============================================
+
+class GradeBoundaryInline(admin.TabularInline):
+    """Inline for the boundaries of a grading scheme"""
+    model = GradeBoundary
+    extra = 0
+    fields = ['min_score', 'grade', 'remark']
+
+
+@admin.register(GradingScheme)
+class GradingSchemeAdmin(admin.ModelAdmin):
+    """Admin for GradingScheme model"""
+    
+    list_display = [
+        'name', 'class_level', 'program', 'is_default', 'pass_mark', 'is_active', 'boundary_count', 'updated_at'
+    ]
+    list_select_related = ['class_level', 'program']
+    list_filter = ['is_active', 'is_default', 'program']
+    search_fields = ['name', 'class_level__name', 'program__name']
+    inlines = [GradeBoundaryInline]
+    
+    def boundary_count(self, obj):
+        """Number of grade boundaries"""
+        return obj.boundary_total
+    boundary_count.short_description = 'Boundaries'
+    boundary_count.admin_order_field = 'boundary_total'
+    
+    def get_queryset(self, request):
+        """Optimize queryset"""
+        return super().get_queryset(request).annotate(boundary_total=Count('boundaries'))
+
+
+class ReadOnlyStatisticsAdmin(admin.ModelAdmin):
+    """Precomputed rows are rebuilt from results - view only"""
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ResultCohortSummary)
+class ResultCohortSummaryAdmin(ReadOnlyStatisticsAdmin):
+    """Admin for ResultCohortSummary model"""
+    
+    list_display = [
+        'class_level', 'term', 'total_results', 'published_count', 'promoted_count',
+        'avg_percentage', 'max_percentage', 'min_percentage', 'updated_at'
+    ]
+    list_select_related = ['class_level', 'term', 'term__session']
+    list_filter = ['session', 'term', 'class_level']
+
+
+@admin.register(SubjectClassStatistics)
+class SubjectClassStatisticsAdmin(ReadOnlyStatisticsAdmin):
+    """Admin for SubjectClassStatistics model"""
+    
+    list_display = [
+        'subject', 'class_level', 'term', 'student_count', 'class_average',
+        'average_ca_score', 'average_exam_score', 'highest_score', 'lowest_score', 'updated_at'
+    ]
+    list_select_related = ['subject', 'class_level', 'term', 'term__session']
+    list_filter = ['session', 'term', 'class_level', 'subject']
+    search_fields = ['subject__name', 'subject__code']
+
+
+@admin.register(TeacherPerformanceRollup)
+class TeacherPerformanceRollupAdmin(ReadOnlyStatisticsAdmin):
+    """Admin for TeacherPerformanceRollup model"""
+    
+    list_display = [
+        'teacher', 'subject', 'class_level', 'term', 'student_count',
+        'average_score', 'pass_rate', 'updated_at'
+    ]
+    list_select_related = ['teacher', 'subject', 'class_level', 'term', 'term__session']
+    list_filter = ['session', 'term', 'class_level', 'subject']
+    search_fields = ['teacher__first_name', 'teacher__last_name', 'subject__name']
+
+
+@admin.register(ReportBookJob)
+class ReportBookJobAdmin(admin.ModelAdmin):
+    """Admin for ReportBookJob model"""
+    
+    list_display = [
+        'publishing', 'status', 'total_cards', 'completed_cards',
+        'reused_cards', 'requested_by', 'created_at', 'completed_at'
+    ]
+    list_select_related = [
+        'publishing__session', 'publishing__term', 'publishing__term__session',
+        'publishing__class_level', 'requested_by'
+    ]
+    list_filter = ['status']
+    readonly_fields = [
+        'publishing', 'status', 'total_cards', 'completed_cards', 'reused_cards',
+        'book_version', 'archive_path', 'error', 'requested_by',
+        'created_at', 'started_at', 'completed_at'
+    ]
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ArchivedResult)
+class ArchivedResultAdmin(ReadOnlyStatisticsAdmin):
+    """Admin for ArchivedResult model"""
+    
+    list_display = ['student', 'session', 'result_count', 'archived_at']
+    list_select_related = ['student', 'student__user', 'student__class_level', 'session']
+    list_filter = ['session']
+    search_fields = [
+        'student__admission_number', 'student__user__first_name', 'student__user__last_name'
+    ]
+    
+    def get_queryset(self, request):
+        """The results documents are only loaded when a row is opened"""
+        return super().get_queryset(request).defer('results')
+
+
+@admin.register(ScoreModeration)
+class ScoreModerationAdmin(ReadOnlyStatisticsAdmin):
+    """Admin for ScoreModeration model - an audit trail, so view only"""
+    
+    list_display = [
+        'subject', 'class_level', 'term', 'component', 'operation',
+        'amount', 'scores_moderated', 'moderated_by', 'created_at'
+    ]
+    list_select_related = ['subject', 'class_level', 'term', 'term__session', 'moderated_by']
+    list_filter = ['session', 'term', 'component', 'operation']
+    search_fields = ['subject__name', 'class_level__name', 'reason']
+    date_hierarchy = 'created_at'
+    
+    def get_queryset(self, request):
+        """The per-score changes are only loaded when a row is opened"""
+        return super().get_queryset(request).defer('changes')
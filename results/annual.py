@@ -0,0 +1,141 @@
+"""
+Cumulative (Annual) Results
+Assembles each student's subject scores across the three terms of a session
+with set-based UPDATEs: term slots, aggregate and average on SubjectScore,
+then annual total, average and position on StudentResult, and finally the
+session's published snapshots
+"""
+from django.db import connection, transaction
+import logging
+import time
+
+from .ranking import rank_annual
+from .snapshots import materialize_snapshots
+
+logger = logging.getLogger(__name__)
+
+TERM_ORDER = {'first': 1, 'second': 2, 'third': 3}
+
+
+def _term_order_sql(column):
+    """SQL CASE mapping an AcademicTerm.term column to 1/2/3"""
+    return 'CASE {col} {whens} END'.format(
+        col=column,
+        whens=' '.join(f"WHEN '{term}' THEN {order}" for term, order in TERM_ORDER.items())
+    )
+
+
+def _build_subject_sql():
+    """
+    UPDATE every SubjectScore of a session with its student's scores for the
+    same subject in each term. A score only sees terms up to its own, so a
+    second-term report shows first + second and the third term the full year.
+    """
+    from .models import StudentResult, SubjectScore
+    from academic.models import AcademicTerm
+
+    score_table = SubjectScore._meta.db_table
+    result_table = StudentResult._meta.db_table
+    term_table = AcademicTerm._meta.db_table
+
+    def slot(order):
+        return f"CASE WHEN cur.term_order >= {order} THEN cum.term_{order} END"
+
+    slots = [slot(order) for order in (1, 2, 3)]
+    summed = ' + '.join(f"COALESCE({s}, 0)" for s in slots)
+    counted = ' + '.join(f"CASE WHEN COALESCE({s}, 0) > 0 THEN 1 ELSE 0 END" for s in slots)
+    positive = ' + '.join(f"CASE WHEN COALESCE({s}, 0) > 0 THEN {s} ELSE 0 END" for s in slots)
+
+    return f"""
+        UPDATE {score_table}
+        SET first_term_score = {slots[0]},
+            second_term_score = {slots[1]},
+            third_term_score = {slots[2]},
+            aggregated_score = {summed},
+            average_score = CASE
+                WHEN ({counted}) > 0 THEN ROUND(({positive}) * 1.0 / ({counted}), 2)
+                ELSE 0
+            END
+        FROM (
+            SELECT r.id AS result_id, r.student_id, {_term_order_sql('t.term')} AS term_order
+            FROM {result_table} r
+            JOIN {term_table} t ON t.id = r.term_id
+            WHERE r.session_id = %s
+        ) cur,
+        (
+            SELECT
+                r.student_id,
+                s.subject_id,
+                MAX(CASE WHEN t.term = 'first' THEN s.total_score END) AS term_1,
+                MAX(CASE WHEN t.term = 'second' THEN s.total_score END) AS term_2,
+                MAX(CASE WHEN t.term = 'third' THEN s.total_score END) AS term_3
+            FROM {score_table} s
+            JOIN {result_table} r ON r.id = s.result_id
+            JOIN {term_table} t ON t.id = r.term_id
+            WHERE r.session_id = %s
+            GROUP BY r.student_id, s.subject_id
+        ) cum
+        WHERE {score_table}.result_id = cur.result_id
+          AND cum.student_id = cur.student_id
+          AND cum.subject_id = {score_table}.subject_id
+    """
+
+
+def _build_result_sql():
+    """UPDATE every StudentResult of a session with its cumulative total and average"""
+    from .models import StudentResult, SubjectScore
+
+    score_table = SubjectScore._meta.db_table
+    result_table = StudentResult._meta.db_table
+
+    return f"""
+        UPDATE {result_table}
+        SET annual_total_score = COALESCE(totals.total, 0),
+            annual_average = COALESCE(totals.average, 0),
+            updated_at = %s
+        FROM (
+            SELECT
+                r.id,
+                (SELECT SUM(s.aggregated_score) FROM {score_table} s WHERE s.result_id = r.id) AS total,
+                (SELECT ROUND(AVG(s.average_score), 2) FROM {score_table} s WHERE s.result_id = r.id) AS average
+            FROM {result_table} r
+            WHERE r.session_id = %s
+        ) totals
+        WHERE {result_table}.id = totals.id
+    """
+
+
+def compute_annual_results(session_id, method=None, by_arm=None):
+    """
+    Build cumulative results for a whole session in three statements, then
+    re-materialize the snapshots of its published results.
+
+    Returns a dict with the number of subject scores and results updated.
+    """
+    from django.utils import timezone
+    from .models import StudentResult
+
+    started = time.monotonic()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(_build_subject_sql(), [session_id, session_id])
+            scores_updated = cursor.rowcount
+
+            cursor.execute(_build_result_sql(), [timezone.now(), session_id])
+            results_updated = cursor.rowcount
+
+        rank_annual(session_id, method, by_arm)
+
+        # Annual columns and subject term slots are on the published report card
+        materialize_snapshots(StudentResult.objects.filter(session_id=session_id))
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"Annual results for session {session_id}: {scores_updated} scores, "
+        f"{results_updated} results in {elapsed:.2f}s"
+    )
+    return {
+        'scores_updated': scores_updated,
+        'results_updated': results_updated,
+        'seconds': round(elapsed, 2)
+    }
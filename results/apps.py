@@ -7,5 +7,6 @@ class ResultsConfig(AppConfig):
     name = 'results'
     
     def ready(self):
-        """Import signals when app is ready"""
-        import results.signals
\ No newline at end of file
+        """Import signals and system checks when app is ready"""
+        import results.signals
+        import results.checks
\ No newline at end of file
@@ -0,0 +1,212 @@
+"""
+Result Archive
+Moves the results of archived sessions out of the hot StudentResult and
+SubjectScore tables into one ArchivedResult document per student and session,
+and back again. Cohort summaries, subject statistics and teacher rollups of
+archived sessions are kept; student reads (by_student, snapshots, trends,
+transcripts) merge archived results back in.
+"""
+from django.db import connection, transaction
+from django.db.models import CASCADE, SET_NULL
+from django.utils import timezone
+from datetime import datetime
+import logging
+
+from .snapshots import _serialize, remove_snapshots, materialize_snapshots
+
+logger = logging.getLogger(__name__)
+
+# Students archived (or restored) per transaction
+ARCHIVE_CHUNK_SIZE = 200
+
+# StudentResult relations kept in the archive and restored with it;
+# published snapshots are dropped and re-materialized on restore
+ARCHIVED_RELATIONS = ['subject_scores', 'psychomotor_skills', 'affective_domains']
+
+
+class ArchiveError(Exception):
+    """A session can't be archived or restored in its current state"""
+
+
+def _raw(instance):
+    """Column values of a model instance, by attname (datetimes kept to the microsecond)"""
+    values = {field.attname: getattr(instance, field.attname) for field in instance._meta.concrete_fields}
+    return {
+        name: value.isoformat() if isinstance(value, datetime) else value
+        for name, value in values.items()
+    }
+
+
+def _timestamp_fields(model):
+    return [
+        field.name for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+
+
+def _entry(result, data):
+    """Archive entry of one result: its serialized form and the rows to restore it"""
+    rows = {'result': _raw(result), 'subject_scores': [_raw(score) for score in result.subject_scores.all()]}
+    for relation in ARCHIVED_RELATIONS[1:]:
+        related = getattr(result, relation, None)
+        rows[relation] = _raw(related) if related else None
+    return {'result': data, 'rows': rows}
+
+
+def _delete_rows(model, ids):
+    """
+    DELETE rows by primary key with plain SQL, clearing or deleting what
+    references them first. Unlike QuerySet.delete() this sends no signals, so
+    removing archived results doesn't re-rank and empty their cohorts'
+    summaries.
+    """
+    ids = list(ids)
+    if not ids:
+        return
+    for relation in model._meta.related_objects:
+        if relation.many_to_many:
+            continue
+        related = relation.related_model._base_manager.filter(**{f'{relation.field.name}__in': ids})
+        if relation.on_delete is CASCADE:
+            _delete_rows(relation.related_model, related.values_list('pk', flat=True))
+        elif relation.on_delete is SET_NULL:
+            related.update(**{relation.field.name: None})
+
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {model._meta.db_table} WHERE {model._meta.pk.column} IN ({placeholders})", ids
+        )
+
+
+def archive_session(session_id):
+    """
+    Move every result of an archived session into ArchivedResult, a chunk of
+    students per transaction (an interrupted run resumes where it stopped).
+    Returns {'students': count, 'results': count}.
+    """
+    from academic.models import AcademicSession
+    from .models import StudentResult, ArchivedResult
+
+    session = AcademicSession.objects.get(pk=session_id)
+    if session.status != 'archived':
+        raise ArchiveError(f"Session {session.name} is not marked archived")
+
+    results = StudentResult.objects.filter(session_id=session_id)
+    student_ids = list(results.order_by('student_id').values_list('student_id', flat=True).distinct())
+    archived_results = 0
+
+    for start in range(0, len(student_ids), ARCHIVE_CHUNK_SIZE):
+        chunk_ids = student_ids[start:start + ARCHIVE_CHUNK_SIZE]
+        with transaction.atomic():
+            chunk = list(
+                results.filter(student_id__in=chunk_ids)
+                .select_related(
+                    'student', 'student__user', 'session', 'term',
+                    'class_level', 'class_teacher', 'headmaster', 'created_by',
+                    'psychomotor_skills', 'affective_domains'
+                )
+                .prefetch_related('subject_scores__subject')
+                .order_by('student_id', 'term__start_date', 'id')
+                .select_for_update(of=('self',))
+            )
+
+            # Results added to the session after an earlier run join the existing document
+            entries = dict(
+                ArchivedResult.objects.filter(session_id=session_id, student_id__in=chunk_ids)
+                .values_list('student_id', 'results')
+            )
+            for result, data in zip(chunk, _serialize(chunk)):
+                entries.setdefault(result.student_id, []).append(_entry(result, data))
+
+            now = timezone.now()
+            ArchivedResult.objects.bulk_create(
+                [
+                    ArchivedResult(
+                        student_id=student_id, session_id=session_id,
+                        result_count=len(student_entries), results=student_entries, archived_at=now
+                    )
+                    for student_id, student_entries in entries.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['student', 'session'],
+                update_fields=['result_count', 'results', 'archived_at']
+            )
+
+            result_ids = [result.pk for result in chunk]
+            remove_snapshots(StudentResult.objects.filter(pk__in=result_ids))
+            _delete_rows(StudentResult, result_ids)
+            archived_results += len(result_ids)
+
+    logger.info(f"Archived {archived_results} result(s) of {len(student_ids)} student(s) in session {session.name}")
+    return {'students': len(student_ids), 'results': archived_results}
+
+
+def restore_session(session_id):
+    """
+    Move an archived session's results back into StudentResult, SubjectScore,
+    PsychomotorSkills and AffectiveDomains with their original ids, and
+    re-materialize the snapshots of published ones. The session must no
+    longer be marked archived. Returns {'students': count, 'results': count}.
+    """
+    from academic.models import AcademicSession
+    from .models import StudentResult, SubjectScore, PsychomotorSkills, AffectiveDomains, ArchivedResult
+
+    session = AcademicSession.objects.get(pk=session_id)
+    if session.status == 'archived':
+        raise ArchiveError(f"Change the status of session {session.name} before restoring its results")
+
+    tables = {
+        'result': StudentResult, 'subject_scores': SubjectScore,
+        'psychomotor_skills': PsychomotorSkills, 'affective_domains': AffectiveDomains
+    }
+    archives = ArchivedResult.objects.filter(session_id=session_id).order_by('student_id')
+    archive_ids = list(archives.values_list('pk', flat=True))
+    restored_results = 0
+
+    for start in range(0, len(archive_ids), ARCHIVE_CHUNK_SIZE):
+        chunk_ids = archive_ids[start:start + ARCHIVE_CHUNK_SIZE]
+        with transaction.atomic():
+            rows = {name: [] for name in tables}
+            for entries in archives.filter(pk__in=chunk_ids).select_for_update().values_list('results', flat=True):
+                for entry in entries:
+                    rows['result'].append(entry['rows']['result'])
+                    rows['subject_scores'].extend(entry['rows']['subject_scores'])
+                    for relation in ARCHIVED_RELATIONS[1:]:
+                        if entry['rows'][relation]:
+                            rows[relation].append(entry['rows'][relation])
+
+            # Parents first; field values round-trip through each field's to_python.
+            # bulk_create stamps auto_now fields, so the original timestamps are written back
+            for name, model in tables.items():
+                model.objects.bulk_create([model(**values) for values in rows[name]])
+                model.objects.bulk_update(
+                    [model(**values) for values in rows[name]], _timestamp_fields(model),
+                    batch_size=ARCHIVE_CHUNK_SIZE
+                )
+
+            result_ids = [values['id'] for values in rows['result']]
+            materialize_snapshots(StudentResult.objects.filter(pk__in=result_ids))
+            ArchivedResult.objects.filter(pk__in=chunk_ids).delete()
+            restored_results += len(result_ids)
+
+    logger.info(f"Restored {restored_results} result(s) of {len(archive_ids)} student(s) in session {session.name}")
+    return {'students': len(archive_ids), 'results': restored_results}
+
+
+def archived_results(student_ids, published_only=False):
+    """
+    Archived results of these students as StudentResultSerializer renders
+    them, oldest session first, keyed by student id - one query
+    """
+    from .models import ArchivedResult
+
+    archived = {}
+    for student_id, entries in ArchivedResult.objects.filter(
+        student_id__in=list(student_ids)
+    ).order_by('student_id', 'session__start_date').values_list('student_id', 'results'):
+        archived.setdefault(student_id, []).extend(
+            entry['result'] for entry in entries
+            if entry['result']['is_published'] or not published_only
+        )
+    return archived
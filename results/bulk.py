@@ -0,0 +1,811 @@
+"""
+Bulk Write Helpers for Results
+Set-based creation of results and subject scores for uploads, imports and grids
+"""
+from decimal import Decimal, InvalidOperation
+import codecs
+import csv
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+import logging
+
+from .models import StudentResult, SubjectScore, PsychomotorSkills, AffectiveDomains
+from .recompute import recompute_results
+from .snapshots import sync_snapshots
+from .concurrency import VersionConflict
+
+logger = logging.getLogger(__name__)
+
+BULK_BATCH_SIZE = 500
+
+# Students handled per transaction by upload_results
+UPLOAD_CHUNK_SIZE = 100
+
+SCORE_DECIMAL_FIELDS = ['ca_score', 'exam_score']
+
+SCORE_INPUT_FIELDS = [
+    'ca_score', 'exam_score', 'observation_conduct',
+    'subject_remark', 'teacher_comment'
+]
+
+# Everything calculate_total_and_grade() may change, plus the inputs
+SCORE_WRITE_FIELDS = SCORE_INPUT_FIELDS + [
+    'total_score', 'grade', 'first_term_score', 'second_term_score',
+    'third_term_score', 'aggregated_score', 'average_score', 'version', 'updated_at'
+]
+
+# Columns a subject score sheet must have (remarks is optional)
+SCORE_SHEET_COLUMNS = ['admission_number', 'ca_score', 'exam_score']
+
+RESULT_DETAIL_FIELDS = [
+    'frequency_of_school_opened', 'no_of_times_present', 'no_of_times_absent',
+    'class_teacher_comment', 'headmaster_comment', 'version', 'updated_at'
+]
+
+# Editable columns of the psychomotor/affective grid
+PSYCHOMOTOR_GRID_FIELDS = [
+    'handwriting', 'verbal_fluency', 'drawing_and_painting', 'tools_handling',
+    'sports', 'musical_skills', 'dancing', 'craft_work'
+]
+
+AFFECTIVE_GRID_FIELDS = [
+    'punctuality', 'neatness', 'politeness', 'honesty', 'cooperation_with_others',
+    'leadership', 'altruism', 'emotional_stability', 'health', 'attitude',
+    'attentiveness', 'perseverance', 'communication_skill', 'behavioral_comment'
+]
+
+
+def create_assessment_records(results):
+    """Create the psychomotor and affective rows for freshly bulk-created results"""
+    psychomotor = [PsychomotorSkills(result=result) for result in results]
+    affective = [AffectiveDomains(result=result) for result in results]
+
+    for record in psychomotor + affective:
+        record.calculate_overall_rating()
+
+    PsychomotorSkills.objects.bulk_create(psychomotor, batch_size=BULK_BATCH_SIZE)
+    AffectiveDomains.objects.bulk_create(affective, batch_size=BULK_BATCH_SIZE)
+
+
+def ensure_results(student_ids, session, term, class_level, created_by=None):
+    """
+    Fetch the (session, term) results of the given students, creating the
+    missing ones with bulk_create.
+
+    Returns ({student_id: StudentResult}, {ids of created results}).
+    """
+    student_ids = list(dict.fromkeys(student_ids))
+    results = {
+        result.student_id: result
+        for result in StudentResult.objects.filter(
+            session=session, term=term, student_id__in=student_ids
+        )
+    }
+
+    new_results = [
+        StudentResult(
+            student_id=student_id,
+            session=session,
+            term=term,
+            class_level=class_level,
+            created_by=created_by
+        )
+        for student_id in student_ids
+        if student_id not in results
+    ]
+
+    if new_results:
+        StudentResult.objects.bulk_create(new_results, batch_size=BULK_BATCH_SIZE)
+        create_assessment_records(new_results)
+
+    for result in new_results:
+        results[result.student_id] = result
+
+    # calculate_total_and_grade reads result.term - share the instance instead of a query per score
+    for result in results.values():
+        result.term = term
+
+    return results, {result.pk for result in new_results}
+
+
+def _clean_score_values(values):
+    """Coerce posted score values to Decimal, raising ValidationError on bad input"""
+    cleaned = dict(values)
+    for field in SCORE_DECIMAL_FIELDS:
+        if field not in cleaned:
+            continue
+        raw = cleaned[field]
+        try:
+            value = Decimal(str(raw if raw not in (None, '') else 0))
+        except (InvalidOperation, ValueError):
+            raise ValidationError(f"{field} must be a number, got {raw!r}")
+        if value < 0:
+            raise ValidationError(f"{field} cannot be negative")
+        cleaned[field] = value
+    return cleaned
+
+
+def upsert_subject_scores(entries, versions=None):
+    """
+    Create or update many subject scores in three queries.
+
+    `entries` is an iterable of (result, subject_id, values) where values maps
+    SCORE_INPUT_FIELDS to new values. Scores are validated with
+    SubjectScore.clean() and graded with calculate_total_and_grade() in memory;
+    no signals fire, so callers recompute the affected results afterwards.
+
+    `versions` optionally maps (result_id, subject_id) to the version the
+    editor started from. The existing rows are then locked and compared first,
+    and VersionConflict is raised - before anything is written - if any of
+    them has moved on. Must be called inside a transaction.
+
+    Returns (created_count, updated_count, errors) where errors is a list of
+    (result, subject_id, message).
+    """
+    entries = list(entries)
+    if not entries:
+        return 0, 0, []
+
+    result_ids = {result.pk for result, _, _ in entries}
+    subject_ids = {subject_id for _, subject_id, _ in entries}
+    scores = SubjectScore.objects.filter(result_id__in=result_ids, subject_id__in=subject_ids)
+    if versions:
+        scores = scores.select_for_update().order_by('pk')
+    existing = {(score.result_id, score.subject_id): score for score in scores}
+
+    if versions:
+        conflicts = [
+            {
+                'result_id': result_id,
+                'subject_id': subject_id,
+                'expected_version': expected,
+                'current_version': existing[(result_id, subject_id)].version
+                if (result_id, subject_id) in existing else None
+            }
+            for (result_id, subject_id), expected in versions.items()
+            if expected is not None and (
+                (result_id, subject_id) not in existing
+                or existing[(result_id, subject_id)].version != expected
+            )
+        ]
+        if conflicts:
+            raise VersionConflict(f"{len(conflicts)} score(s) were changed by someone else", conflicts)
+
+    now = timezone.now()
+    to_create = {}
+    to_update = {}
+    errors = []
+
+    for result, subject_id, values in entries:
+        key = (result.pk, subject_id)
+        score = existing.get(key) or to_create.get(key)
+        if score is None:
+            score = SubjectScore(result=result, subject_id=subject_id)
+        else:
+            score.result = result
+
+        try:
+            cleaned = _clean_score_values(values)
+        except ValidationError as e:
+            errors.append((result, subject_id, '; '.join(e.messages)))
+            continue
+
+        # Roll back a rejected entry so it can't leak into a score already queued for writing
+        previous = {field: getattr(score, field) for field in cleaned}
+        for field, value in cleaned.items():
+            setattr(score, field, value)
+        try:
+            score.clean()
+        except ValidationError as e:
+            for field, value in previous.items():
+                setattr(score, field, value)
+            errors.append((result, subject_id, '; '.join(e.messages)))
+            continue
+
+        score.calculate_total_and_grade()
+
+        if score.pk:
+            score.updated_at = now
+            score.version = F('version') + 1
+            to_update[key] = score
+        else:
+            to_create[key] = score
+
+    if to_create:
+        SubjectScore.objects.bulk_create(list(to_create.values()), batch_size=BULK_BATCH_SIZE)
+    if to_update:
+        SubjectScore.objects.bulk_update(
+            list(to_update.values()), SCORE_WRITE_FIELDS, batch_size=BULK_BATCH_SIZE
+        )
+
+    return len(to_create), len(to_update), errors
+
+
+def _apply_result_details(result, result_data):
+    """Copy attendance and comments from an upload row onto a result (in memory)"""
+    changed = False
+
+    if 'attendance' in result_data:
+        attendance = result_data['attendance']
+        result.frequency_of_school_opened = attendance.get('frequency', 0)
+        result.no_of_times_present = attendance.get('present', 0)
+        result.no_of_times_absent = attendance.get('absent', 0)
+        result.clean()
+        changed = True
+
+    if 'comments' in result_data:
+        comments = result_data['comments']
+        result.class_teacher_comment = comments.get('class_teacher', '')
+        result.headmaster_comment = comments.get('headmaster', '')
+        changed = True
+
+    if changed:
+        # Bumped in the UPDATE itself, so concurrent edits are never lost
+        result.version = F('version') + 1
+    return changed
+
+
+def upload_results(session, term, class_level, results_data, user=None):
+    """
+    Set-based implementation of StudentResultViewSet.bulk_upload.
+
+    Registration numbers and subject codes are resolved up front in two
+    queries; each chunk of students is then written with bulk_create /
+    bulk_update in its own transaction, and totals and class positions are
+    recomputed once for everything touched. A chunk that fails is retried
+    one student at a time, so only the offending rows are reported.
+    """
+    from students.models import Student
+    from academic.models import Subject
+
+    registration_numbers = {
+        row['student_registration_number'] for row in results_data
+        if row.get('student_registration_number')
+    }
+    subject_codes = {
+        subject.get('subject_code')
+        for row in results_data
+        for subject in row.get('subjects', [])
+        if isinstance(subject, dict) and subject.get('subject_code')
+    }
+
+    students = dict(
+        Student.objects.filter(user__registration_number__in=registration_numbers)
+        .values_list('user__registration_number', 'id')
+    )
+    subjects = dict(
+        Subject.objects.filter(code__in=subject_codes).values_list('code', 'id')
+    )
+
+    created_count = 0
+    updated_count = 0
+    errors = []
+    touched_result_ids = set()
+
+    for start in range(0, len(results_data), UPLOAD_CHUNK_SIZE):
+        chunk = results_data[start:start + UPLOAD_CHUNK_SIZE]
+
+        rows = []
+        for result_data in chunk:
+            registration_number = result_data.get('student_registration_number', 'Unknown')
+            if registration_number not in students:
+                errors.append({
+                    'student_registration': registration_number,
+                    'error': 'Student not found'
+                })
+                continue
+            rows.append((students[registration_number], result_data))
+
+        if not rows:
+            continue
+
+        try:
+            written = [(rows, _upload_chunk(rows, session, term, class_level, subjects, user))]
+        except Exception as e:
+            # Retry the rows one at a time so only the offending ones are reported
+            logger.error(f"Error in bulk result upload chunk, retrying row by row: {e}")
+            written = []
+            for row in rows:
+                try:
+                    written.append(([row], _upload_chunk([row], session, term, class_level, subjects, user)))
+                except Exception as e:
+                    errors.append({
+                        'student_registration': row[1].get('student_registration_number', 'Unknown'),
+                        'error': str(e)
+                    })
+
+        for written_rows, (results, created_ids, row_errors) in written:
+            errors.extend(row_errors)
+            # Count per upload row, as the row-by-row implementation did
+            for student_id, _ in written_rows:
+                if results[student_id].pk in created_ids:
+                    created_count += 1
+                    created_ids.discard(results[student_id].pk)
+                else:
+                    updated_count += 1
+            touched_result_ids.update(result.pk for result in results.values())
+
+    recompute_results(touched_result_ids)
+
+    return {
+        'created': created_count,
+        'updated': updated_count,
+        'errors': errors,
+        'total_processed': len(results_data),
+        'success_count': created_count + updated_count
+    }
+
+
+def _upload_chunk(rows, session, term, class_level, subjects, user):
+    """
+    Write the (student_id, result_data) rows of one upload chunk in a single
+    transaction. Returns (results by student id, ids of results created,
+    errors of rows that were skipped); raises if the chunk can't be written.
+    """
+    errors = []
+    registrations = {
+        student_id: result_data['student_registration_number']
+        for student_id, result_data in rows
+    }
+
+    with transaction.atomic():
+        results, created_ids = ensure_results(
+            [student_id for student_id, _ in rows], session, term, class_level, user
+        )
+
+        score_entries = []
+        detail_updates = []
+        now = timezone.now()
+
+        for student_id, result_data in rows:
+            result = results[student_id]
+            registration_number = result_data['student_registration_number']
+
+            for subject_score_data in result_data.get('subjects', []):
+                subject_code = subject_score_data.get('subject_code')
+                if not subject_code:
+                    continue
+                if subject_code not in subjects:
+                    errors.append({
+                        'student_registration': registration_number,
+                        'subject': subject_code,
+                        'error': f'Subject not found: {subject_code}'
+                    })
+                    continue
+                score_entries.append((result, subjects[subject_code], {
+                    'ca_score': subject_score_data.get('ca_score', 0),
+                    'exam_score': subject_score_data.get('exam_score', 0),
+                    'observation_conduct': subject_score_data.get('observation_conduct', ''),
+                    'subject_remark': subject_score_data.get('subject_remark', ''),
+                    'teacher_comment': subject_score_data.get('teacher_comment', '')
+                }))
+
+            try:
+                if _apply_result_details(result, result_data):
+                    result.updated_at = now
+                    detail_updates.append(result)
+            except ValidationError as e:
+                errors.append({
+                    'student_registration': registration_number,
+                    'error': '; '.join(e.messages)
+                })
+
+        _, _, score_errors = upsert_subject_scores(score_entries)
+        for result, subject_id, message in score_errors:
+            errors.append({
+                'student_registration': registrations[result.student_id],
+                'error': message
+            })
+
+        if detail_updates:
+            StudentResult.objects.bulk_update(
+                detail_updates, RESULT_DETAIL_FIELDS, batch_size=BULK_BATCH_SIZE
+            )
+
+    return results, created_ids, errors
+
+
+def read_score_sheet(uploaded_file):
+    """
+    Yield (line_number, row) from a CSV score sheet, decoding the upload one
+    line at a time so the file is never read into memory as a whole.
+
+    Header names are matched case-insensitively; raises ValidationError when a
+    required column is missing.
+    """
+    reader = csv.DictReader(codecs.iterdecode(uploaded_file, 'utf-8-sig'))
+    if reader.fieldnames is None:
+        raise ValidationError("Score sheet is empty")
+
+    reader.fieldnames = [(name or '').strip().lower() for name in reader.fieldnames]
+    missing = [column for column in SCORE_SHEET_COLUMNS if column not in reader.fieldnames]
+    if missing:
+        raise ValidationError(f"Score sheet is missing column(s): {', '.join(missing)}")
+
+    for row in reader:
+        yield reader.line_num, {
+            key: (value or '').strip() for key, value in row.items() if key
+        }
+
+
+def import_score_sheet(uploaded_file, session, term, class_level, subject, user=None):
+    """
+    Apply a (class_level, subject, session, term) CSV score sheet.
+
+    Every row is validated in a single pass (admission number, class
+    membership for that session and term, numbers, ca/exam obtainable) before
+    anything is created; valid rows are then written in one transaction with
+    bulk_create / bulk_update and the touched results recomputed once. Blank
+    score cells leave the stored value unchanged.
+
+    Returns a report with per-row errors keyed by CSV line number.
+    """
+    from students.models import Student, StudentEnrollment
+
+    errors = []
+    rows = {}
+    total_rows = 0
+
+    try:
+        for line_number, row in read_score_sheet(uploaded_file):
+            if not any(row.values()):
+                continue
+            total_rows += 1
+
+            admission_number = row.get('admission_number', '')
+            if not admission_number:
+                errors.append({'row': line_number, 'admission_number': '', 'error': 'Missing admission number'})
+                continue
+            if admission_number in rows:
+                errors.append({
+                    'row': line_number,
+                    'admission_number': admission_number,
+                    'error': f'Duplicate of row {rows[admission_number][0]}'
+                })
+                continue
+
+            values = {
+                field: row[field] for field in ('ca_score', 'exam_score') if row.get(field)
+            }
+            if row.get('remarks'):
+                values['teacher_comment'] = row['remarks']
+            if not values:
+                errors.append({'row': line_number, 'admission_number': admission_number, 'error': 'No scores on row'})
+                continue
+
+            try:
+                values = _clean_score_values(values)
+            except ValidationError as e:
+                errors.append({'row': line_number, 'admission_number': admission_number, 'error': '; '.join(e.messages)})
+                continue
+
+            rows[admission_number] = (line_number, values)
+    except UnicodeDecodeError:
+        raise ValidationError("Score sheet must be UTF-8 encoded")
+
+    students = dict(
+        Student.objects.filter(admission_number__in=list(rows)).values_list('admission_number', 'id')
+    )
+
+    # Membership as of that session and term - students may have been promoted since:
+    # the class level of their result, or of the class they were enrolled in
+    student_ids = list(students.values())
+    result_class_levels = dict(
+        StudentResult.objects.filter(session=session, term=term, student_id__in=student_ids)
+        .values_list('student_id', 'class_level_id')
+    )
+    enrolled = set(
+        StudentEnrollment.objects.filter(
+            session=session, term=term, student_id__in=student_ids, class_obj__class_level=class_level
+        ).values_list('student_id', flat=True)
+    )
+
+    # Stored marks and obtainables, so over-limit rows are rejected before any result is created
+    stored = {
+        student_id: SubjectScore(
+            ca_score=ca_score, exam_score=exam_score, ca_obtainable=ca_obtainable, exam_obtainable=exam_obtainable
+        )
+        for student_id, ca_score, exam_score, ca_obtainable, exam_obtainable in SubjectScore.objects.filter(
+            result__session=session, result__term=term, result__student_id__in=student_ids, subject=subject
+        ).values_list('result__student_id', 'ca_score', 'exam_score', 'ca_obtainable', 'exam_obtainable')
+    }
+
+    valid = {}
+    for admission_number, (line_number, values) in rows.items():
+        if admission_number not in students:
+            errors.append({'row': line_number, 'admission_number': admission_number, 'error': 'Student not found'})
+            continue
+        student_id = students[admission_number]
+        if student_id in result_class_levels:
+            in_class = result_class_levels[student_id] == class_level.id
+        else:
+            in_class = student_id in enrolled
+        if not in_class:
+            errors.append({
+                'row': line_number,
+                'admission_number': admission_number,
+                'error': f'Student is not in {class_level.name}'
+            })
+            continue
+
+        score = stored.get(student_id) or SubjectScore()
+        for field, value in values.items():
+            setattr(score, field, value)
+        try:
+            score.clean()
+        except ValidationError as e:
+            errors.append({'row': line_number, 'admission_number': admission_number, 'error': '; '.join(e.messages)})
+            continue
+        valid[student_id] = (line_number, admission_number, values)
+
+    created = updated = 0
+    if valid:
+        with transaction.atomic():
+            results, _ = ensure_results(list(valid), session, term, class_level, user)
+            created, updated, score_errors = upsert_subject_scores(
+                (results[student_id], subject.id, values)
+                for student_id, (_, _, values) in valid.items()
+            )
+
+        for result, _, message in score_errors:
+            line_number, admission_number, _ = valid[result.student_id]
+            errors.append({'row': line_number, 'admission_number': admission_number, 'error': message})
+
+        recompute_results(result.pk for result in results.values())
+
+    errors.sort(key=lambda error: error['row'])
+    return {
+        'total_rows': total_rows,
+        'created': created,
+        'updated': updated,
+        'success_count': created + updated,
+        'errors': errors
+    }
+
+
+def _cohort_results(class_level, session, term):
+    return StudentResult.objects.filter(class_level=class_level, session=session, term=term)
+
+
+def ensure_assessment_records(results):
+    """Create the missing psychomotor/affective rows of a StudentResult queryset"""
+    results = results.order_by()
+    missing_psychomotor = list(results.filter(psychomotor_skills__isnull=True).values_list('id', flat=True))
+    missing_affective = list(results.filter(affective_domains__isnull=True).values_list('id', flat=True))
+
+    psychomotor = [PsychomotorSkills(result_id=result_id) for result_id in missing_psychomotor]
+    affective = [AffectiveDomains(result_id=result_id) for result_id in missing_affective]
+    for record in psychomotor + affective:
+        record.calculate_overall_rating()
+
+    PsychomotorSkills.objects.bulk_create(psychomotor, batch_size=BULK_BATCH_SIZE)
+    AffectiveDomains.objects.bulk_create(affective, batch_size=BULK_BATCH_SIZE)
+    return len(psychomotor) + len(affective)
+
+
+def assessment_grid(class_level, session, term):
+    """
+    Psychomotor and affective ratings of every result in a cohort, one row per
+    student in name order. Missing rating rows are created first.
+    """
+    results = _cohort_results(class_level, session, term)
+    ensure_assessment_records(results)
+
+    rows = []
+    for result in results.select_related(
+        'student__user', 'psychomotor_skills', 'affective_domains'
+    ).order_by('student__user__last_name', 'student__user__first_name', 'id'):
+        psychomotor = result.psychomotor_skills
+        affective = result.affective_domains
+        rows.append({
+            'result_id': result.pk,
+            'admission_number': result.student.admission_number if result.student else '',
+            'student_name': result.student.user.get_full_name() if result.student and result.student.user else '',
+            'psychomotor': {
+                **{field: getattr(psychomotor, field) for field in PSYCHOMOTOR_GRID_FIELDS},
+                'overall_psychomotor_rating': psychomotor.overall_psychomotor_rating
+            },
+            'affective': {
+                **{field: getattr(affective, field) for field in AFFECTIVE_GRID_FIELDS},
+                'overall_affective_rating': affective.overall_affective_rating
+            }
+        })
+    return rows
+
+
+def save_assessment_grid(class_level, session, term, rows):
+    """
+    Apply validated grid rows ({result_id, psychomotor, affective}) to a
+    cohort: ratings are set and their overall rating recalculated in memory,
+    then everything is written with one bulk_update per model.
+
+    Returns (updated, errors) - errors keyed by result id for rows that are
+    not in the cohort.
+    """
+    results = _cohort_results(class_level, session, term)
+    ensure_assessment_records(results)
+
+    by_id = {
+        result.pk: result
+        for result in results.filter(pk__in=[row['result_id'] for row in rows]).select_related(
+            'psychomotor_skills', 'affective_domains'
+        )
+    }
+
+    now = timezone.now()
+    errors = {}
+    psychomotor, affective = [], []
+    psychomotor_fields, affective_fields = set(), set()
+
+    for row in rows:
+        result = by_id.get(row['result_id'])
+        if result is None:
+            errors[row['result_id']] = 'Result is not in this class, session and term'
+            continue
+
+        for values, record, changed, fields in (
+            (row.get('psychomotor'), result.psychomotor_skills, psychomotor, psychomotor_fields),
+            (row.get('affective'), result.affective_domains, affective, affective_fields),
+        ):
+            if not values:
+                continue
+            for field, value in values.items():
+                setattr(record, field, value)
+            record.calculate_overall_rating()
+            record.updated_at = now
+            fields.update(values)
+            changed.append(record)
+
+    with transaction.atomic():
+        if psychomotor:
+            PsychomotorSkills.objects.bulk_update(
+                psychomotor,
+                sorted(psychomotor_fields) + ['overall_psychomotor_rating', 'updated_at'],
+                batch_size=BULK_BATCH_SIZE
+            )
+        if affective:
+            AffectiveDomains.objects.bulk_update(
+                affective,
+                sorted(affective_fields) + ['overall_affective_rating', 'updated_at'],
+                batch_size=BULK_BATCH_SIZE
+            )
+
+        # Ratings are part of the published snapshot
+        updated = {record.result_id for record in psychomotor + affective}
+        if updated:
+            sync_snapshots(updated)
+
+    return len(updated), errors
+
+
+def grid_students(class_level, session, term, class_obj=None):
+    """
+    Students on a (class level or arm, session, term) score grid, annotated
+    with their result in that term: everyone currently in the class level who
+    has no result elsewhere that term, plus everyone whose result for the
+    term is already in the class level. An arm narrows it to the students
+    enrolled in that Class for the session and term.
+    """
+    from django.db.models import FilteredRelation, Q
+    from students.models import Student, StudentEnrollment
+
+    students = Student.objects.annotate(
+        cohort_result=FilteredRelation(
+            'results', condition=Q(results__session=session, results__term=term)
+        )
+    ).filter(
+        Q(cohort_result__class_level=class_level)
+        | Q(class_level=class_level, cohort_result__isnull=True)
+    )
+
+    if class_obj is not None:
+        students = students.filter(id__in=StudentEnrollment.objects.filter(
+            class_obj=class_obj, session=session, term=term
+        ).values('student_id'))
+    return students
+
+
+def score_grid(class_level, session, term, subject, class_obj=None):
+    """
+    One subject's scores for every student on the grid, read with a single
+    query (students LEFT JOIN their result LEFT JOIN the subject score)
+    """
+    from django.db.models import FilteredRelation, Q
+
+    rows = grid_students(class_level, session, term, class_obj).annotate(
+        score=FilteredRelation(
+            'cohort_result__subject_scores',
+            condition=Q(cohort_result__subject_scores__subject=subject)
+        )
+    ).order_by('user__last_name', 'user__first_name', 'id').values_list(
+        'id', 'admission_number', 'user__first_name', 'user__last_name', 'cohort_result__id',
+        'score__id', 'score__ca_score', 'score__exam_score', 'score__total_score', 'score__grade',
+        'score__position_in_subject', 'score__observation_conduct', 'score__subject_remark',
+        'score__teacher_comment', 'score__version'
+    )
+
+    return [
+        {
+            'student_id': row[0],
+            'admission_number': row[1],
+            'student_name': f"{row[2] or ''} {row[3] or ''}".strip(),
+            'result_id': row[4],
+            'score_id': row[5],
+            'ca_score': row[6],
+            'exam_score': row[7],
+            'total_score': row[8],
+            'grade': row[9] or '',
+            'position_in_subject': row[10],
+            'observation_conduct': row[11] or '',
+            'subject_remark': row[12] or '',
+            'teacher_comment': row[13] or '',
+            'version': row[14]
+        }
+        for row in rows
+    ]
+
+
+def save_score_grid(class_level, session, term, subject, rows, user=None, class_obj=None):
+    """
+    Upsert a whole subject column for the grid: results are created where
+    missing, scores written with bulk_create/bulk_update, and the cohort is
+    recomputed and re-ranked once.
+
+    `rows` are dicts with student_id, any of SCORE_INPUT_FIELDS and
+    optionally the score version the grid was loaded with. If any of those
+    scores changed since, nothing is saved and VersionConflict is raised with
+    the conflicting student ids. Returns a report with errors keyed by
+    student id.
+    """
+    allowed = set(
+        grid_students(class_level, session, term, class_obj).values_list('id', flat=True)
+    )
+
+    errors = {}
+    values_by_student = {}
+    versions_by_student = {}
+    for row in rows:
+        student_id = row['student_id']
+        if student_id not in allowed:
+            errors[student_id] = 'Student is not on this class score sheet'
+            continue
+        values = {field: row[field] for field in SCORE_INPUT_FIELDS if row.get(field) is not None}
+        if values:
+            values_by_student[student_id] = values
+            if row.get('version') is not None:
+                versions_by_student[student_id] = row['version']
+
+    created = updated = 0
+    if values_by_student:
+        with transaction.atomic():
+            results, _ = ensure_results(list(values_by_student), session, term, class_level, user)
+            try:
+                created, updated, score_errors = upsert_subject_scores(
+                    (
+                        (results[student_id], subject.id, values)
+                        for student_id, values in values_by_student.items()
+                    ),
+                    versions={
+                        (results[student_id].pk, subject.id): version
+                        for student_id, version in versions_by_student.items()
+                    }
+                )
+            except VersionConflict as e:
+                students = {result.pk: student_id for student_id, result in results.items()}
+                for conflict in e.conflicts:
+                    conflict['student_id'] = students.get(conflict['result_id'])
+                raise
+        for result, _, message in score_errors:
+            errors[result.student_id] = message
+
+        recompute_results(result.pk for result in results.values())
+
+    return {
+        'total_rows': len(rows),
+        'created': created,
+        'updated': updated,
+        'success_count': created + updated,
+        'errors': errors
+    }
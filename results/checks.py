@@ -0,0 +1,24 @@
+"""
+System Checks
+Warn when the default cache is private to each process: snapshot and trend
+caches are dropped by key when results change, and other workers would keep
+serving what they cached before.
+"""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Backends whose entries only live in the process that wrote them
+PER_PROCESS_CACHE_BACKENDS = ['django.core.cache.backends.locmem.LocMemCache']
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend in PER_PROCESS_CACHE_BACKENDS and not settings.DEBUG:
+        return [Warning(
+            'The default cache is private to each worker process.',
+            hint='Result snapshots and trends would go stale in other workers; set CACHE_BACKEND to '
+                 'the database, Redis or Memcached cache.',
+            id='results.W001',
+        )]
+    return []
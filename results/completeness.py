@@ -0,0 +1,225 @@
+"""
+Result Completeness
+Finds what is still missing from a term's report cards before they are
+published: subject scores for subjects an enrolled student's class offers
+(ClassSubject x StudentEnrollment minus SubjectScore, as one anti-join),
+results never created, and results without attendance or comments. The gaps
+of a whole school are found in two queries, plus name lookups for the detail.
+"""
+from django.conf import settings
+from django.db import connection
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Enrollments whose students are expected to have a full report card
+EXPECTED_ENROLLMENT_STATUSES = ['active']
+
+
+def get_require_complete():
+    """Whether cohort publishing refuses incomplete results (RESULTS_REQUIRE_COMPLETE)"""
+    return getattr(settings, 'RESULTS_REQUIRE_COMPLETE', False)
+
+
+class IncompleteResults(Exception):
+    """Publishing stopped because the cohorts in `report` have gaps"""
+
+    def __init__(self, report):
+        self.report = report
+        cohorts = ', '.join(cohort['class_level_name'] or str(cohort['class_level_id']) for cohort in report)
+        super().__init__(f"Results are incomplete for {cohorts}")
+
+
+def _enrollment_sql(class_level_ids, student_ids):
+    """FROM/WHERE over the expected enrollments of one session and term, with params"""
+    from academic.models import Class
+    from students.models import StudentEnrollment
+
+    statuses = ', '.join(['%s'] * len(EXPECTED_ENROLLMENT_STATUSES))
+    sql = f"""
+        FROM {StudentEnrollment._meta.db_table} e
+        JOIN {Class._meta.db_table} c ON c.id = e.class_obj_id
+        WHERE e.session_id = %s AND e.term_id = %s AND e.status IN ({statuses})
+    """
+    params = list(EXPECTED_ENROLLMENT_STATUSES)
+    if class_level_ids:
+        sql += f" AND c.class_level_id IN ({', '.join(['%s'] * len(class_level_ids))})"
+        params += list(class_level_ids)
+    if student_ids:
+        sql += f" AND e.student_id IN ({', '.join(['%s'] * len(student_ids))})"
+        params += list(student_ids)
+    return sql, params
+
+
+def _missing_scores(session_id, term_id, class_level_ids, student_ids):
+    """(class_level_id, student_id, subject_id) of every expected score that doesn't exist"""
+    from academic.models import ClassSubject
+    from .models import StudentResult, SubjectScore
+
+    where_sql, params = _enrollment_sql(class_level_ids, student_ids)
+    sql = f"""
+        SELECT DISTINCT c.class_level_id, e.student_id, cs.subject_id
+        {where_sql.replace('WHERE', f'''
+        JOIN {ClassSubject._meta.db_table} cs ON cs.class_obj_id = e.class_obj_id AND cs.is_active
+        WHERE''', 1)}
+          AND NOT EXISTS (
+              SELECT 1
+              FROM {SubjectScore._meta.db_table} s
+              JOIN {StudentResult._meta.db_table} r ON r.id = s.result_id
+              WHERE r.student_id = e.student_id AND r.session_id = e.session_id
+                AND r.term_id = e.term_id AND s.subject_id = cs.subject_id
+          )
+        ORDER BY c.class_level_id, e.student_id, cs.subject_id
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [session_id, term_id, *params])
+        return cursor.fetchall()
+
+
+def _enrolled_results(session_id, term_id, class_level_ids, student_ids):
+    """
+    One row per expected enrollment: class level, student, the number of
+    subjects the class offers, and the student's result (LEFT JOIN) with its
+    attendance and comment columns
+    """
+    from academic.models import ClassSubject
+    from .models import StudentResult
+
+    where_sql, params = _enrollment_sql(class_level_ids, student_ids)
+    sql = f"""
+        SELECT
+            c.class_level_id, e.student_id,
+            (SELECT COUNT(*) FROM {ClassSubject._meta.db_table} cs
+             WHERE cs.class_obj_id = e.class_obj_id AND cs.is_active) AS expected,
+            r.id, r.frequency_of_school_opened, r.no_of_times_present, r.no_of_times_absent,
+            r.class_teacher_comment, r.headmaster_comment
+        {where_sql.replace('WHERE', f'''
+        LEFT JOIN {StudentResult._meta.db_table} r
+            ON r.student_id = e.student_id AND r.session_id = e.session_id AND r.term_id = e.term_id
+        WHERE''', 1)}
+        ORDER BY c.class_level_id, e.student_id
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [session_id, term_id, *params])
+        return cursor.fetchall()
+
+
+def completeness_report(session_id, term_id, class_level_ids=None, student_ids=None, detail=True):
+    """
+    Completeness of every cohort (class level) of a session and term, or of
+    the given class levels / students. Each cohort lists its counts and, with
+    `detail`, every student with a gap and what is missing.
+    """
+    from academic.models import ClassLevel, Subject
+    from students.models import Student
+
+    cohorts = {}
+    students = {}
+    result_ids = {}
+
+    def cohort_for(class_level_id):
+        return cohorts.setdefault(class_level_id, {
+            'class_level_id': class_level_id,
+            'session_id': int(session_id),
+            'term_id': int(term_id),
+            'students': 0,
+            'expected_scores': 0,
+            'missing_scores': 0,
+            'missing_results': 0,
+            'missing_attendance': 0,
+            'missing_class_teacher_comments': 0,
+            'missing_headmaster_comments': 0,
+            'students_with_gaps': 0
+        })
+
+    def gaps_for(class_level_id, student_id):
+        return students.setdefault((class_level_id, student_id), {
+            'student_id': student_id,
+            'result_id': result_ids.get(student_id),
+            'missing_result': False,
+            'missing_subjects': [],
+            'missing_attendance': False,
+            'missing_class_teacher_comment': False,
+            'missing_headmaster_comment': False
+        })
+
+    for (
+        class_level_id, student_id, expected, result_id, days_opened, present, absent,
+        class_teacher_comment, headmaster_comment
+    ) in _enrolled_results(session_id, term_id, class_level_ids, student_ids):
+        cohort = cohort_for(class_level_id)
+        cohort['students'] += 1
+        cohort['expected_scores'] += expected
+
+        if result_id is None:
+            cohort['missing_results'] += 1
+            gaps_for(class_level_id, student_id)['missing_result'] = True
+            continue
+
+        result_ids[student_id] = result_id
+        checks = {
+            'missing_attendance': not days_opened or not ((present or 0) + (absent or 0)),
+            'missing_class_teacher_comment': not (class_teacher_comment or '').strip(),
+            'missing_headmaster_comment': not (headmaster_comment or '').strip()
+        }
+        if any(checks.values()):
+            gaps = gaps_for(class_level_id, student_id)
+            gaps.update(checks)
+        cohort['missing_attendance'] += checks['missing_attendance']
+        cohort['missing_class_teacher_comments'] += checks['missing_class_teacher_comment']
+        cohort['missing_headmaster_comments'] += checks['missing_headmaster_comment']
+
+    for class_level_id, student_id, subject_id in _missing_scores(
+        session_id, term_id, class_level_ids, student_ids
+    ):
+        cohort_for(class_level_id)['missing_scores'] += 1
+        gaps_for(class_level_id, student_id)['missing_subjects'].append(subject_id)
+
+    for class_level_id, _ in students:
+        cohorts[class_level_id]['students_with_gaps'] += 1
+
+    if detail and students:
+        student_names = {
+            pk: (admission_number, f"{first_name or ''} {last_name or ''}".strip())
+            for pk, admission_number, first_name, last_name in Student.objects.filter(
+                pk__in={student_id for _, student_id in students}
+            ).values_list('id', 'admission_number', 'user__first_name', 'user__last_name')
+        }
+        subjects = {
+            pk: {'subject_id': pk, 'code': code, 'name': name}
+            for pk, code, name in Subject.objects.filter(
+                pk__in={subject_id for gaps in students.values() for subject_id in gaps['missing_subjects']}
+            ).values_list('id', 'code', 'name')
+        }
+        for cohort in cohorts.values():
+            cohort['gaps'] = []
+        for (class_level_id, student_id), gaps in sorted(
+            students.items(), key=lambda item: student_names.get(item[0][1], ('', ''))[1]
+        ):
+            admission_number, name = student_names.get(student_id, (None, ''))
+            gaps['admission_number'] = admission_number
+            gaps['student_name'] = name
+            gaps['missing_subjects'] = [subjects[pk] for pk in gaps['missing_subjects'] if pk in subjects]
+            cohorts[class_level_id]['gaps'].append(gaps)
+
+    levels = {
+        pk: (name, order)
+        for pk, name, order in ClassLevel.objects.filter(pk__in=list(cohorts)).values_list('id', 'name', 'order')
+    } if cohorts else {}
+    report = []
+    for class_level_id, cohort in sorted(cohorts.items(), key=lambda item: (levels.get(item[0], ('', 0))[1], item[0])):
+        cohort['class_level_name'] = levels.get(class_level_id, (None, 0))[0]
+        cohort['is_complete'] = cohort['students_with_gaps'] == 0
+        report.append(cohort)
+    return report
+
+
+def check_complete(session_id, term_id, class_level_ids=None, student_ids=None):
+    """Raise IncompleteResults listing the cohorts with gaps, if any"""
+    incomplete = [
+        cohort for cohort in completeness_report(session_id, term_id, class_level_ids, student_ids, detail=False)
+        if not cohort['is_complete']
+    ]
+    if incomplete:
+        logger.info(f"Publishing blocked: {len(incomplete)} incomplete cohort(s) in term {term_id}")
+        raise IncompleteResults(incomplete)
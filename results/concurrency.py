@@ -0,0 +1,40 @@
+"""
+Optimistic Concurrency for Results
+StudentResult and SubjectScore carry a version number. A save first bumps it
+with a compare-and-swap UPDATE against the version the editor started from,
+so an edit based on a stale copy is rejected instead of silently overwriting
+someone else's change.
+"""
+from django.db.models import F
+
+
+class VersionConflict(Exception):
+    """Raised when a row changed since the version the caller started from"""
+
+    def __init__(self, message, conflicts=None):
+        super().__init__(message)
+        self.conflicts = conflicts or []
+
+
+def claim_version(instance):
+    """
+    Compare-and-swap the version of an existing row: bump it from
+    instance.version, or raise VersionConflict when the stored version has
+    moved on. Must run in the same transaction as the write it guards.
+    """
+    model = type(instance)
+    expected = instance.version
+
+    claimed = model.objects.filter(pk=instance.pk, version=expected).update(version=F('version') + 1)
+    if not claimed:
+        current = model.objects.filter(pk=instance.pk).values_list('version', flat=True).first()
+        conflict = {'id': instance.pk, 'expected_version': expected, 'current_version': current}
+        if current is None:
+            raise VersionConflict(f"{model._meta.verbose_name} was deleted", [conflict])
+        raise VersionConflict(
+            f"{model._meta.verbose_name} was changed by someone else "
+            f"(version {current}, you edited version {expected})",
+            [conflict]
+        )
+
+    instance.version = expected + 1
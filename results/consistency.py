@@ -0,0 +1,197 @@
+"""
+Term-wide Result Recompute
+Recomputes StudentResult totals, percentage, grade and remark straight from
+SubjectScore with one aggregate UPDATE ... FROM per cohort, re-ranks and
+re-summarizes it, and can report drifted rows without writing anything.
+Cohorts are independent, so they are processed in parallel worker threads.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from django.db import connection, transaction
+from django.utils import timezone
+import logging
+import os
+
+from .ranking import rank_cohort, rank_subjects
+from .summaries import refresh_cohort_summaries, refresh_subject_statistics, refresh_teacher_rollups
+from .snapshots import sync_snapshots
+from .trends import forget_cohort_trends
+from .grading import scheme_for
+
+logger = logging.getLogger(__name__)
+
+# Stored columns recomputed from subject scores, in StudentResult.TOTAL_FIELDS order
+NUMERIC_TOTAL_FIELDS = [
+    'total_ca_score', 'total_exam_score', 'overall_total_score',
+    'total_obtainable', 'percentage', 'average_score'
+]
+
+
+def get_worker_count(cohort_count):
+    """Threads used for a recompute: one per cohort, capped at the CPU count"""
+    return max(1, min(cohort_count, os.cpu_count() or 1))
+
+
+def _expected_sql(cohort):
+    """
+    SELECT the recomputed totals of every result in one (class_level, session,
+    term) cohort - the SQL twin of StudentResult.apply_totals, grading with
+    the class level's scheme. Results without subject scores get zeros and a
+    blank grade. Returns (sql, params).
+    """
+    from .models import StudentResult, SubjectScore
+
+    result_table = StudentResult._meta.db_table
+    score_table = SubjectScore._meta.db_table
+    scheme = scheme_for(cohort[0])
+    grade_sql, grade_params = scheme.case_sql('b.percentage', scheme.grades)
+    remark_sql, remark_params = scheme.case_sql('b.percentage', scheme.remarks)
+
+    sql = f"""
+        SELECT
+            b.*,
+            CASE WHEN b.subjects = 0 THEN '' ELSE {grade_sql} END AS overall_grade,
+            CASE WHEN b.subjects = 0 THEN '' ELSE {remark_sql} END AS overall_remark
+        FROM (
+            SELECT
+                r.id,
+                COALESCE(ROUND(a.ca, 2), 0) AS total_ca_score,
+                COALESCE(ROUND(a.exam, 2), 0) AS total_exam_score,
+                COALESCE(ROUND(a.total, 2), 0) AS overall_total_score,
+                COALESCE(ROUND(a.obtainable, 2), 0) AS total_obtainable,
+                CASE
+                    WHEN a.obtainable > 0 THEN ROUND(a.total * 100.0 / a.obtainable, 2)
+                    ELSE 0
+                END AS percentage,
+                CASE
+                    WHEN a.obtainable > 0 THEN ROUND(a.total * 1.0 / a.subjects, 2)
+                    ELSE 0
+                END AS average_score,
+                COALESCE(a.subjects, 0) AS subjects
+            FROM {result_table} r
+            LEFT JOIN (
+                SELECT
+                    s.result_id,
+                    SUM(s.ca_score) AS ca,
+                    SUM(s.exam_score) AS exam,
+                    SUM(s.total_score) AS total,
+                    SUM(s.total_obtainable) AS obtainable,
+                    COUNT(*) AS subjects
+                FROM {score_table} s
+                JOIN {result_table} sr ON sr.id = s.result_id
+                WHERE sr.class_level_id = %s AND sr.session_id = %s AND sr.term_id = %s
+                GROUP BY s.result_id
+            ) a ON a.result_id = r.id
+            WHERE r.class_level_id = %s AND r.session_id = %s AND r.term_id = %s
+        ) b
+    """
+    return sql, [*grade_params, *remark_params, *cohort, *cohort]
+
+
+def _differs_sql(stored, expected):
+    from .models import StudentResult
+
+    return ' OR '.join(f"{stored}.{field} <> {expected}.{field}" for field in StudentResult.TOTAL_FIELDS)
+
+
+def diff_cohort(class_level_id, session_id, term_id):
+    """
+    Results of a cohort whose stored totals differ from their subject scores,
+    as dicts of result id and {field: (stored, expected)}. Read-only.
+    """
+    from .models import StudentResult
+
+    result_table = StudentResult._meta.db_table
+    fields = StudentResult.TOTAL_FIELDS
+    expected_sql, params = _expected_sql((class_level_id, session_id, term_id))
+    sql = f"""
+        SELECT r.id, {', '.join(f'r.{f}' for f in fields)}, {', '.join(f'e.{f}' for f in fields)}
+        FROM {result_table} r
+        JOIN ({expected_sql}) e ON e.id = r.id
+        WHERE {_differs_sql('r', 'e')}
+        ORDER BY r.id
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    drifted = []
+    for row in rows:
+        stored, expected = row[1:1 + len(fields)], row[1 + len(fields):]
+        changes = {}
+        for field, old, new in zip(fields, stored, expected):
+            if field in NUMERIC_TOTAL_FIELDS:
+                old, new = Decimal(str(old or 0)), round(Decimal(str(new or 0)), 2)
+            if old != new:
+                changes[field] = (old, new)
+        if changes:
+            drifted.append({'result_id': row[0], 'changes': changes})
+    return drifted
+
+
+def recompute_cohort(class_level_id, session_id, term_id):
+    """
+    Rewrite the drifted totals of a cohort with one UPDATE ... FROM, then
+    re-rank it, refresh its summaries, resync changed snapshots and drop the
+    cohort's cached trends.
+    Returns the ids of the results whose totals changed.
+    """
+    from .models import StudentResult
+
+    result_table = StudentResult._meta.db_table
+    assignments = ', '.join(f"{field} = e.{field}" for field in StudentResult.TOTAL_FIELDS)
+    cohort = (class_level_id, session_id, term_id)
+    expected_sql, params = _expected_sql(cohort)
+    sql = f"""
+        UPDATE {result_table}
+        SET {assignments}, updated_at = %s
+        FROM ({expected_sql}) e
+        WHERE {result_table}.id = e.id
+          AND ({_differs_sql(result_table, 'e')})
+        RETURNING {result_table}.id
+    """
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [timezone.now(), *params])
+            changed = [row[0] for row in cursor.fetchall()]
+
+        moved = set(rank_cohort(*cohort))
+        moved.update(rank_subjects(*cohort))
+        refresh_cohort_summaries([cohort])
+        refresh_subject_statistics([cohort])
+        refresh_teacher_rollups([cohort])
+        if changed or moved:
+            sync_snapshots(moved.union(changed))
+        if changed:
+            forget_cohort_trends([cohort])
+
+    return changed
+
+
+def _in_worker(function, cohort):
+    """Run one cohort on a pool thread and release that thread's connection"""
+    try:
+        return cohort, function(*cohort)
+    finally:
+        connection.close()
+
+
+def recompute_term(cohorts, dry_run=False, workers=None):
+    """
+    Recompute (or, with dry_run, only diff) each (class_level_id, session_id,
+    term_id) cohort, several at a time. Returns {cohort: changed ids} or
+    {cohort: drifted rows} for dry runs.
+    """
+    cohorts = sorted(set(cohorts))
+    if not cohorts:
+        return {}
+
+    function = diff_cohort if dry_run else recompute_cohort
+    workers = workers or get_worker_count(len(cohorts))
+
+    if workers <= 1:
+        return {cohort: function(*cohort) for cohort in cohorts}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='results-recompute') as pool:
+        return dict(pool.map(lambda cohort: _in_worker(function, cohort), cohorts))
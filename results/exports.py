@@ -0,0 +1,238 @@
+"""
+Result Exports
+Broadsheet (master score sheet) for a class level: one row per student and
+one CA/exam/total/position group per subject, pivoted from a single query.
+Full session exports stream every result and subject score as NDJSON or CSV.
+"""
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from itertools import groupby
+import csv
+
+from .models import StudentResult, SubjectScore
+from .summaries import subject_statistics_for
+
+# Rows fetched per round trip while streaming
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object that hands back what csv.writer writes, for streaming"""
+
+    def write(self, value):
+        return value
+
+
+def _decimal(value):
+    return None if value is None else str(value)
+
+
+def broadsheet_subjects(class_level, session, term):
+    """Subjects with at least one score in the cohort, in column order"""
+    return list(
+        SubjectScore.objects.filter(
+            result__class_level=class_level, result__session=session, result__term=term
+        ).order_by('subject__name').values_list('subject_id', 'subject__code', 'subject__name').distinct()
+    )
+
+
+def iter_broadsheet(class_level, session, term):
+    """
+    Yield one dict per student in position order.
+
+    Results are LEFT JOINed to their scores and read with .iterator(), then
+    grouped per result in Python, so memory stays flat however big the class is
+    and students without scores still get a row.
+    """
+    rows = StudentResult.objects.filter(
+        class_level=class_level, session=session, term=term
+    ).order_by(
+        F('position_in_class').asc(nulls_last=True), 'student__user__last_name',
+        'student__user__first_name', 'id'
+    ).values_list(
+        'id', 'student__admission_number', 'student__user__first_name', 'student__user__last_name',
+        'overall_total_score', 'average_score', 'percentage', 'overall_grade',
+        'position_in_class', 'number_of_pupils_in_class',
+        'subject_scores__subject_id', 'subject_scores__ca_score',
+        'subject_scores__exam_score', 'subject_scores__total_score', 'subject_scores__grade',
+        'subject_scores__position_in_subject'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    for result_id, group in groupby(rows, key=lambda row: row[0]):
+        scores = {}
+        for row in group:
+            if row[10] is not None:
+                scores[row[10]] = {
+                    'ca': _decimal(row[11]),
+                    'exam': _decimal(row[12]),
+                    'total': _decimal(row[13]),
+                    'grade': row[14],
+                    'position': row[15]
+                }
+        yield {
+            'result_id': result_id,
+            'admission_number': row[1],
+            'student_name': f"{row[2] or ''} {row[3] or ''}".strip(),
+            'scores': scores,
+            'total': _decimal(row[4]),
+            'average': _decimal(row[5]),
+            'percentage': _decimal(row[6]),
+            'grade': row[7],
+            'position': row[8],
+            'pupils': row[9]
+        }
+
+
+def _statistics(class_level, session, term):
+    cohort = (class_level.pk, session.pk, term.pk)
+    return {
+        subject_id: stat
+        for (*_, subject_id), stat in subject_statistics_for([cohort]).items()
+    }
+
+
+def broadsheet_json(class_level, session, term):
+    """
+    Compact broadsheet: subjects listed once with their class statistics,
+    scores keyed by subject id
+    """
+    statistics = _statistics(class_level, session, term)
+    subjects = []
+    for subject_id, code, name in broadsheet_subjects(class_level, session, term):
+        stat = statistics.get(subject_id)
+        subjects.append({
+            'id': subject_id,
+            'code': code,
+            'name': name,
+            'class_average': _decimal(stat.class_average) if stat else None,
+            'highest_score': _decimal(stat.highest_score) if stat else None,
+            'lowest_score': _decimal(stat.lowest_score) if stat else None
+        })
+
+    return {
+        'class_level': class_level.name,
+        'session': session.name,
+        'term': term.name,
+        'subjects': subjects,
+        'students': list(iter_broadsheet(class_level, session, term))
+    }
+
+
+def iter_broadsheet_csv(class_level, session, term):
+    """Yield the broadsheet as CSV lines for a StreamingHttpResponse"""
+    writer = csv.writer(Echo())
+    subjects = broadsheet_subjects(class_level, session, term)
+
+    header = ['Position', 'Admission No', 'Student']
+    for _, code, _ in subjects:
+        header += [f'{code} CA', f'{code} Exam', f'{code} Total', f'{code} Pos']
+    header += ['Total', 'Average', 'Percentage', 'Grade', 'Out Of']
+    yield writer.writerow(header)
+
+    for student in iter_broadsheet(class_level, session, term):
+        row = [student['position'] or '', student['admission_number'], student['student_name']]
+        for subject_id, _, _ in subjects:
+            score = student['scores'].get(subject_id)
+            row += (
+                [score['ca'], score['exam'], score['total'], score['position'] or '']
+                if score else ['', '', '', '']
+            )
+        row += [
+            student['total'], student['average'], student['percentage'], student['grade'],
+            student['pupils']
+        ]
+        yield writer.writerow(row)
+
+    # Class average, highest and lowest per subject under the students
+    statistics = _statistics(class_level, session, term)
+    for label, field in (
+        ('Class Average', 'class_average'), ('Highest', 'highest_score'), ('Lowest', 'lowest_score')
+    ):
+        row = ['', '', label]
+        for subject_id, _, _ in subjects:
+            stat = statistics.get(subject_id)
+            row += ['', '', getattr(stat, field) if stat else '', '']
+        yield writer.writerow(row)
+
+
+# ============================================
+# SESSION EXPORT
+# ============================================
+
+# (column, lookup) pairs read per result in a session export
+SESSION_EXPORT_RESULT_FIELDS = [
+    ('result_id', 'id'),
+    ('student_id', 'student_id'),
+    ('admission_number', 'student__admission_number'),
+    ('first_name', 'student__user__first_name'),
+    ('last_name', 'student__user__last_name'),
+    ('session', 'session__name'),
+    ('term', 'term__term'),
+    ('class_level', 'class_level__name'),
+    ('total_ca_score', 'total_ca_score'),
+    ('total_exam_score', 'total_exam_score'),
+    ('overall_total_score', 'overall_total_score'),
+    ('total_obtainable', 'total_obtainable'),
+    ('percentage', 'percentage'),
+    ('average_score', 'average_score'),
+    ('overall_grade', 'overall_grade'),
+    ('position_in_class', 'position_in_class'),
+    ('number_of_pupils_in_class', 'number_of_pupils_in_class'),
+    ('annual_average', 'annual_average'),
+    ('annual_position', 'annual_position'),
+    ('times_present', 'no_of_times_present'),
+    ('times_absent', 'no_of_times_absent'),
+    ('is_published', 'is_published'),
+    ('is_promoted', 'is_promoted')
+]
+
+# (column, lookup) pairs read per subject score, LEFT JOINed to its result
+SESSION_EXPORT_SCORE_FIELDS = [
+    ('subject_code', 'subject_scores__subject__code'),
+    ('subject_name', 'subject_scores__subject__name'),
+    ('ca_score', 'subject_scores__ca_score'),
+    ('exam_score', 'subject_scores__exam_score'),
+    ('total_score', 'subject_scores__total_score'),
+    ('grade', 'subject_scores__grade'),
+    ('position_in_subject', 'subject_scores__position_in_subject')
+]
+
+
+def _session_export_rows(results):
+    """
+    Flat (result..., score...) tuples for a StudentResult queryset, one per
+    subject score and one with empty score columns for results without any,
+    grouped by result and read with .iterator() so memory stays flat
+    """
+    lookups = [lookup for _, lookup in SESSION_EXPORT_RESULT_FIELDS + SESSION_EXPORT_SCORE_FIELDS]
+    return results.order_by(
+        'term__term', 'class_level__order', 'class_level_id', 'id', 'subject_scores__subject__code'
+    ).values_list(*lookups).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def iter_session_ndjson(results):
+    """Yield one JSON line per result, its subject scores nested as a list"""
+    result_columns = [column for column, _ in SESSION_EXPORT_RESULT_FIELDS]
+    score_columns = [column for column, _ in SESSION_EXPORT_SCORE_FIELDS]
+    width = len(result_columns)
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+
+    for _, group in groupby(_session_export_rows(results), key=lambda row: row[0]):
+        record = None
+        for row in group:
+            if record is None:
+                record = dict(zip(result_columns, row[:width]))
+                record['scores'] = []
+            if row[width] is not None:
+                record['scores'].append(dict(zip(score_columns, row[width:])))
+        yield encoder.encode(record) + '\n'
+
+
+def iter_session_csv(results):
+    """Yield CSV lines with one row per subject score (result columns repeated)"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(
+        [column for column, _ in SESSION_EXPORT_RESULT_FIELDS + SESSION_EXPORT_SCORE_FIELDS]
+    )
+    for row in _session_export_rows(results):
+        yield writer.writerow(['' if value is None else value for value in row])
@@ -0,0 +1,240 @@
+"""
+Grading Schemes
+Resolves the grading scheme of a class level (its own, its program's, the
+default, or the built-in StudentResult.OVERALL_GRADE_BANDS), compiles it into
+a sorted boundary array looked up with bisect, decides what counts as a
+pass, and regrades whole sessions with CASE-based set UPDATEs
+"""
+from bisect import bisect_right
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, When, Value, F, Q
+from django.utils import timezone
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# (generation, schemes) compiled by this process
+_compiled = None
+
+# time.monotonic() of the last check of _compiled against the database (None = check next lookup)
+_checked_at = None
+
+
+class CompiledScheme:
+    """Grade boundaries sorted by minimum score, for bisect lookups and CASE SQL"""
+
+    __slots__ = ('name', 'minimums', 'grades', 'remarks', 'pass_mark')
+
+    def __init__(self, name, bands, pass_mark):
+        """`bands` are (minimum, grade, remark) in any order"""
+        bands = sorted(bands, key=lambda band: band[0])
+        self.name = name
+        self.minimums = [float(band[0]) for band in bands]
+        self.grades = [band[1] for band in bands]
+        self.remarks = [band[2] for band in bands]
+        self.pass_mark = float(pass_mark)
+
+    def lookup(self, score):
+        """(grade, remark) for a score; anything below the lowest boundary gets the lowest band"""
+        index = max(bisect_right(self.minimums, float(score or 0)) - 1, 0)
+        return self.grades[index], self.remarks[index]
+
+    def bands(self):
+        """(minimum, grade, remark), best first"""
+        return list(zip(self.minimums, self.grades, self.remarks))[::-1]
+
+    def case(self, field, values):
+        """ORM Case() mapping a score field to `values` (self.grades or self.remarks)"""
+        whens = [
+            When(**{f'{field}__gte': minimum}, then=Value(value))
+            for minimum, value in list(zip(self.minimums, values))[:0:-1]
+        ]
+        return Case(*whens, default=Value(values[0]))
+
+    def case_sql(self, column, values):
+        """Raw SQL CASE (with params) mapping a score column to `values`"""
+        pairs = list(zip(self.minimums, values))[:0:-1]
+        whens = ' '.join(f"WHEN {column} >= %s THEN %s" for _ in pairs)
+        params = [param for minimum, value in pairs for param in (minimum, value)]
+        return f"CASE {whens} ELSE %s END", params + [values[0]]
+
+
+def _builtin_scheme():
+    from .models import StudentResult
+
+    return CompiledScheme('Standard', StudentResult.OVERALL_GRADE_BANDS, StudentResult.PASS_MARK)
+
+
+def _compile_all():
+    """
+    {'default': CompiledScheme, 'class_levels': {class_level_id: CompiledScheme}}
+    resolving every class level: its own scheme, else its program's, else the
+    default one - three queries
+    """
+    from academic.models import ClassLevel
+    from .models import GradingScheme
+
+    by_class_level, by_program = {}, {}
+    default = None
+    for scheme in GradingScheme.objects.filter(is_active=True).prefetch_related('boundaries').order_by('pk'):
+        bands = [(b.min_score, b.grade, b.remark) for b in scheme.boundaries.all()]
+        if not bands:
+            continue
+        compiled = CompiledScheme(scheme.name, bands, scheme.pass_mark)
+        if scheme.class_level_id:
+            by_class_level.setdefault(scheme.class_level_id, compiled)
+        elif scheme.program_id:
+            by_program.setdefault(scheme.program_id, compiled)
+        elif scheme.is_default and default is None:
+            default = compiled
+
+    default = default or _builtin_scheme()
+    class_levels = {
+        class_level_id: by_class_level.get(class_level_id) or by_program.get(program_id) or default
+        for class_level_id, program_id in ClassLevel.objects.values_list('id', 'program_id')
+    }
+    return {'default': default, 'class_levels': class_levels}
+
+
+def _generation():
+    """
+    Fingerprint of everything scheme resolution reads, in one query: the
+    latest change and row count of the schemes (boundary edits touch their
+    scheme) and of the class levels. Kept in the database rather than a
+    cache so every worker process sees a change within the recheck interval.
+    """
+    from academic.models import ClassLevel
+    from .models import GradingScheme
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT "
+            f"(SELECT MAX(updated_at) FROM {GradingScheme._meta.db_table}), "
+            f"(SELECT COUNT(*) FROM {GradingScheme._meta.db_table}), "
+            f"(SELECT MAX(updated_at) FROM {ClassLevel._meta.db_table}), "
+            f"(SELECT COUNT(*) FROM {ClassLevel._meta.db_table})"
+        )
+        return tuple(str(value) for value in cursor.fetchone())
+
+
+def get_recheck_interval():
+    """Seconds a process trusts its compiled schemes before checking the generation again"""
+    return getattr(settings, 'RESULTS_GRADING_RECHECK_SECONDS', 5)
+
+
+def _schemes():
+    """
+    Compiled schemes, memoized per process and checked against the database
+    generation at most once per recheck interval, and only when a grade is
+    looked up, so bulk writes grade thousands of scores without a query each
+    """
+    global _compiled, _checked_at
+    now = time.monotonic()
+    if _compiled is None or _checked_at is None or now - _checked_at >= get_recheck_interval():
+        generation = _generation()
+        if _compiled is None or _compiled[0] != generation:
+            _compiled = (generation, _compile_all())
+        _checked_at = now
+    return _compiled[1]
+
+
+def scheme_for(class_level_id):
+    """Compiled grading scheme of a class level (the default one if it has none)"""
+    schemes = _schemes()
+    return schemes['class_levels'].get(class_level_id) or schemes['default']
+
+
+def pass_filter(class_level_ids, field='total_score', prefix=''):
+    """
+    Q matching scores at or above the pass mark of their class level's
+    scheme - one condition per distinct pass mark. `prefix` leads to the
+    class_level_id (e.g. 'result__' from SubjectScore).
+    """
+    levels = {}
+    for class_level_id in set(class_level_ids):
+        levels.setdefault(scheme_for(class_level_id).pass_mark, []).append(class_level_id)
+
+    condition = Q(pk__in=[])
+    for pass_mark, level_ids in levels.items():
+        condition |= Q(**{f'{prefix}class_level_id__in': level_ids, f'{field}__gte': pass_mark})
+    return condition
+
+
+def recheck_grading_schemes():
+    """Check the compiled schemes against the database on the next lookup, interval or not"""
+    global _checked_at
+    _checked_at = None
+
+
+def clear_grading_cache():
+    """Recompile in this process on the next lookup; other processes see the new generation on their next check"""
+    global _compiled
+    _compiled = None
+
+
+def regrade_session(session_id, class_level_ids=None):
+    """
+    Reassign StudentResult grades/remarks and SubjectScore grades for a
+    session under the current schemes: two CASE UPDATEs per distinct scheme,
+    touching only rows whose grade changes. Results without scores keep
+    their blank grade. Cohort summaries, teacher rollups, snapshots and
+    trends of the regraded classes are refreshed once.
+    Returns {'results': count, 'scores': count, 'cohorts': count}.
+    """
+    from .models import StudentResult, SubjectScore
+    from .ranking import cohorts_for
+    from .summaries import refresh_cohort_summaries, refresh_teacher_rollups
+    from .snapshots import materialize_snapshots
+    from .trends import forget_cohort_trends
+
+    results = StudentResult.objects.filter(session_id=session_id)
+    if class_level_ids:
+        results = results.filter(class_level_id__in=class_level_ids)
+
+    # Class levels sharing a scheme are regraded together
+    groups = {}
+    for class_level_id in results.order_by().values_list('class_level_id', flat=True).distinct():
+        scheme = scheme_for(class_level_id)
+        groups.setdefault(tuple(scheme.bands()), (scheme, []))[1].append(class_level_id)
+
+    now = timezone.now()
+    regraded_results = regraded_scores = 0
+
+    with transaction.atomic():
+        for scheme, level_ids in groups.values():
+            level_filter = Q(class_level_id__in=[pk for pk in level_ids if pk is not None])
+            if None in level_ids:
+                level_filter |= Q(class_level_id__isnull=True)
+
+            regraded_results += results.filter(level_filter, total_obtainable__gt=0).annotate(
+                new_grade=scheme.case('percentage', scheme.grades),
+                new_remark=scheme.case('percentage', scheme.remarks)
+            ).filter(
+                ~Q(overall_grade=F('new_grade')) | ~Q(overall_remark=F('new_remark'))
+            ).update(
+                overall_grade=scheme.case('percentage', scheme.grades),
+                overall_remark=scheme.case('percentage', scheme.remarks),
+                updated_at=now
+            )
+
+            regraded_scores += SubjectScore.objects.filter(
+                result__in=results.filter(level_filter).order_by().values('id')
+            ).annotate(
+                new_grade=scheme.case('total_score', scheme.grades)
+            ).exclude(grade=F('new_grade')).update(
+                grade=scheme.case('total_score', scheme.grades),
+                updated_at=now
+            )
+
+        cohorts = cohorts_for(results)
+        refresh_cohort_summaries(cohorts)
+        refresh_teacher_rollups(cohorts)
+        materialize_snapshots(results)
+        forget_cohort_trends(cohorts)
+
+    logger.info(
+        f"Regraded session {session_id}: {regraded_results} result(s), {regraded_scores} score(s)"
+    )
+    return {'results': regraded_results, 'scores': regraded_scores, 'cohorts': len(cohorts)}
@@ -0,0 +1,56 @@
+# results/management/commands/archive_results.py
+"""
+Move the results of archived sessions out of StudentResult/SubjectScore into
+ArchivedResult documents, or restore them
+
+Mark a session archived (status 'archived') first. Reads of student results,
+trends and transcripts include archived results; class statistics of the
+session are kept.
+
+Run: python manage.py archive_results --session ID
+     python manage.py archive_results --all
+     python manage.py archive_results --session ID --restore
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academic.models import AcademicSession
+from results.archive import ArchiveError, archive_session, restore_session
+
+
+class Command(BaseCommand):
+    help = 'Archive (or restore) the results of archived academic sessions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session', type=int, help='ID of the academic session')
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Archive every archived session that still has results'
+        )
+        parser.add_argument(
+            '--restore', action='store_true',
+            help='Move the session\'s archived results back (change its status first)'
+        )
+
+    def handle(self, *args, **options):
+        if options['session']:
+            sessions = AcademicSession.objects.filter(pk=options['session'])
+            if not sessions.exists():
+                raise CommandError('Academic session not found')
+        elif options['all'] and not options['restore']:
+            sessions = AcademicSession.objects.filter(
+                status='archived', student_results__isnull=False
+            ).distinct()
+        else:
+            raise CommandError('Pass --session ID, or --all to archive')
+
+        action = restore_session if options['restore'] else archive_session
+        for session in sessions:
+            try:
+                summary = action(session.pk)
+            except ArchiveError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f"{session.name}: {summary['results']} results of {summary['students']} students "
+                f"{'restored' if options['restore'] else 'archived'}"
+            ))
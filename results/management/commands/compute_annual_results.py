@@ -0,0 +1,40 @@
+# results/management/commands/compute_annual_results.py
+"""
+Assemble cumulative (annual) results for an academic session
+
+Fills first/second/third term scores, aggregate and average on every subject
+score, then annual total, average and position on every result.
+
+Run: python manage.py compute_annual_results --session ID
+     python manage.py compute_annual_results --current
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academic.models import AcademicSession
+from results.annual import compute_annual_results
+
+
+class Command(BaseCommand):
+    help = 'Build cumulative term scores, annual averages and annual positions for a session'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session', type=int, help='ID of the academic session')
+        parser.add_argument('--current', action='store_true', help='Use the current academic session')
+
+    def handle(self, *args, **options):
+        if options['session']:
+            session = AcademicSession.objects.filter(pk=options['session']).first()
+        elif options['current']:
+            session = AcademicSession.objects.filter(is_current=True).first()
+        else:
+            raise CommandError('Pass --session ID or --current')
+
+        if session is None:
+            raise CommandError('Academic session not found')
+
+        summary = compute_annual_results(session.pk)
+        self.stdout.write(self.style.SUCCESS(
+            f"{session.name}: {summary['scores_updated']} subject scores and "
+            f"{summary['results_updated']} results updated in {summary['seconds']}s"
+        ))
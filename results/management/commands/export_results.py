@@ -0,0 +1,64 @@
+# results/management/commands/export_results.py
+"""
+Export every result of a session with its subject scores as NDJSON or CSV
+
+Rows are streamed straight from the database, so memory stays flat however
+large the session is. Use it for archiving, ministry returns and external
+analysis.
+
+Run: python manage.py export_results --session ID [--term ID] [--class-level ID]
+         [--format ndjson|csv] [--output FILE] [--published-only]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academic.models import AcademicSession
+from results.models import StudentResult
+from results.exports import iter_session_ndjson, iter_session_csv
+
+
+class Command(BaseCommand):
+    help = 'Stream a session\'s results and subject scores to NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session', type=int, required=True, help='ID of the academic session')
+        parser.add_argument('--term', type=int, help='Only this academic term')
+        parser.add_argument('--class-level', type=int, help='Only this class level')
+        parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson', help='Output format')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+        parser.add_argument('--published-only', action='store_true', help='Only published results')
+
+    def handle(self, *args, **options):
+        if not AcademicSession.objects.filter(pk=options['session']).exists():
+            raise CommandError(f"Academic session {options['session']} does not exist")
+
+        results = StudentResult.objects.filter(session_id=options['session'])
+        if options['term']:
+            results = results.filter(term_id=options['term'])
+        if options['class_level']:
+            results = results.filter(class_level_id=options['class_level'])
+        if options['published_only']:
+            results = results.filter(is_published=True)
+
+        lines = iter_session_csv(results) if options['format'] == 'csv' else iter_session_ndjson(results)
+
+        started = time.monotonic()
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        count = 0
+        with open(options['output'], 'w', newline='', encoding='utf-8') as handle:
+            for line in lines:
+                handle.write(line)
+                count += 1
+        elapsed = time.monotonic() - started
+
+        # CSV has a header line; NDJSON has one line per result
+        rows = count - 1 if options['format'] == 'csv' else count
+        self.stderr.write(self.style.SUCCESS(
+            f"Exported {rows} row(s) to {options['output']} in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,60 @@
+# results/management/commands/generate_transcripts.py
+"""
+Generate multi-session transcripts for a graduating (or any) class
+
+Every student with a result in the class level for the session gets a
+transcript of all their published results, rendered in parallel and zipped.
+Transcripts whose content hasn't changed are reused from the cache.
+
+Run: python manage.py generate_transcripts --session ID --class-level ID --output FILE.zip
+     python manage.py generate_transcripts --student ID [--student ID ...] --output FILE.zip
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from results.models import StudentResult
+from results.transcripts import write_transcript_book
+
+
+class Command(BaseCommand):
+    help = 'Render transcripts for a class (or selected students) into a zip'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session', type=int, help='ID of the academic session the class sat')
+        parser.add_argument('--class-level', type=int, help='ID of the class level (e.g. SSS 3)')
+        parser.add_argument(
+            '--student', type=int, action='append', dest='students', help='Student ID (repeatable)'
+        )
+        parser.add_argument('--output', required=True, help='Zip file to write')
+        parser.add_argument('--workers', type=int, help='Render processes (default: RESULTS_REPORT_WORKERS)')
+        parser.add_argument(
+            '--include-unpublished', action='store_true', help='Also print results not yet published'
+        )
+
+    def handle(self, *args, **options):
+        if options['students']:
+            student_ids = set(options['students'])
+        elif options['session'] and options['class_level']:
+            student_ids = set(
+                StudentResult.objects.filter(
+                    session_id=options['session'], class_level_id=options['class_level']
+                ).order_by().values_list('student_id', flat=True).distinct()
+            )
+        else:
+            raise CommandError('Pass --session and --class-level, or --student')
+
+        if not student_ids:
+            self.stdout.write(self.style.WARNING('No students match'))
+            return
+
+        started = time.monotonic()
+        count = write_transcript_book(
+            student_ids, options['output'],
+            published_only=not options['include_unpublished'],
+            workers=options['workers']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {count} transcript(s) to {options['output']} in {time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,86 @@
+# results/management/commands/rebuild_result_summaries.py
+"""
+Rebuild ResultCohortSummary, SubjectClassStatistics and
+TeacherPerformanceRollup rows, and subject positions, from StudentResult
+
+Summaries are kept up to date as results are recomputed and published; run
+this once to backfill existing data, or after changing results outside the app.
+Summaries of archived sessions are kept - their results live in ArchivedResult.
+
+Run: python manage.py rebuild_result_summaries [--session ID] [--class-level ID]
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from results.models import (
+    StudentResult, ResultCohortSummary, SubjectClassStatistics, TeacherPerformanceRollup,
+    ArchivedResult
+)
+from results.ranking import cohorts_for, rank_subjects
+from results.summaries import (
+    refresh_cohort_summaries, refresh_subject_statistics, refresh_teacher_rollups
+)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild precomputed result statistics per (class level, session, term)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session', type=int, help='Only rebuild this academic session')
+        parser.add_argument('--class-level', type=int, help='Only rebuild this class level')
+
+    def handle(self, *args, **options):
+        results = StudentResult.objects.all()
+        summaries = ResultCohortSummary.objects.all()
+        subject_statistics = SubjectClassStatistics.objects.all()
+        teacher_rollups = TeacherPerformanceRollup.objects.all()
+
+        if options['session']:
+            results = results.filter(session_id=options['session'])
+            summaries = summaries.filter(session_id=options['session'])
+            subject_statistics = subject_statistics.filter(session_id=options['session'])
+            teacher_rollups = teacher_rollups.filter(session_id=options['session'])
+        if options['class_level']:
+            results = results.filter(class_level_id=options['class_level'])
+            summaries = summaries.filter(class_level_id=options['class_level'])
+            subject_statistics = subject_statistics.filter(class_level_id=options['class_level'])
+            teacher_rollups = teacher_rollups.filter(class_level_id=options['class_level'])
+
+        cohorts = cohorts_for(results)
+
+        # Archived sessions have no StudentResult rows but keep their statistics
+        archived_sessions = ArchivedResult.objects.values('session_id')
+        summaries = summaries.exclude(session_id__in=archived_sessions)
+        subject_statistics = subject_statistics.exclude(session_id__in=archived_sessions)
+        teacher_rollups = teacher_rollups.exclude(session_id__in=archived_sessions)
+
+        with transaction.atomic():
+            refreshed = refresh_cohort_summaries(cohorts)
+            subjects_refreshed = refresh_subject_statistics(cohorts)
+            teachers_refreshed = refresh_teacher_rollups(cohorts)
+            for cohort in cohorts:
+                rank_subjects(*cohort)
+
+            # Summaries whose cohort no longer has any results
+            orphans = [
+                summary.pk for summary in summaries.only('class_level_id', 'session_id', 'term_id')
+                if (summary.class_level_id, summary.session_id, summary.term_id) not in cohorts
+            ]
+            ResultCohortSummary.objects.filter(pk__in=orphans).delete()
+            subject_orphans = [
+                stat.pk for stat in subject_statistics.only('class_level_id', 'session_id', 'term_id')
+                if (stat.class_level_id, stat.session_id, stat.term_id) not in cohorts
+            ]
+            SubjectClassStatistics.objects.filter(pk__in=subject_orphans).delete()
+            teacher_orphans = [
+                rollup.pk for rollup in teacher_rollups.only('class_level_id', 'session_id', 'term_id')
+                if (rollup.class_level_id, rollup.session_id, rollup.term_id) not in cohorts
+            ]
+            TeacherPerformanceRollup.objects.filter(pk__in=teacher_orphans).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {refreshed} cohort summaries ({len(orphans)} stale removed), '
+            f'{subjects_refreshed} subject statistics ({len(subject_orphans)} stale removed) and '
+            f'{teachers_refreshed} teacher rollups ({len(teacher_orphans)} stale removed)'
+        ))
@@ -0,0 +1,94 @@
+# results/management/commands/recompute_results.py
+"""
+Recompute result totals, grades and positions for a term from subject scores
+
+Each (class level, session, term) cohort is rewritten with one aggregate
+UPDATE and re-ranked; cohorts run in parallel. Use --dry-run after an incident
+to list results whose stored totals no longer match their subject scores.
+
+Run: python manage.py recompute_results --session ID [--term ID] [--class-level ID ...]
+     python manage.py recompute_results --current [--dry-run] [--workers N]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academic.models import AcademicTerm
+from results.models import StudentResult
+from results.ranking import cohorts_for
+from results.consistency import recompute_term
+
+
+class Command(BaseCommand):
+    help = 'Recompute StudentResult totals, grades and positions from subject scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session', type=int, help='ID of the academic session (all its terms)')
+        parser.add_argument('--term', type=int, help='ID of the academic term')
+        parser.add_argument('--current', action='store_true', help='Use the current academic term')
+        parser.add_argument(
+            '--class-level', type=int, action='append', dest='class_levels',
+            help='Only this class level (repeatable)'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted results without writing')
+        parser.add_argument('--workers', type=int, help='Parallel workers (default: one per CPU)')
+        parser.add_argument('--limit', type=int, default=50, help='Drifted rows to print in a dry run')
+
+    def handle(self, *args, **options):
+        results = StudentResult.objects.all()
+
+        if options['term']:
+            results = results.filter(term_id=options['term'])
+        elif options['current']:
+            term = AcademicTerm.objects.filter(is_current=True).first()
+            if term is None:
+                raise CommandError('No current academic term')
+            results = results.filter(term=term)
+        elif not options['session']:
+            raise CommandError('Pass --session ID, --term ID or --current')
+
+        if options['session']:
+            results = results.filter(session_id=options['session'])
+        if options['class_levels']:
+            results = results.filter(class_level_id__in=options['class_levels'])
+
+        cohorts = cohorts_for(results)
+        if not cohorts:
+            self.stdout.write(self.style.WARNING('No results match'))
+            return
+
+        started = time.monotonic()
+        report = recompute_term(cohorts, dry_run=options['dry_run'], workers=options['workers'])
+        elapsed = time.monotonic() - started
+
+        if options['dry_run']:
+            self._print_drift(report, options['limit'])
+            drifted = sum(len(rows) for rows in report.values())
+            style = self.style.WARNING if drifted else self.style.SUCCESS
+            self.stdout.write(style(
+                f'{drifted} drifted result(s) across {len(cohorts)} cohort(s), checked in {elapsed:.2f}s'
+            ))
+            return
+
+        changed = sum(len(ids) for ids in report.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Recomputed {len(cohorts)} cohort(s): {changed} result(s) corrected in {elapsed:.2f}s'
+        ))
+
+    def _print_drift(self, report, limit):
+        rows = [row for cohort in sorted(report) for row in report[cohort]]
+        admission_numbers = dict(
+            StudentResult.objects.filter(pk__in=[row['result_id'] for row in rows[:limit]])
+            .values_list('id', 'student__admission_number')
+        )
+
+        for row in rows[:limit]:
+            changes = ', '.join(
+                f'{field} {old} -> {new}' for field, (old, new) in row['changes'].items()
+            )
+            self.stdout.write(
+                f"  result {row['result_id']} ({admission_numbers.get(row['result_id'], '-')}): {changes}"
+            )
+        if len(rows) > limit:
+            self.stdout.write(f'  ... and {len(rows) - limit} more')
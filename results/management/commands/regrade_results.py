@@ -0,0 +1,45 @@
+# results/management/commands/regrade_results.py
+"""
+Reassign grades and remarks for an academic session under the current
+grading schemes
+
+Scores and percentages are untouched; only overall grades/remarks and
+subject grades that differ from the class level's scheme are rewritten.
+
+Run: python manage.py regrade_results --session ID [--class-level ID ...]
+     python manage.py regrade_results --current
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academic.models import AcademicSession
+from results.grading import regrade_session
+
+
+class Command(BaseCommand):
+    help = 'Regrade a session under the current grading schemes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session', type=int, help='ID of the academic session')
+        parser.add_argument('--current', action='store_true', help='Use the current academic session')
+        parser.add_argument(
+            '--class-level', type=int, action='append', dest='class_levels',
+            help='Only regrade this class level (repeatable)'
+        )
+
+    def handle(self, *args, **options):
+        if options['session']:
+            session = AcademicSession.objects.filter(pk=options['session']).first()
+        elif options['current']:
+            session = AcademicSession.objects.filter(is_current=True).first()
+        else:
+            raise CommandError('Pass --session ID or --current')
+
+        if session is None:
+            raise CommandError('Academic session not found')
+
+        summary = regrade_session(session.pk, options['class_levels'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{session.name}: {summary['results']} results and {summary['scores']} subject scores "
+            f"regraded across {summary['cohorts']} cohorts"
+        ))
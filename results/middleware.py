@@ -0,0 +1,21 @@
+# results/middleware.py
+"""
+Request-scoped result recomputation
+"""
+from .recompute import defer_recompute
+
+
+class DeferredResultRecomputeMiddleware:
+    """
+    Collects every StudentResult touched while handling a request and
+    recomputes each one (and ranks each affected class) once at the end,
+    instead of once per saved subject score. Views that return the results
+    they changed call flush_recompute() before serializing them.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with defer_recompute():
+            return self.get_response(request)
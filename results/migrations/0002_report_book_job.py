@@ -0,0 +1,105 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("results", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportBookJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("total_cards", models.PositiveIntegerField(default=0)),
+                (
+                    "completed_cards",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Cards rendered or reused so far"
+                    ),
+                ),
+                (
+                    "reused_cards",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Cards served from the report card cache"
+                    ),
+                ),
+                (
+                    "book_version",
+                    models.CharField(
+                        blank=True,
+                        help_text="Hash of every card version in the book",
+                        max_length=40,
+                    ),
+                ),
+                (
+                    "archive_path",
+                    models.CharField(
+                        blank=True,
+                        help_text="Archive location relative to the report card cache directory",
+                        max_length=255,
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "publishing",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="report_book_jobs",
+                        to="results.resultpublishing",
+                    ),
+                ),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="report_book_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Report Book Job",
+                "verbose_name_plural": "Report Book Jobs",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["publishing", "status"],
+                        name="results_rep_publish_1ec3fc_idx",
+                    )
+                ],
+            },
+        ),
+    ]
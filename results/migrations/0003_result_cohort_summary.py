@@ -0,0 +1,144 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:50
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("academic", "0002_initial"),
+        ("results", "0002_report_book_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResultCohortSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("total_results", models.PositiveIntegerField(default=0)),
+                (
+                    "scored_results",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Results with a score (the ones given a position)",
+                    ),
+                ),
+                ("published_count", models.PositiveIntegerField(default=0)),
+                ("promoted_count", models.PositiveIntegerField(default=0)),
+                (
+                    "avg_percentage",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=5
+                    ),
+                ),
+                (
+                    "max_percentage",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=5
+                    ),
+                ),
+                (
+                    "min_percentage",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=5
+                    ),
+                ),
+                (
+                    "avg_total_score",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=8
+                    ),
+                ),
+                (
+                    "max_total_score",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=8
+                    ),
+                ),
+                (
+                    "min_total_score",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=8
+                    ),
+                ),
+                (
+                    "avg_position",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=7, null=True
+                    ),
+                ),
+                (
+                    "grade_distribution",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="Number of results per overall grade",
+                    ),
+                ),
+                (
+                    "avg_present",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=7
+                    ),
+                ),
+                (
+                    "avg_absent",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=7
+                    ),
+                ),
+                (
+                    "avg_days_opened",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=7
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "class_level",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="result_summaries",
+                        to="academic.classlevel",
+                    ),
+                ),
+                (
+                    "session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="result_summaries",
+                        to="academic.academicsession",
+                    ),
+                ),
+                (
+                    "term",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="result_summaries",
+                        to="academic.academicterm",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Result Cohort Summary",
+                "verbose_name_plural": "Result Cohort Summaries",
+                "indexes": [
+                    models.Index(
+                        fields=["session", "term"],
+                        name="results_res_session_612bd6_idx",
+                    )
+                ],
+                "unique_together": {("class_level", "session", "term")},
+            },
+        ),
+    ]
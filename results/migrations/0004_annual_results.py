@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("results", "0003_result_cohort_summary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="studentresult",
+            name="annual_average",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                help_text="Average of cumulative subject averages",
+                max_digits=5,
+            ),
+        ),
+        migrations.AddField(
+            model_name="studentresult",
+            name="annual_position",
+            field=models.IntegerField(
+                blank=True,
+                help_text="Position in class on the cumulative average",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="studentresult",
+            name="annual_total_score",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                help_text="Sum of cumulative subject scores for the session so far",
+                max_digits=9,
+            ),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:53
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("academic", "0002_initial"),
+        ("results", "0004_annual_results"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubjectClassStatistics",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("student_count", models.PositiveIntegerField(default=0)),
+                (
+                    "class_average",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=5
+                    ),
+                ),
+                (
+                    "highest_score",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=5
+                    ),
+                ),
+                (
+                    "lowest_score",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=5
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "class_level",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="subject_statistics",
+                        to="academic.classlevel",
+                    ),
+                ),
+                (
+                    "session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="subject_statistics",
+                        to="academic.academicsession",
+                    ),
+                ),
+                (
+                    "subject",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="class_statistics",
+                        to="academic.subject",
+                    ),
+                ),
+                (
+                    "term",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="subject_statistics",
+                        to="academic.academicterm",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Subject Class Statistics",
+                "verbose_name_plural": "Subject Class Statistics",
+                "indexes": [
+                    models.Index(
+                        fields=["class_level", "session", "term"],
+                        name="results_sub_class_l_3803cf_idx",
+                    )
+                ],
+                "unique_together": {("class_level", "session", "term", "subject")},
+            },
+        ),
+    ]
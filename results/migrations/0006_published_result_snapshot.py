@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("results", "0005_subject_class_statistics"),
+        ("students", "0003_alter_student_emergency_contact_name_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PublishedResultSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.JSONField(default=dict)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "result",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="published_snapshot",
+                        to="results.studentresult",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="published_result_snapshots",
+                        to="students.student",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Published Result Snapshot",
+                "verbose_name_plural": "Published Result Snapshots",
+            },
+        ),
+    ]
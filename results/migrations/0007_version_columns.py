@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("results", "0006_published_result_snapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="studentresult",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="subjectscore",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
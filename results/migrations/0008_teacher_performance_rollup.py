@@ -0,0 +1,118 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:11
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("academic", "0002_initial"),
+        ("results", "0007_version_columns"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TeacherPerformanceRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("student_count", models.PositiveIntegerField(default=0)),
+                ("pass_count", models.PositiveIntegerField(default=0)),
+                (
+                    "average_score",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=5
+                    ),
+                ),
+                (
+                    "highest_score",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=5
+                    ),
+                ),
+                (
+                    "lowest_score",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=5
+                    ),
+                ),
+                (
+                    "grade_distribution",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="Number of scores per subject grade",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "class_level",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="teacher_rollups",
+                        to="academic.classlevel",
+                    ),
+                ),
+                (
+                    "session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="teacher_rollups",
+                        to="academic.academicsession",
+                    ),
+                ),
+                (
+                    "subject",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="teacher_rollups",
+                        to="academic.subject",
+                    ),
+                ),
+                (
+                    "teacher",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="performance_rollups",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "term",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="teacher_rollups",
+                        to="academic.academicterm",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Teacher Performance Rollup",
+                "verbose_name_plural": "Teacher Performance Rollups",
+                "indexes": [
+                    models.Index(
+                        fields=["class_level", "session", "term"],
+                        name="results_tea_class_l_a45d5e_idx",
+                    ),
+                    models.Index(
+                        fields=["session", "term"],
+                        name="results_tea_session_355289_idx",
+                    ),
+                ],
+                "unique_together": {
+                    ("teacher", "subject", "class_level", "session", "term")
+                },
+            },
+        ),
+    ]
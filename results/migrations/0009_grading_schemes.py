@@ -0,0 +1,124 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:14
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("academic", "0002_initial"),
+        ("results", "0008_teacher_performance_rollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GradingScheme",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                (
+                    "is_default",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Applies to class levels with no program or class level scheme",
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("description", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "class_level",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Applies to this class level only (overrides the program's scheme)",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="grading_schemes",
+                        to="academic.classlevel",
+                    ),
+                ),
+                (
+                    "program",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Applies to every class level of this program",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="grading_schemes",
+                        to="academic.program",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Grading Scheme",
+                "verbose_name_plural": "Grading Schemes",
+                "ordering": ["name"],
+            },
+        ),
+        migrations.CreateModel(
+            name="GradeBoundary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "min_score",
+                    models.DecimalField(
+                        decimal_places=2,
+                        help_text="Lowest score that earns this grade",
+                        max_digits=5,
+                        validators=[
+                            django.core.validators.MinValueValidator(0),
+                            django.core.validators.MaxValueValidator(100),
+                        ],
+                    ),
+                ),
+                ("grade", models.CharField(max_length=2)),
+                (
+                    "remark",
+                    models.CharField(
+                        choices=[
+                            ("excellent", "Excellent"),
+                            ("very_good", "Very Good"),
+                            ("good", "Good"),
+                            ("average", "Average"),
+                            ("below_average", "Below Average"),
+                            ("poor", "Poor"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "scheme",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="boundaries",
+                        to="results.gradingscheme",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Grade Boundary",
+                "verbose_name_plural": "Grade Boundaries",
+                "ordering": ["scheme", "-min_score"],
+                "unique_together": {("scheme", "min_score")},
+            },
+        ),
+    ]
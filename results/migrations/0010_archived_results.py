@@ -0,0 +1,70 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:18
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("academic", "0002_initial"),
+        ("results", "0009_grading_schemes"),
+        ("students", "0003_alter_student_emergency_contact_name_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("result_count", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "results",
+                    models.JSONField(
+                        default=list,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                    ),
+                ),
+                (
+                    "archived_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_results",
+                        to="academic.academicsession",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_results",
+                        to="students.student",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Archived Result",
+                "verbose_name_plural": "Archived Results",
+                "indexes": [
+                    models.Index(
+                        fields=["session"], name="results_arc_session_c187f5_idx"
+                    )
+                ],
+                "unique_together": {("student", "session")},
+            },
+        ),
+    ]
@@ -0,0 +1,126 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:27
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("academic", "0002_initial"),
+        ("results", "0010_archived_results"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScoreModeration",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "component",
+                    models.CharField(
+                        choices=[
+                            ("ca_score", "CA Score"),
+                            ("exam_score", "Exam Score"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "operation",
+                    models.CharField(
+                        choices=[
+                            ("add", "Add marks"),
+                            ("scale", "Scale by factor"),
+                            ("cap", "Cap at marks obtainable"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "amount",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        help_text="Marks added, or the scaling factor (unused when capping)",
+                        max_digits=6,
+                        null=True,
+                    ),
+                ),
+                ("reason", models.TextField(blank=True)),
+                ("scores_moderated", models.PositiveIntegerField(default=0)),
+                (
+                    "changes",
+                    models.JSONField(
+                        default=list,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "class_level",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="score_moderations",
+                        to="academic.classlevel",
+                    ),
+                ),
+                (
+                    "moderated_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="score_moderations",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="score_moderations",
+                        to="academic.academicsession",
+                    ),
+                ),
+                (
+                    "subject",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="score_moderations",
+                        to="academic.subject",
+                    ),
+                ),
+                (
+                    "term",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="score_moderations",
+                        to="academic.academicterm",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Score Moderation",
+                "verbose_name_plural": "Score Moderations",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["session", "term", "class_level"],
+                        name="results_sco_session_5881d2_idx",
+                    )
+                ],
+            },
+        ),
+    ]
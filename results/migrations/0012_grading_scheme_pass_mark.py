@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:41
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("results", "0011_score_moderation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gradingscheme",
+            name="pass_mark",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=50,
+                help_text="Lowest score counted as a pass in pass rates",
+                max_digits=5,
+                validators=[
+                    django.core.validators.MinValueValidator(0),
+                    django.core.validators.MaxValueValidator(100),
+                ],
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:47
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("results", "0012_grading_scheme_pass_mark"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="subjectclassstatistics",
+            name="average_ca_score",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0.00"), max_digits=5
+            ),
+        ),
+        migrations.AddField(
+            model_name="subjectclassstatistics",
+            name="average_exam_score",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0.00"), max_digits=5
+            ),
+        ),
+    ]
@@ -944,11 +944,12 @@
 """
 Complete Result/Report Card Models for Nigerian Schools
 """
-from django.db import models, connection
+from django.db import models, connection, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 import logging
 
 # Set up logger
@@ -956,9 +957,21 @@ logger = logging.getLogger(__name__)
 
 # Import related models directly
 from students.models import Student
-from academic.models import AcademicSession, AcademicTerm, ClassLevel, Subject
+from academic.models import AcademicSession, AcademicTerm, ClassLevel, Subject, Program
 from users.models import User
 
+from .ranking import rank_cohort
+from .recompute import mark_result_dirty, mark_cohort_dirty
+from .concurrency import claim_version, VersionConflict
+from .grading import scheme_for
+from .completeness import get_require_complete, check_complete
+from . import publishing
+
+
+def round_half_up(value, places=Decimal('0.01')):
+    """Round a Decimal to two places, halves away from zero like SQL ROUND()"""
+    return Decimal(value).quantize(places, rounding=ROUND_HALF_UP)
+
 
 class StudentResult(models.Model):
     """
@@ -1102,6 +1115,27 @@ class StudentResult(models.Model):
         help_text="Total number of students in class"
     )
     
+    # CUMULATIVE (ANNUAL) RESULT - the session's terms up to this one, filled by results.annual
+    annual_total_score = models.DecimalField(
+        max_digits=9,
+        decimal_places=2,
+        default=0,
+        help_text="Sum of cumulative subject scores for the session so far"
+    )
+    
+    annual_average = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        default=0,
+        help_text="Average of cumulative subject averages"
+    )
+    
+    annual_position = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text="Position in class on the cumulative average"
+    )
+    
     # OVERALL GRADING (Nigerian Standard)
     GRADE_CHOICES = [
         ('A', 'A - Excellent (80-100)'),
@@ -1200,9 +1234,36 @@ class StudentResult(models.Model):
         related_name='created_results'
     )
     
+    # Optimistic concurrency: bumped on every edit (see results.concurrency);
+    # recomputing derived totals and positions leaves it alone
+    version = models.PositiveIntegerField(default=1)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Fields derived from the subject scores (never edited directly)
+    TOTAL_FIELDS = [
+        'total_ca_score', 'total_exam_score', 'overall_total_score',
+        'total_obtainable', 'percentage', 'average_score',
+        'overall_grade', 'overall_remark'
+    ]
+
+    # Fields that decide which cohort a result is ranked in
+    COHORT_FIELDS = {'class_level', 'class_level_id', 'session', 'session_id', 'term', 'term_id'}
+
+    # Built-in grade and remark by minimum percentage (Nigerian standard), best first,
+    # used where no GradingScheme applies; anything below the last band gets the last band
+    OVERALL_GRADE_BANDS = [
+        (80, 'A', 'excellent'),
+        (60, 'B', 'good'),
+        (50, 'C', 'average'),
+        (40, 'D', 'below_average'),
+        (0, 'E', 'poor'),
+    ]
+    
+    # Lowest score counted as a pass when no grading scheme sets one
+    PASS_MARK = 50
+
     class Meta:
         ordering = ['-session__start_date', '-term__term', 'class_level', 'student']
         unique_together = ['student', 'session', 'term']
@@ -1275,34 +1336,52 @@ class StudentResult(models.Model):
             
             for score in subject_scores:
                 try:
-                    total_ca += float(score.ca_score or 0)
-                    total_exam += float(score.exam_score or 0)
-                    total_score += float(score.total_score or 0)
-                    total_obtainable += float(score.total_obtainable or 0)
-                except (TypeError, ValueError, AttributeError) as e:
+                    total_ca += Decimal(str(score.ca_score or 0))
+                    total_exam += Decimal(str(score.exam_score or 0))
+                    total_score += Decimal(str(score.total_score or 0))
+                    total_obtainable += Decimal(str(score.total_obtainable or 0))
+                except (TypeError, ValueError, AttributeError, InvalidOperation) as e:
                     logger.warning(f"Error processing subject score: {e}")
                     continue
 
-            self.total_ca_score = round(total_ca, 2)
-            self.total_exam_score = round(total_exam, 2)
-            self.overall_total_score = round(total_score, 2)
-            self.total_obtainable = round(total_obtainable, 2)
-
-            # Calculate percentage and average safely
-            if total_obtainable > 0 and len(subject_scores) > 0:
-                self.percentage = round((total_score / total_obtainable) * 100, 2)
-                self.average_score = round(total_score / len(subject_scores), 2)
-            else:
-                self.percentage = 0
-                self.average_score = 0
-
-            # Determine grade based on Nigerian standard
-            self._assign_grade_and_remark()
+            self.apply_totals(total_ca, total_exam, total_score, total_obtainable, len(subject_scores))
 
         except Exception as e:
             logger.error(f"Unexpected error in calculate_totals for StudentResult {getattr(self, 'id', 'new')}: {e}")
             self._reset_calculated_fields()
     
+    def apply_totals(self, total_ca, total_exam, total_score, total_obtainable, subject_count):
+        """
+        Set the calculated fields from already-summed subject scores
+        Shared by calculate_totals and the aggregate recompute in results.recompute.
+        Decimal arithmetic rounded half-up, as SQL ROUND() does in the
+        set-based recompute (results.consistency), so both store the same values
+        """
+        if not subject_count:
+            self._reset_calculated_fields()
+            return
+
+        total_ca = Decimal(str(total_ca or 0))
+        total_exam = Decimal(str(total_exam or 0))
+        total_score = Decimal(str(total_score or 0))
+        total_obtainable = Decimal(str(total_obtainable or 0))
+
+        self.total_ca_score = round_half_up(total_ca)
+        self.total_exam_score = round_half_up(total_exam)
+        self.overall_total_score = round_half_up(total_score)
+        self.total_obtainable = round_half_up(total_obtainable)
+
+        # Calculate percentage and average safely
+        if total_obtainable > 0:
+            self.percentage = round_half_up(total_score * 100 / total_obtainable)
+            self.average_score = round_half_up(total_score / subject_count)
+        else:
+            self.percentage = 0
+            self.average_score = 0
+
+        # Determine grade based on Nigerian standard
+        self._assign_grade_and_remark()
+    
     def _reset_calculated_fields(self):
         """Reset all calculated fields to default values"""
         self.total_ca_score = 0
@@ -1315,25 +1394,11 @@ class StudentResult(models.Model):
         self.overall_remark = ''
     
     def _assign_grade_and_remark(self):
-        """Assign grade and remark based on percentage"""
+        """Assign grade and remark from the class level's grading scheme"""
         try:
-            percentage = float(self.percentage)
-            
-            if percentage >= 80:
-                self.overall_grade = 'A'
-                self.overall_remark = 'excellent'
-            elif percentage >= 60:
-                self.overall_grade = 'B'
-                self.overall_remark = 'good'
-            elif percentage >= 50:
-                self.overall_grade = 'C'
-                self.overall_remark = 'average'
-            elif percentage >= 40:
-                self.overall_grade = 'D'
-                self.overall_remark = 'below_average'
-            else:
-                self.overall_grade = 'E'
-                self.overall_remark = 'poor'
+            self.overall_grade, self.overall_remark = scheme_for(self.class_level_id).lookup(
+                float(self.percentage)
+            )
         except (TypeError, ValueError) as e:
             logger.error(f"Error assigning grade: {e}")
             self.overall_grade = ''
@@ -1342,38 +1407,24 @@ class StudentResult(models.Model):
     def calculate_position(self):
         """
         Calculate student's position in class
-        SAFE version with error handling
+        Ranks the whole cohort in one UPDATE (see results.ranking) and reads
+        this result's position back
         """
         try:
             # Don't calculate if missing required fields
-            if not self.pk or not self.class_level or not self.session or not self.term:
+            if not self.pk or not self.class_level_id or not self.session_id or not self.term_id:
                 self.position_in_class = None
                 self.number_of_pupils_in_class = 0
                 return
 
-            # Safely query with error handling
             try:
-                class_results = StudentResult.objects.filter(
-                    class_level=self.class_level,
-                    session=self.session,
-                    term=self.term,
-                    overall_total_score__gt=0
-                ).order_by('-overall_total_score', '-percentage')
-                
-                # Update total number of students
-                self.number_of_pupils_in_class = class_results.count()
-                
-                # Calculate position
-                position_found = False
-                for position, result in enumerate(class_results, start=1):
-                    if result.id == self.id:
-                        self.position_in_class = position
-                        position_found = True
-                        break
-                
-                if not position_found:
-                    self.position_in_class = None
-                    
+                rank_cohort(self.class_level_id, self.session_id, self.term_id)
+
+                ranked = StudentResult.objects.filter(pk=self.pk).values_list(
+                    'position_in_class', 'number_of_pupils_in_class'
+                ).first()
+                self.position_in_class, self.number_of_pupils_in_class = ranked or (None, 0)
+
             except Exception as e:
                 logger.error(f"Database error in calculate_position for StudentResult {self.id}: {e}")
                 self.position_in_class = None
@@ -1384,10 +1435,30 @@ class StudentResult(models.Model):
             self.position_in_class = None
             self.number_of_pupils_in_class = 0
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the cohort the row was loaded in, so a class change re-ranks both cohorts
+        # (read from __dict__ so deferred fields are never fetched one row at a time)
+        instance._loaded_cohort = (
+            instance.__dict__.get('class_level_id'),
+            instance.__dict__.get('session_id'),
+            instance.__dict__.get('term_id'),
+        )
+        return instance
+
+    @property
+    def cohort(self):
+        """(class_level_id, session_id, term_id) key used for ranking"""
+        return (self.class_level_id, self.session_id, self.term_id)
+
     def save(self, *args, **kwargs):
         """
         Overridden save method with robust error handling
         Prevents any database relation errors from crashing the system
+        Totals and position are not recalculated inline: the result is marked
+        dirty and recomputed once when the request or transaction commits
+        (see results.recompute)
         """
         try:
             # Run validation
@@ -1396,49 +1467,28 @@ class StudentResult(models.Model):
             except Exception as e:
                 logger.error(f"Error in clean during save: {e}")
 
-            # Check if this is a new object
-            is_new = self.pk is None
-            
-            # FIRST SAVE (create PK if needed)
-            try:
-                super().save(*args, **kwargs)
-            except Exception as e:
-                logger.error(f"Error in initial save: {e}")
-                # If save failed, re-raise for Django to handle
-                raise
-
-            # Now object has ID — try to update calculated fields
-            try:
-                self.calculate_totals()
-            except Exception as e:
-                logger.error(f"Error calculating totals after save: {e}")
-            
-            try:
-                self.calculate_position()
-            except Exception as e:
-                logger.error(f"Error calculating position after save: {e}")
-
-            # Update calculated fields only (if they changed)
-            update_fields = kwargs.get('update_fields', None)
-            
-            # Only update calculated fields if we're not already updating specific fields
-            if not update_fields:
+            # Compare-and-swap the version so an edit of a stale copy is rejected
+            with transaction.atomic():
+                if self.pk and not self._state.adding:
+                    claim_version(self)
                 try:
-                    super().save(update_fields=[
-                        'total_ca_score',
-                        'total_exam_score',
-                        'overall_total_score',
-                        'total_obtainable',
-                        'percentage',
-                        'average_score',
-                        'overall_grade',
-                        'overall_remark',
-                        'position_in_class',
-                        'number_of_pupils_in_class'
-                    ])
+                    super().save(*args, **kwargs)
                 except Exception as e:
-                    logger.error(f"Error updating calculated fields: {e}")
+                    logger.error(f"Error in initial save: {e}")
+                    # If save failed, re-raise for Django to handle
+                    raise
+
+            update_fields = kwargs.get('update_fields', None)
+            if not update_fields or self.COHORT_FIELDS.intersection(update_fields):
+                mark_result_dirty(self.pk)
+
+                loaded_cohort = getattr(self, '_loaded_cohort', None)
+                if loaded_cohort and loaded_cohort != self.cohort:
+                    mark_cohort_dirty(loaded_cohort)
+                self._loaded_cohort = self.cohort
                     
+        except VersionConflict:
+            raise
         except Exception as e:
             logger.error(f"Critical error in save method for StudentResult: {e}")
             # Re-raise only critical errors, log others
@@ -1602,6 +1652,9 @@ class SubjectScore(models.Model):
         help_text="Remark on student's attitude in this subject"
     )
     
+    # Optimistic concurrency: bumped on every edit (see results.concurrency)
+    version = models.PositiveIntegerField(default=1)
+    
     # Position in subject across class
     position_in_subject = models.IntegerField(
         null=True,
@@ -1650,18 +1703,9 @@ class SubjectScore(models.Model):
             # Calculate total
             self.total_score = (self.ca_score or 0) + (self.exam_score or 0)
             
-            # Assign grade based on Nigerian standard
-            total = float(self.total_score)
-            if total >= 80:
-                self.grade = 'A'
-            elif total >= 60:
-                self.grade = 'B'
-            elif total >= 50:
-                self.grade = 'C'
-            elif total >= 40:
-                self.grade = 'D'
-            else:
-                self.grade = 'E'
+            # Assign grade from the class level's grading scheme
+            class_level_id = self.result.class_level_id if self.result_id else None
+            self.grade, _ = scheme_for(class_level_id).lookup(float(self.total_score))
             
             # Update term-specific scores based on current term
             if self.result and self.result.term:
@@ -1697,20 +1741,14 @@ class SubjectScore(models.Model):
         try:
             self.clean()
             self.calculate_total_and_grade()
-            super().save(*args, **kwargs)
-            
-            # Safely recalculate parent result totals
-            if self.result_id:
-                try:
-                    self.result.calculate_totals()
-                    self.result.save(update_fields=[
-                        'total_ca_score', 'total_exam_score', 'overall_total_score',
-                        'total_obtainable', 'percentage', 'average_score',
-                        'overall_grade', 'overall_remark'
-                    ])
-                except Exception as e:
-                    logger.error(f"Error updating parent result: {e}")
+            # Parent result totals are recomputed at commit by the post_save signal
+            with transaction.atomic():
+                if self.pk and not self._state.adding:
+                    claim_version(self)
+                super().save(*args, **kwargs)
                     
+        except VersionConflict:
+            raise
         except Exception as e:
             logger.error(f"Error in SubjectScore.save: {e}")
             raise
@@ -2012,24 +2050,28 @@ class ResultPublishing(models.Model):
         except:
             return f"ResultPublishing {self.id}"
     
-    def publish_results(self, user):
-        """Publish results for this session, term, and class"""
-        try:
-            self.is_published = True
-            self.published_date = timezone.now()
-            self.published_by = user
-            
-            # Update all student results to published
-            results = StudentResult.objects.filter(
-                session=self.session,
-                term=self.term
+    def publish_results(self, user, force=False):
+        """
+        Publish results for this session, term, and class. Raises
+        IncompleteResults if completeness is required and not forced.
+        """
+        if get_require_complete() and not force:
+            check_complete(
+                self.session_id, self.term_id,
+                class_level_ids=[self.class_level_id] if self.class_level_id else None
             )
-            
-            if self.class_level:
-                results = results.filter(class_level=self.class_level)
-            
-            results.update(is_published=True)
-            self.save()
+        
+        try:
+            with transaction.atomic():
+                if self.pk is None:
+                    self.save()
+                publishing.publish_results(
+                    self._cohort_results(), user, cohorts=self._cohorts(), force=True
+                )
+                self.is_published = True
+                self.published_date = timezone.now()
+                self.published_by = user
+                self.save()
         except Exception as e:
             logger.error(f"Error publishing results: {e}")
             raise
@@ -2037,21 +2079,529 @@ class ResultPublishing(models.Model):
     def unpublish_results(self):
         """Unpublish results for this session, term, and class"""
         try:
-            self.is_published = False
-            self.published_date = None
-            self.published_by = None
-            
-            # Update all student results to not published
-            results = StudentResult.objects.filter(
-                session=self.session,
-                term=self.term
-            )
-            
-            if self.class_level:
-                results = results.filter(class_level=self.class_level)
-            
-            results.update(is_published=False)
-            self.save()
+            with transaction.atomic():
+                publishing.unpublish_results(self._cohort_results())
+                self.is_published = False
+                self.published_date = None
+                self.published_by = None
+                self.save()
         except Exception as e:
             logger.error(f"Error unpublishing results: {e}")
-            raise
\ No newline at end of file
+            raise
+    
+    def _cohort_results(self):
+        """The results this record publishes: its class level's, or the whole term's"""
+        results = StudentResult.objects.filter(session=self.session, term=self.term)
+        if self.class_level:
+            results = results.filter(class_level=self.class_level)
+        return results
+    
+    def _cohorts(self):
+        """(class_level, session, term) of this record, for publishing_status"""
+        return [(self.class_level, self.session, self.term)] if self.class_level else None
+
+class ResultCohortSummary(models.Model):
+    """
+    Result Cohort Summary
+    Precomputed statistics for one (class_level, session, term), kept up to
+    date whenever the cohort is recomputed or published
+    """
+    
+    class_level = models.ForeignKey(
+        ClassLevel,
+        on_delete=models.CASCADE,
+        related_name='result_summaries'
+    )
+    session = models.ForeignKey(
+        AcademicSession,
+        on_delete=models.CASCADE,
+        related_name='result_summaries'
+    )
+    term = models.ForeignKey(
+        AcademicTerm,
+        on_delete=models.CASCADE,
+        related_name='result_summaries'
+    )
+    
+    # COUNTS
+    total_results = models.PositiveIntegerField(default=0)
+    scored_results = models.PositiveIntegerField(
+        default=0,
+        help_text="Results with a score (the ones given a position)"
+    )
+    published_count = models.PositiveIntegerField(default=0)
+    promoted_count = models.PositiveIntegerField(default=0)
+    
+    # PERFORMANCE
+    avg_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'))
+    max_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'))
+    min_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'))
+    avg_total_score = models.DecimalField(max_digits=8, decimal_places=2, default=Decimal('0.00'))
+    max_total_score = models.DecimalField(max_digits=8, decimal_places=2, default=Decimal('0.00'))
+    min_total_score = models.DecimalField(max_digits=8, decimal_places=2, default=Decimal('0.00'))
+    avg_position = models.DecimalField(max_digits=7, decimal_places=2, null=True, blank=True)
+    
+    grade_distribution = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Number of results per overall grade"
+    )
+    
+    # ATTENDANCE
+    avg_present = models.DecimalField(max_digits=7, decimal_places=2, default=Decimal('0.00'))
+    avg_absent = models.DecimalField(max_digits=7, decimal_places=2, default=Decimal('0.00'))
+    avg_days_opened = models.DecimalField(max_digits=7, decimal_places=2, default=Decimal('0.00'))
+    
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['class_level', 'session', 'term']
+        verbose_name = 'Result Cohort Summary'
+        verbose_name_plural = 'Result Cohort Summaries'
+        indexes = [
+            models.Index(fields=['session', 'term']),
+        ]
+
+    def __str__(self):
+        return f"{self.class_level} - {self.term} ({self.total_results} results)"
+    
+    @property
+    def avg_attendance_percentage(self):
+        if not self.avg_days_opened:
+            return 0
+        return round(float(self.avg_present) / float(self.avg_days_opened) * 100, 2)
+    
+    def grade_distribution_list(self):
+        """Grade distribution in the [{'overall_grade': ..., 'count': ...}] shape the API returns"""
+        return [
+            {'overall_grade': grade, 'count': count}
+            for grade, count in sorted(self.grade_distribution.items())
+        ]
+
+class SubjectClassStatistics(models.Model):
+    """
+    Subject Class Statistics
+    Class average (total, CA and exam), highest and lowest score per subject
+    for one (class_level, session, term), refreshed with the cohort's ranking
+    """
+    
+    class_level = models.ForeignKey(
+        ClassLevel,
+        on_delete=models.CASCADE,
+        related_name='subject_statistics'
+    )
+    session = models.ForeignKey(
+        AcademicSession,
+        on_delete=models.CASCADE,
+        related_name='subject_statistics'
+    )
+    term = models.ForeignKey(
+        AcademicTerm,
+        on_delete=models.CASCADE,
+        related_name='subject_statistics'
+    )
+    subject = models.ForeignKey(
+        Subject,
+        on_delete=models.CASCADE,
+        related_name='class_statistics'
+    )
+    
+    student_count = models.PositiveIntegerField(default=0)
+    class_average = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'))
+    average_ca_score = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'))
+    average_exam_score = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'))
+    highest_score = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'))
+    lowest_score = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'))
+    
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['class_level', 'session', 'term', 'subject']
+        verbose_name = 'Subject Class Statistics'
+        verbose_name_plural = 'Subject Class Statistics'
+        indexes = [
+            models.Index(fields=['class_level', 'session', 'term']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} - {self.class_level} - {self.term} (avg {self.class_average})"
+
+
+class TeacherPerformanceRollup(models.Model):
+    """
+    Teacher Performance Rollup
+    How one subject teacher's students scored in a subject for one
+    (class_level, session, term): the teacher comes from the ClassSubject of
+    the arm each student is enrolled in. Refreshed with the cohort's ranking.
+    """
+    
+    teacher = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='performance_rollups'
+    )
+    subject = models.ForeignKey(
+        Subject,
+        on_delete=models.CASCADE,
+        related_name='teacher_rollups'
+    )
+    class_level = models.ForeignKey(
+        ClassLevel,
+        on_delete=models.CASCADE,
+        related_name='teacher_rollups'
+    )
+    session = models.ForeignKey(
+        AcademicSession,
+        on_delete=models.CASCADE,
+        related_name='teacher_rollups'
+    )
+    term = models.ForeignKey(
+        AcademicTerm,
+        on_delete=models.CASCADE,
+        related_name='teacher_rollups'
+    )
+    
+    student_count = models.PositiveIntegerField(default=0)
+    pass_count = models.PositiveIntegerField(default=0)
+    average_score = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'))
+    highest_score = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'))
+    lowest_score = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'))
+    grade_distribution = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Number of scores per subject grade"
+    )
+    
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['teacher', 'subject', 'class_level', 'session', 'term']
+        verbose_name = 'Teacher Performance Rollup'
+        verbose_name_plural = 'Teacher Performance Rollups'
+        indexes = [
+            models.Index(fields=['class_level', 'session', 'term']),
+            models.Index(fields=['session', 'term']),
+        ]
+
+    def __str__(self):
+        return f"{self.teacher} - {self.subject} - {self.class_level} - {self.term} (avg {self.average_score})"
+    
+    @property
+    def pass_rate(self):
+        if not self.student_count:
+            return 0
+        return round(self.pass_count * 100 / self.student_count, 2)
+
+class ReportBookJob(models.Model):
+    """
+    Report Book Generation Job
+    Renders every report card of a ResultPublishing scope into one archive
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    publishing = models.ForeignKey(
+        ResultPublishing,
+        on_delete=models.CASCADE,
+        related_name='report_book_jobs'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    
+    total_cards = models.PositiveIntegerField(default=0)
+    
+    completed_cards = models.PositiveIntegerField(
+        default=0,
+        help_text="Cards rendered or reused so far"
+    )
+    
+    reused_cards = models.PositiveIntegerField(
+        default=0,
+        help_text="Cards served from the report card cache"
+    )
+    
+    book_version = models.CharField(
+        max_length=40,
+        blank=True,
+        help_text="Hash of every card version in the book"
+    )
+    
+    archive_path = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Archive location relative to the report card cache directory"
+    )
+    
+    error = models.TextField(blank=True)
+    
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='report_book_jobs'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Report Book Job'
+        verbose_name_plural = 'Report Book Jobs'
+        indexes = [
+            models.Index(fields=['publishing', 'status']),
+        ]
+
+    def __str__(self):
+        return f"Report book for {self.publishing} ({self.get_status_display()})"
+    
+    @property
+    def progress(self):
+        """Percentage of cards done"""
+        if not self.total_cards:
+            return 100 if self.status == 'completed' else 0
+        return round(self.completed_cards / self.total_cards * 100, 1)
+
+
+class PublishedResultSnapshot(models.Model):
+    """
+    Published Result Snapshot
+    Read-only copy of a published result as StudentResultSerializer renders it,
+    materialized when results are published so student and parent reads are a
+    single row (or cache) lookup instead of nested serialization
+    """
+    
+    result = models.OneToOneField(
+        StudentResult,
+        on_delete=models.CASCADE,
+        related_name='published_snapshot'
+    )
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='published_result_snapshots'
+    )
+    
+    data = models.JSONField(default=dict)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Published Result Snapshot'
+        verbose_name_plural = 'Published Result Snapshots'
+
+    def __str__(self):
+        return f"Snapshot of {self.result}"
+
+
+class GradingScheme(models.Model):
+    """
+    Grading Scheme
+    Grade boundaries for a class level, a whole program, or the school
+    default. A class level uses its own scheme, else its program's, else the
+    default, else StudentResult.OVERALL_GRADE_BANDS.
+    """
+    
+    name = models.CharField(max_length=100)
+    program = models.ForeignKey(
+        Program,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='grading_schemes',
+        help_text="Applies to every class level of this program"
+    )
+    class_level = models.ForeignKey(
+        ClassLevel,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='grading_schemes',
+        help_text="Applies to this class level only (overrides the program's scheme)"
+    )
+    is_default = models.BooleanField(
+        default=False,
+        help_text="Applies to class levels with no program or class level scheme"
+    )
+    pass_mark = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        default=StudentResult.PASS_MARK,
+        validators=[MinValueValidator(0), MaxValueValidator(100)],
+        help_text="Lowest score counted as a pass in pass rates"
+    )
+    is_active = models.BooleanField(default=True)
+    description = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Grading Scheme'
+        verbose_name_plural = 'Grading Schemes'
+
+    def __str__(self):
+        scope = self.class_level or self.program or ('Default' if self.is_default else 'Unassigned')
+        return f"{self.name} ({scope})"
+    
+    def clean(self):
+        """A scheme applies to one scope: a class level, a program or the default"""
+        if sum([bool(self.class_level_id), bool(self.program_id), self.is_default]) > 1:
+            raise ValidationError("Choose only one of class level, program or default")
+
+
+class GradeBoundary(models.Model):
+    """
+    Grade Boundary
+    Minimum score (percentage for overall results) for a grade in a scheme
+    """
+    
+    scheme = models.ForeignKey(
+        GradingScheme,
+        on_delete=models.CASCADE,
+        related_name='boundaries'
+    )
+    min_score = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        validators=[MinValueValidator(0), MaxValueValidator(100)],
+        help_text="Lowest score that earns this grade"
+    )
+    grade = models.CharField(max_length=2)
+    remark = models.CharField(max_length=20, choices=StudentResult.REMARK_CHOICES)
+
+    class Meta:
+        unique_together = ['scheme', 'min_score']
+        ordering = ['scheme', '-min_score']
+        verbose_name = 'Grade Boundary'
+        verbose_name_plural = 'Grade Boundaries'
+
+    def __str__(self):
+        return f"{self.scheme.name}: {self.grade} from {self.min_score}"
+
+
+class ArchivedResult(models.Model):
+    """
+    Archived Result
+    Every result a student had in an archived session, moved out of
+    StudentResult into one JSON document per student and session. Each entry
+    keeps the result as StudentResultSerializer renders it (for reads) and
+    its raw rows (for restoring it).
+    """
+    
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='archived_results'
+    )
+    session = models.ForeignKey(
+        AcademicSession,
+        on_delete=models.CASCADE,
+        related_name='archived_results'
+    )
+    
+    result_count = models.PositiveSmallIntegerField(default=0)
+    results = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ['student', 'session']
+        verbose_name = 'Archived Result'
+        verbose_name_plural = 'Archived Results'
+        indexes = [
+            models.Index(fields=['session']),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.session} (archived)"
+
+
+
+class ScoreModeration(models.Model):
+    """
+    Score Moderation
+    Audit record of one moderation of a subject's CA or exam scores across a
+    class level for a term (see results.moderation), with every changed
+    score's value before and after
+    """
+    
+    COMPONENT_CHOICES = [
+        ('ca_score', 'CA Score'),
+        ('exam_score', 'Exam Score'),
+    ]
+    
+    OPERATION_CHOICES = [
+        ('add', 'Add marks'),
+        ('scale', 'Scale by factor'),
+        ('cap', 'Cap at marks obtainable'),
+    ]
+    
+    subject = models.ForeignKey(
+        Subject,
+        on_delete=models.CASCADE,
+        related_name='score_moderations'
+    )
+    class_level = models.ForeignKey(
+        ClassLevel,
+        on_delete=models.CASCADE,
+        related_name='score_moderations'
+    )
+    session = models.ForeignKey(
+        AcademicSession,
+        on_delete=models.CASCADE,
+        related_name='score_moderations'
+    )
+    term = models.ForeignKey(
+        AcademicTerm,
+        on_delete=models.CASCADE,
+        related_name='score_moderations'
+    )
+    
+    component = models.CharField(max_length=20, choices=COMPONENT_CHOICES)
+    operation = models.CharField(max_length=10, choices=OPERATION_CHOICES)
+    amount = models.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Marks added, or the scaling factor (unused when capping)"
+    )
+    reason = models.TextField(blank=True)
+    
+    scores_moderated = models.PositiveIntegerField(default=0)
+    # [{'score_id', 'result_id', 'student_id', 'before', 'after'}] for every changed score
+    changes = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    
+    moderated_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='score_moderations'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Score Moderation'
+        verbose_name_plural = 'Score Moderations'
+        indexes = [
+            models.Index(fields=['session', 'term', 'class_level']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} - {self.class_level} - {self.get_operation_display()} ({self.component})"
@@ -0,0 +1,167 @@
+"""
+Score Moderation
+Adjusts one component (CA or exam) of a subject's scores across a whole
+(subject, class_level, session, term) set - add marks, scale by a factor, or
+cap at the marks obtainable - with one UPDATE that clamps every new value to
+0..obtainable and rewrites total, term slot, aggregate, average and grade
+from it. The operation is recorded as a ScoreModeration and the affected
+results are recomputed and re-ranked once.
+"""
+from decimal import Decimal, InvalidOperation
+from django.db import connection, transaction
+from django.utils import timezone
+import logging
+
+from .grading import scheme_for
+from .recompute import recompute_results
+
+logger = logging.getLogger(__name__)
+
+# Moderated score column -> the column holding its marks obtainable
+MODERATED_COMPONENTS = {'ca_score': 'ca_obtainable', 'exam_score': 'exam_obtainable'}
+
+# Operation -> SQL applied to the component (%s is the amount)
+MODERATION_OPERATIONS = {
+    'add': '{column} + %s',
+    'scale': '{column} * %s',
+    'cap': '{column}',
+}
+
+TERM_SCORE_FIELDS = {'first': 'first_term_score', 'second': 'second_term_score', 'third': 'third_term_score'}
+
+
+class ModerationError(Exception):
+    """The moderation requested can't be applied"""
+
+
+def _amount(operation, amount):
+    """The amount as a Decimal, checked for the operation (None when capping)"""
+    if operation not in MODERATION_OPERATIONS:
+        raise ModerationError(f"Operation must be one of {', '.join(MODERATION_OPERATIONS)}")
+    if operation == 'cap':
+        return None
+    try:
+        amount = Decimal(str(amount))
+    except (InvalidOperation, TypeError, ValueError):
+        raise ModerationError(f"'{operation}' needs a numeric amount")
+    if operation == 'scale' and amount <= 0:
+        raise ModerationError("Scaling needs a factor greater than 0")
+    return amount
+
+
+def _build_moderation_sql(component, operation, term, scheme):
+    """
+    UPDATE the component of one subject's scores in a cohort to its moderated
+    value, clamped to 0..obtainable, with total, term slot, aggregate,
+    average and grade recalculated as SubjectScore.calculate_total_and_grade()
+    does. Rows whose component doesn't change are left alone. Returns
+    (sql, grade_params); the statement then takes updated_at, the amount
+    (unless capping) and session, term, class level and subject ids.
+    """
+    from .models import StudentResult, SubjectScore
+
+    score_table = SubjectScore._meta.db_table
+    result_table = StudentResult._meta.db_table
+    other = 'exam_score' if component == 'ca_score' else 'ca_score'
+    moderated = MODERATION_OPERATIONS[operation].format(column=f"s.{component}")
+
+    total = "(m.value + m.other)"
+    slots = [total if field == TERM_SCORE_FIELDS.get(term.term) else field for field in TERM_SCORE_FIELDS.values()]
+    summed = ' + '.join(f"COALESCE({slot}, 0)" for slot in slots)
+    counted = ' + '.join(f"CASE WHEN COALESCE({slot}, 0) > 0 THEN 1 ELSE 0 END" for slot in slots)
+    positive = ' + '.join(f"CASE WHEN COALESCE({slot}, 0) > 0 THEN {slot} ELSE 0 END" for slot in slots)
+    grade_sql, grade_params = scheme.case_sql(total, scheme.grades)
+    term_slot = f"{TERM_SCORE_FIELDS[term.term]} = {total}," if term.term in TERM_SCORE_FIELDS else ''
+
+    sql = f"""
+        UPDATE {score_table}
+        SET {component} = m.value,
+            total_score = {total},
+            {term_slot}
+            aggregated_score = {summed},
+            average_score = CASE
+                WHEN ({counted}) > 0 THEN ROUND(({positive}) * 1.0 / ({counted}), 2)
+                ELSE 0
+            END,
+            grade = {grade_sql},
+            version = version + 1,
+            updated_at = %s
+        FROM (
+            SELECT id, other,
+                CASE WHEN raw < 0 THEN 0 WHEN raw > obtainable THEN obtainable ELSE raw END AS value
+            FROM (
+                SELECT s.id, s.{other} AS other, s.{MODERATED_COMPONENTS[component]} AS obtainable,
+                    ROUND({moderated}, 2) AS raw
+                FROM {score_table} s
+                JOIN {result_table} r ON r.id = s.result_id
+                WHERE r.session_id = %s AND r.term_id = %s AND r.class_level_id = %s AND s.subject_id = %s
+            ) raw_scores
+        ) m
+        WHERE {score_table}.id = m.id
+          AND {score_table}.{component} <> m.value
+    """
+    return sql, grade_params
+
+
+def moderate_scores(subject, class_level, session, term, component, operation, amount=None, user=None, reason=''):
+    """
+    Moderate the `component` of every `subject` score of a class level in a
+    term. The scores are locked and read once for the audit record, changed
+    with one UPDATE, read back once, and their results recomputed together.
+    Returns the ScoreModeration recorded.
+    """
+    from .models import SubjectScore, ScoreModeration
+
+    if component not in MODERATED_COMPONENTS:
+        raise ModerationError(f"Only {' or '.join(MODERATED_COMPONENTS)} can be moderated")
+    amount = _amount(operation, amount)
+    if session.status == 'archived':
+        raise ModerationError(f"Session {session.name} is archived")
+    if term.session_id != session.pk:
+        raise ModerationError("Term does not belong to the selected session")
+
+    sql, grade_params = _build_moderation_sql(component, operation, term, scheme_for(class_level.pk))
+    params = grade_params + [timezone.now()] + ([amount] if amount is not None else [])
+    params += [session.pk, term.pk, class_level.pk, subject.pk]
+
+    scores = SubjectScore.objects.filter(
+        subject=subject, result__session=session, result__term=term, result__class_level=class_level
+    )
+
+    with transaction.atomic():
+        before = {
+            pk: (result_id, student_id, value)
+            for pk, result_id, student_id, value in scores.select_for_update(of=('self',)).order_by('pk')
+            .values_list('pk', 'result_id', 'result__student_id', component)
+        }
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            moderated = cursor.rowcount
+
+        changes = []
+        if moderated:
+            for pk, value in SubjectScore.objects.filter(pk__in=list(before)).order_by('pk').values_list('pk', component):
+                result_id, student_id, previous = before[pk]
+                if value != previous:
+                    changes.append({
+                        'score_id': pk, 'result_id': result_id, 'student_id': student_id,
+                        'before': previous, 'after': value
+                    })
+
+        moderation = ScoreModeration.objects.create(
+            subject=subject, class_level=class_level, session=session, term=term,
+            component=component, operation=operation, amount=amount, reason=reason,
+            scores_moderated=len(changes), changes=changes, moderated_by=user
+        )
+
+    if changes:
+        recompute_results(
+            {change['result_id'] for change in changes},
+            cohorts=[(class_level.pk, session.pk, term.pk)]
+        )
+
+    logger.info(
+        f"Moderated {len(changes)} {subject.name} {component} score(s) in {class_level.name}, "
+        f"{session.name} {term.term} term ({operation})"
+    )
+    return moderation
@@ -242,6 +242,48 @@ class CanBulkUploadResults(BasePermission):
         return user.role in allowed_roles
 
 
+class CanImportScoreSheets(BasePermission):
+    """Permission to import a subject score sheet (CSV)"""
+    
+    def has_permission(self, request, view):
+        user = request.user
+        
+        if not user.is_authenticated:
+            return False
+        
+        # Subject teachers import sheets for the subjects they teach;
+        # the view checks the actual class/subject assignment
+        allowed_roles = [
+            'head', 'hm', 'principal', 'vice_principal',
+            'teacher', 'form_teacher', 'subject_teacher'
+        ]
+        
+        return user.role in allowed_roles
+
+
+class CanModerateScores(BasePermission):
+    """Permission to moderate a subject's scores across a whole class level"""
+    
+    def has_permission(self, request, view):
+        user = request.user
+        
+        if not user.is_authenticated:
+            return False
+        
+        if user.role in ['head', 'hm', 'principal', 'vice_principal']:
+            return True
+        
+        # Heads of department moderate their department's subjects;
+        # the view checks the subject
+        if user.role in ['teacher', 'form_teacher', 'subject_teacher']:
+            try:
+                return user.staff_profile.teacher_profile.teacher_type == 'head_of_department'
+            except:
+                return False
+        
+        return False
+
+
 # ADDED: Teacher-specific permissions
 class IsTeacher(BasePermission):
     """Check if user is a teacher"""
@@ -0,0 +1,178 @@
+"""
+Batch Approval and Publishing
+Approves, publishes or unpublishes selected results or whole (class_level,
+session, term) cohorts with one set-based UPDATE each, then refreshes
+summaries and published snapshots once for the whole batch. With
+RESULTS_REQUIRE_COMPLETE on, incomplete cohorts are refused unless forced.
+"""
+from django.db import transaction
+from django.db.models import F, FilteredRelation, Q
+from django.utils import timezone
+import logging
+
+from .completeness import get_require_complete, check_complete
+from .ranking import cohorts_for
+from .summaries import refresh_cohort_summaries
+from .snapshots import materialize_snapshots, remove_snapshots
+
+logger = logging.getLogger(__name__)
+
+# Roles that sign off as headmaster/principal; teachers sign as class teacher
+HEADMASTER_ROLES = ['head', 'hm', 'principal', 'vice_principal']
+APPROVER_ROLES = HEADMASTER_ROLES + ['teacher', 'form_teacher']
+
+
+def approval_fields(user, today):
+    """StudentResult fields a sign-off by this user sets, and the message for it"""
+    if user.role in ['head', 'hm']:
+        return {'headmaster': user, 'headmaster_signature_date': today}, 'approved by headmaster'
+    if user.role in ['principal', 'vice_principal']:
+        return {'headmaster': user, 'headmaster_signature_date': today}, 'approved by principal'
+    return {'class_teacher': user, 'class_teacher_signature_date': today}, 'approved by class teacher'
+
+
+def _scope(results):
+    """A plain StudentResult queryset over a (possibly joined) results queryset"""
+    from .models import StudentResult
+
+    return StudentResult.objects.filter(pk__in=results.order_by().values('pk'))
+
+
+def approve_results(results, user):
+    """
+    Sign off every result of a StudentResult queryset as `user` with one
+    UPDATE. Published results get their snapshots rewritten so the new
+    signature shows. Returns (approved_count, message).
+    """
+    now = timezone.now()
+    fields, message = approval_fields(user, now.date())
+
+    with transaction.atomic():
+        scope = _scope(results)
+        approved = scope.update(**fields, version=F('version') + 1, updated_at=now)
+        materialize_snapshots(scope)
+
+    return approved, message
+
+
+def check_publishable(scope, cohorts=None):
+    """
+    Raise IncompleteResults if what is about to be published has gaps: the
+    whole cohorts when `cohorts` are given, otherwise the students of `scope`
+    in each session and term it covers
+    """
+    if cohorts:
+        levels = {}
+        for class_level, session, term in cohorts:
+            levels.setdefault((session.pk, term.pk), []).append(class_level.pk)
+        for (session_id, term_id), class_level_ids in levels.items():
+            check_complete(session_id, term_id, class_level_ids=class_level_ids)
+        return
+
+    students = {}
+    for session_id, term_id, student_id in scope.order_by().values_list(
+        'session_id', 'term_id', 'student_id'
+    ).distinct():
+        students.setdefault((session_id, term_id), []).append(student_id)
+    for (session_id, term_id), student_ids in students.items():
+        check_complete(session_id, term_id, student_ids=student_ids)
+
+
+def publish_results(results, user, cohorts=None, force=False):
+    """
+    Publish every unpublished result of a StudentResult queryset with one
+    UPDATE, then refresh cohort summaries and snapshots once.
+
+    `cohorts` lists (class_level, session, term) when whole cohorts are
+    published; their ResultPublishing records are upserted in one statement
+    so publishing_status reflects the batch. Returns the number of results
+    newly published. Raises IncompleteResults when completeness is required
+    and not `force`d.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        scope = _scope(results)
+        if get_require_complete() and not force:
+            check_publishable(scope, cohorts)
+        published = scope.filter(is_published=False).update(
+            is_published=True, version=F('version') + 1, updated_at=now
+        )
+        refresh_cohort_summaries(cohorts_for(scope))
+        materialize_snapshots(scope)
+        if cohorts:
+            record_publishing(cohorts, user, now)
+
+    return published
+
+
+def unpublish_results(results):
+    """
+    Withdraw every published result of a StudentResult queryset with one
+    UPDATE, then refresh cohort summaries and drop the snapshots once.
+    Returns the number of results unpublished.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        scope = _scope(results)
+        unpublished = scope.filter(is_published=True).update(
+            is_published=False, version=F('version') + 1, updated_at=now
+        )
+        refresh_cohort_summaries(cohorts_for(scope))
+        remove_snapshots(scope)
+
+    return unpublished
+
+
+def record_publishing(cohorts, user, now):
+    """Upsert published ResultPublishing records for (class_level, session, term) cohorts"""
+    from .models import ResultPublishing
+
+    ResultPublishing.objects.bulk_create(
+        [
+            ResultPublishing(
+                class_level=class_level, session=session, term=term,
+                is_published=True, published_date=now, published_by=user,
+                created_at=now, updated_at=now
+            )
+            for class_level, session, term in cohorts
+        ],
+        update_conflicts=True,
+        unique_fields=['session', 'term', 'class_level'],
+        update_fields=['is_published', 'published_date', 'published_by', 'updated_at']
+    )
+
+
+def publishing_status(session, term):
+    """
+    Publishing state of every class level for a session and term, read with
+    one LEFT JOIN onto ResultPublishing (and its publisher)
+    """
+    from academic.models import ClassLevel
+
+    rows = ClassLevel.objects.annotate(
+        publishing=FilteredRelation(
+            'published_results',
+            condition=Q(published_results__session=session, published_results__term=term)
+        )
+    ).values_list(
+        'id', 'name', 'publishing__is_published', 'publishing__published_date',
+        'publishing__published_by_id', 'publishing__published_by__first_name',
+        'publishing__published_by__last_name'
+    )
+
+    return [
+        {
+            'class_level_id': class_level_id,
+            'class_level_name': name,
+            'is_published': bool(is_published),
+            'published_date': published_date,
+            'published_by': f'{first_name or ""} {last_name or ""}'.strip() if published_by_id else None,
+            'published_by_id': published_by_id
+        }
+        for (
+            class_level_id, name, is_published, published_date,
+            published_by_id, first_name, last_name
+        ) in rows
+    ]
@@ -0,0 +1,247 @@
+"""
+Class Ranking Engine for Student Results
+Recomputes class and subject positions for a whole cohort with
+window-function UPDATEs
+"""
+from django.conf import settings
+from django.db import connection
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Tie handling for positions
+#   standard - competition ranking, ties share a position and the next is skipped (1, 2, 2, 4)
+#   dense    - ties share a position and the next is not skipped (1, 2, 2, 3)
+#   ordinal  - every student gets a distinct position (1, 2, 3, 4)
+RANKING_METHODS = {
+    'standard': 'RANK()',
+    'dense': 'DENSE_RANK()',
+    'ordinal': 'ROW_NUMBER()',
+}
+
+
+def get_ranking_method():
+    """Default tie handling configured in settings"""
+    method = getattr(settings, 'RESULTS_RANKING_METHOD', 'standard')
+    return method if method in RANKING_METHODS else 'standard'
+
+
+def get_rank_by_arm():
+    """Whether positions are computed per class arm instead of per class level"""
+    return getattr(settings, 'RESULTS_RANK_BY_ARM', False)
+
+
+def _partition_sql(by_arm):
+    """Window partition for a result row aliased `r`: its class level, or its arm"""
+    from students.models import StudentEnrollment
+
+    if not by_arm:
+        return 'r.class_level_id'
+
+    # A student's arm is the Class they are enrolled in for that session and term
+    return f"""
+        COALESCE((
+            SELECT MIN(e.class_obj_id) FROM {StudentEnrollment._meta.db_table} e
+            WHERE e.student_id = r.student_id
+              AND e.session_id = r.session_id
+              AND e.term_id = r.term_id
+        ), 0)
+    """
+
+
+def _build_rank_sql(method, by_arm):
+    """
+    Build the UPDATE statement that ranks one (class_level, session, term) cohort.
+
+    Results with no score are ranked last by the window, so they never shift
+    the positions of scored results; they get a NULL position afterwards.
+    Only rows whose position or pupil count moves are written, and their ids
+    are returned.
+    """
+    from .models import StudentResult
+
+    result_table = StudentResult._meta.db_table
+    partition = _partition_sql(by_arm)
+
+    return f"""
+        UPDATE {result_table}
+        SET position_in_class = ranked.position,
+            number_of_pupils_in_class = ranked.pupils
+        FROM (
+            SELECT
+                r.id,
+                CASE
+                    WHEN r.overall_total_score > 0 THEN {RANKING_METHODS[method]} OVER w
+                    ELSE NULL
+                END AS position,
+                SUM(CASE WHEN r.overall_total_score > 0 THEN 1 ELSE 0 END) OVER (
+                    PARTITION BY {partition}
+                ) AS pupils
+            FROM {result_table} r
+            WHERE r.class_level_id = %s
+              AND r.session_id = %s
+              AND r.term_id = %s
+            WINDOW w AS (
+                PARTITION BY {partition}
+                ORDER BY r.overall_total_score DESC, r.percentage DESC
+            )
+        ) ranked
+        WHERE {result_table}.id = ranked.id
+          AND (COALESCE({result_table}.position_in_class, 0) <> COALESCE(ranked.position, 0)
+               OR COALESCE({result_table}.number_of_pupils_in_class, 0) <> ranked.pupils)
+        RETURNING {result_table}.id
+    """
+
+
+def rank_cohort(class_level_id, session_id, term_id, method=None, by_arm=None):
+    """
+    Recompute position_in_class and number_of_pupils_in_class for every
+    result in a (class_level, session, term) cohort in one statement.
+
+    Returns the ids of the results whose position or pupil count changed.
+    """
+    if not (class_level_id and session_id and term_id):
+        return []
+
+    method = method or get_ranking_method()
+    if method not in RANKING_METHODS:
+        raise ValueError(f"Unknown ranking method: {method}")
+    if by_arm is None:
+        by_arm = get_rank_by_arm()
+
+    sql = _build_rank_sql(method, by_arm)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [class_level_id, session_id, term_id])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _build_subject_rank_sql(method, by_arm):
+    """
+    Build the UPDATE statement that ranks every subject of one cohort at once,
+    partitioned by subject (and arm). Scores of zero get a NULL position.
+    Only scores whose position moves are written; their result ids are returned.
+    """
+    from .models import StudentResult, SubjectScore
+
+    result_table = StudentResult._meta.db_table
+    score_table = SubjectScore._meta.db_table
+
+    return f"""
+        UPDATE {score_table}
+        SET position_in_subject = ranked.position
+        FROM (
+            SELECT
+                s.id,
+                CASE
+                    WHEN s.total_score > 0 THEN {RANKING_METHODS[method]} OVER (
+                        PARTITION BY s.subject_id, {_partition_sql(by_arm)}
+                        ORDER BY s.total_score DESC
+                    )
+                    ELSE NULL
+                END AS position
+            FROM {score_table} s
+            JOIN {result_table} r ON r.id = s.result_id
+            WHERE r.class_level_id = %s
+              AND r.session_id = %s
+              AND r.term_id = %s
+        ) ranked
+        WHERE {score_table}.id = ranked.id
+          AND COALESCE({score_table}.position_in_subject, 0) <> COALESCE(ranked.position, 0)
+        RETURNING {score_table}.result_id
+    """
+
+
+def rank_subjects(class_level_id, session_id, term_id, method=None, by_arm=None):
+    """
+    Recompute position_in_subject for every subject score in a
+    (class_level, session, term) cohort in one statement.
+
+    Returns the result ids of the scores whose position changed.
+    """
+    if not (class_level_id and session_id and term_id):
+        return []
+
+    method = method or get_ranking_method()
+    if method not in RANKING_METHODS:
+        raise ValueError(f"Unknown ranking method: {method}")
+    if by_arm is None:
+        by_arm = get_rank_by_arm()
+
+    sql = _build_subject_rank_sql(method, by_arm)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [class_level_id, session_id, term_id])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def rank_cohorts(cohorts, method=None, by_arm=None):
+    """
+    Rank several cohorts once each, class positions and subject positions.
+
+    `cohorts` is any iterable of (class_level_id, session_id, term_id) tuples;
+    duplicates are collapsed so a batch of changes costs two UPDATEs per cohort.
+    Returns the ids of the results whose class or subject positions changed.
+    """
+    moved = set()
+    for class_level_id, session_id, term_id in set(cohorts):
+        try:
+            moved.update(rank_cohort(class_level_id, session_id, term_id, method, by_arm))
+            moved.update(rank_subjects(class_level_id, session_id, term_id, method, by_arm))
+        except Exception as e:
+            logger.error(
+                f"Error ranking cohort class_level={class_level_id} "
+                f"session={session_id} term={term_id}: {e}"
+            )
+            raise
+    return moved
+
+
+def cohorts_for(results):
+    """Distinct (class_level_id, session_id, term_id) keys of a StudentResult queryset"""
+    return set(
+        results.exclude(class_level__isnull=True)
+        .order_by()
+        .values_list('class_level_id', 'session_id', 'term_id')
+        .distinct()
+    )
+
+
+def rank_annual(session_id, method=None, by_arm=None):
+    """
+    Recompute annual_position for every result of a session in one statement,
+    ranking on the cumulative average within each (term, class level or arm).
+
+    Returns the number of rows updated.
+    """
+    from .models import StudentResult
+
+    method = method or get_ranking_method()
+    if method not in RANKING_METHODS:
+        raise ValueError(f"Unknown ranking method: {method}")
+    if by_arm is None:
+        by_arm = get_rank_by_arm()
+
+    result_table = StudentResult._meta.db_table
+    sql = f"""
+        UPDATE {result_table}
+        SET annual_position = CASE
+                WHEN ranked.annual_average > 0 THEN ranked.position
+                ELSE NULL
+            END
+        FROM (
+            SELECT
+                r.id,
+                r.annual_average,
+                {RANKING_METHODS[method]} OVER (
+                    PARTITION BY r.term_id, {_partition_sql(by_arm)}
+                    ORDER BY r.annual_average DESC, r.annual_total_score DESC
+                ) AS position
+            FROM {result_table} r
+            WHERE r.session_id = %s
+              AND r.class_level_id IS NOT NULL
+        ) ranked
+        WHERE {result_table}.id = ranked.id
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [session_id])
+        return cursor.rowcount
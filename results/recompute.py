@@ -0,0 +1,210 @@
+"""
+Coalesced Result Recomputation
+Collects the StudentResults touched during a request or transaction and
+recomputes each one exactly once when it commits
+"""
+from contextlib import ContextDecorator
+from django.db import transaction
+from django.db.models import Sum, Count
+from django.utils import timezone
+import threading
+import logging
+
+from .ranking import rank_cohorts
+from .summaries import refresh_cohort_summaries, refresh_subject_statistics, refresh_teacher_rollups
+from .snapshots import sync_snapshots
+from .trends import forget_cohort_trends
+
+logger = logging.getLogger(__name__)
+
+# Keep IN (...) lists well below database parameter limits
+RECOMPUTE_CHUNK_SIZE = 500
+
+_local = threading.local()
+
+
+class DirtyResults:
+    """Result ids and cohorts waiting to be recomputed"""
+
+    def __init__(self):
+        self.result_ids = set()
+        self.cohorts = set()
+
+    def __bool__(self):
+        return bool(self.result_ids or self.cohorts)
+
+    def merge(self, other):
+        self.result_ids |= other.result_ids
+        self.cohorts |= other.cohorts
+
+    def flush(self):
+        """Recompute everything collected so far (safe to call more than once)"""
+        if getattr(_local, 'pending', None) is self:
+            _local.pending = None
+
+        result_ids, cohorts = self.result_ids, self.cohorts
+        self.result_ids, self.cohorts = set(), set()
+
+        if result_ids or cohorts:
+            recompute_results(result_ids, cohorts)
+
+
+def _current_batch():
+    """
+    Batch new marks should go into.
+
+    Inside defer_recompute() that is the innermost scope. Otherwise marks are
+    collected per transaction and flushed by transaction.on_commit; in
+    autocommit mode on_commit runs straight away, so nothing is deferred.
+    """
+    scopes = getattr(_local, 'scopes', None)
+    if scopes:
+        return scopes[-1], False
+
+    batch = getattr(_local, 'pending', None)
+    if batch is None:
+        batch = _local.pending = DirtyResults()
+    return batch, True
+
+
+def _register_flush(batch):
+    """
+    Flush the batch on commit, once per transaction: a callback discarded by
+    a rolled back savepoint or transaction is registered again by the next
+    mark, so the batch is never stranded
+    """
+    connection = transaction.get_connection()
+    if connection.in_atomic_block and any(entry[1] == batch.flush for entry in connection.run_on_commit):
+        return
+    transaction.on_commit(batch.flush)
+
+
+def mark_result_dirty(result_id):
+    """Queue a StudentResult for totals and position recomputation"""
+    if not result_id:
+        return
+    batch, register = _current_batch()
+    batch.result_ids.add(result_id)
+    if register:
+        _register_flush(batch)
+
+
+def mark_cohort_dirty(cohort):
+    """Queue a (class_level_id, session_id, term_id) cohort for re-ranking only"""
+    if not cohort or not all(cohort):
+        return
+    batch, register = _current_batch()
+    batch.cohorts.add(tuple(cohort))
+    if register:
+        _register_flush(batch)
+
+
+def flush_recompute():
+    """
+    Recompute everything marked so far in this thread (every open
+    defer_recompute() scope and the pending transaction batch) right away,
+    so a view can serialize results with up to date totals and positions.
+    Inside a transaction the recompute joins it.
+    """
+    batch = DirtyResults()
+    for pending in [*getattr(_local, 'scopes', []), getattr(_local, 'pending', None)]:
+        if pending:
+            batch.merge(pending)
+            pending.result_ids, pending.cohorts = set(), set()
+    batch.flush()
+
+
+class defer_recompute(ContextDecorator):
+    """
+    Collect dirty results for the duration of a block, view or request and
+    recompute them once at the end (after commit when inside a transaction).
+
+        with defer_recompute():
+            for score in scores:
+                score.save()
+    """
+
+    def __enter__(self):
+        if not hasattr(_local, 'scopes'):
+            _local.scopes = []
+        _local.scopes.append(DirtyResults())
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        batch = _local.scopes.pop()
+        if not batch:
+            return False
+
+        if _local.scopes:
+            # Nested scope - hand everything to the outer one
+            _local.scopes[-1].merge(batch)
+        else:
+            # Recomputing from the database is idempotent, so flush even after an error:
+            # rows committed before it still need their totals
+            transaction.on_commit(batch.flush)
+        return False
+
+
+def recompute_results(result_ids, cohorts=()):
+    """
+    Recompute totals, grade and remark for the given results from one aggregate
+    query over their subject scores, store them with bulk_update, then re-rank
+    and re-summarize every affected cohort once, resync the published
+    snapshots of the changed results and drop the cohorts' cached trends.
+    """
+    from .models import StudentResult, SubjectScore
+
+    # Sorted so concurrent recomputes lock rows in the same order
+    result_ids = sorted(set(result_ids))
+    cohorts = set(cohorts)
+    now = timezone.now()
+
+    for start in range(0, len(result_ids), RECOMPUTE_CHUNK_SIZE):
+        chunk = result_ids[start:start + RECOMPUTE_CHUNK_SIZE]
+
+        # Lock only this chunk's result rows, only for the aggregate-and-write
+        # step: a concurrent recompute of the same results waits here and then
+        # aggregates the scores committed in the meantime, so totals can't be
+        # overwritten with stale sums. Score edits themselves never wait.
+        with transaction.atomic():
+            results = list(
+                StudentResult.objects.select_for_update().filter(pk__in=chunk).order_by('pk').only(
+                    'id', 'class_level_id', 'session_id', 'term_id', *StudentResult.TOTAL_FIELDS
+                )
+            )
+
+            totals = {
+                row['result_id']: row
+                for row in SubjectScore.objects.filter(result_id__in=chunk)
+                .order_by()
+                .values('result_id')
+                .annotate(
+                    ca=Sum('ca_score'),
+                    exam=Sum('exam_score'),
+                    total=Sum('total_score'),
+                    obtainable=Sum('total_obtainable'),
+                    subjects=Count('id')
+                )
+            }
+
+            for result in results:
+                row = totals.get(result.pk)
+                if row:
+                    result.apply_totals(
+                        row['ca'], row['exam'], row['total'], row['obtainable'], row['subjects']
+                    )
+                else:
+                    result.apply_totals(0, 0, 0, 0, 0)
+                result.updated_at = now
+                if result.class_level_id:
+                    cohorts.add(result.cohort)
+
+            StudentResult.objects.bulk_update(results, StudentResult.TOTAL_FIELDS + ['updated_at'])
+
+    moved = rank_cohorts(cohorts)
+    refresh_cohort_summaries(cohorts)
+    refresh_subject_statistics(cohorts)
+    refresh_teacher_rollups(cohorts)
+    sync_snapshots(moved.union(result_ids))
+    forget_cohort_trends(cohorts)
+    logger.debug(f"Recomputed {len(result_ids)} result(s) across {len(cohorts)} cohort(s)")
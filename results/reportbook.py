@@ -0,0 +1,212 @@
+"""
+Report Book Generation
+Renders every report card of a published (session, term, class_level) into a
+single zip, rendering cards in parallel across a process pool and reusing the
+per-card cache from reports.py
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from datetime import timedelta
+from pathlib import Path
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import zipfile
+
+from .reports import (
+    get_cache_dir, report_card_versions, report_card_path, load_report_card_results,
+    report_card_data, school_details, write_report_card, remove_stale
+)
+from .summaries import subject_statistics_for
+
+logger = logging.getLogger(__name__)
+
+# How many finished cards between progress writes
+PROGRESS_EVERY = 10
+
+# Pending/running jobs older than this are treated as abandoned
+REPORT_BOOK_STALE_AFTER = timedelta(minutes=30)
+
+
+def get_worker_count():
+    """Processes used to render cards (RESULTS_REPORT_WORKERS, default: all CPUs)"""
+    return getattr(settings, 'RESULTS_REPORT_WORKERS', 0) or os.cpu_count() or 1
+
+
+def book_results(publishing):
+    """StudentResults covered by a ResultPublishing scope"""
+    from .models import StudentResult
+
+    results = StudentResult.objects.filter(session=publishing.session_id, term=publishing.term_id)
+    if publishing.class_level_id:
+        results = results.filter(class_level=publishing.class_level_id)
+    return results
+
+
+def book_path(publishing, book_version):
+    scope = publishing.class_level_id or 'all'
+    return Path('books') / f"{publishing.session_id}-{publishing.term_id}-{scope}-{book_version}.zip"
+
+
+def _slug(value):
+    return re.sub(r'[^A-Za-z0-9]+', '_', str(value or '')).strip('_') or 'unknown'
+
+
+def _update_job(job, **fields):
+    for field, value in fields.items():
+        setattr(job, field, value)
+    type(job).objects.filter(pk=job.pk).update(**fields)
+
+
+def render_missing_cards(result_ids, versions, on_progress=None):
+    """
+    Render the cards in `result_ids` into the card cache.
+
+    The whole set is loaded and serialized in the parent (a few queries,
+    subject statistics included); workers only run reportlab on plain data,
+    so they never touch the database.
+    """
+    if not result_ids:
+        return
+
+    school = school_details()
+    results = list(load_report_card_results(result_ids))
+    subject_statistics = subject_statistics_for({result.cohort for result in results})
+    jobs = [
+        (
+            report_card_data(result, subject_statistics),
+            str(report_card_path(result.pk, versions[result.pk])), result.pk
+        )
+        for result in results
+    ]
+
+    def finished(result_id):
+        remove_stale(result_id, keep=report_card_path(result_id, versions[result_id]))
+        if on_progress:
+            on_progress()
+
+    workers = min(get_worker_count(), len(jobs))
+    if workers <= 1:
+        for data, path, result_id in jobs:
+            write_report_card(data, school, path)
+            finished(result_id)
+        return
+
+    # spawn, not fork: the parent may be a threaded web worker holding DB connections
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {
+            pool.submit(write_report_card, data, school, path): result_id
+            for data, path, result_id in jobs
+        }
+        for future in as_completed(futures):
+            future.result()
+            finished(futures[future])
+
+
+def run_report_book(job_id):
+    """Build the archive for a ReportBookJob, recording progress on the job row"""
+    from .models import ReportBookJob
+
+    job = ReportBookJob.objects.select_related('publishing').get(pk=job_id)
+    publishing = job.publishing
+
+    try:
+        _update_job(job, status='running', started_at=timezone.now(), error='')
+
+        results = book_results(publishing)
+        versions = report_card_versions(results)
+        book_version = hashlib.sha1(
+            '|'.join(f"{result_id}:{version}" for result_id, version in sorted(versions.items())).encode()
+        ).hexdigest()
+
+        relative_path = book_path(publishing, book_version)
+        archive = get_cache_dir() / relative_path
+
+        if archive.exists():
+            # Nothing changed since the last book - hand back the same archive
+            _update_job(
+                job, status='completed', total_cards=len(versions), completed_cards=len(versions),
+                reused_cards=len(versions), book_version=book_version,
+                archive_path=str(relative_path), completed_at=timezone.now()
+            )
+            return job
+
+        missing = [
+            result_id for result_id, version in versions.items()
+            if not report_card_path(result_id, version).exists()
+        ]
+        reused = len(versions) - len(missing)
+        _update_job(
+            job, total_cards=len(versions), completed_cards=reused,
+            reused_cards=reused, book_version=book_version
+        )
+
+        progress = {'done': reused}
+
+        def on_progress():
+            progress['done'] += 1
+            if progress['done'] % PROGRESS_EVERY == 0:
+                _update_job(job, completed_cards=progress['done'])
+
+        render_missing_cards(missing, versions, on_progress)
+
+        # Archive cards grouped by class, named by admission number
+        names = results.order_by(
+            'class_level__order', 'student__user__last_name', 'student__user__first_name'
+        ).values_list(
+            'id', 'class_level__name', 'student__admission_number',
+            'student__user__first_name', 'student__user__last_name'
+        )
+
+        archive.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=archive.parent, suffix='.tmp')
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED) as book:
+                for result_id, class_name, admission_number, first_name, last_name in names:
+                    book.write(
+                        report_card_path(result_id, versions[result_id]),
+                        f"{_slug(class_name)}/{_slug(admission_number)}_{_slug(last_name)}_{_slug(first_name)}.pdf"
+                    )
+            os.replace(tmp_path, archive)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        for stale in archive.parent.glob(f"{archive.name.rsplit('-', 1)[0]}-*.zip"):
+            if stale != archive:
+                stale.unlink(missing_ok=True)
+
+        _update_job(
+            job, status='completed', completed_cards=len(versions),
+            archive_path=str(relative_path), completed_at=timezone.now()
+        )
+        logger.info(
+            f"Report book {job.pk}: {len(versions)} cards, {len(missing)} rendered, {reused} from cache"
+        )
+
+    except Exception as e:
+        logger.error(f"Error building report book {job.pk}: {e}")
+        _update_job(job, status='failed', error=str(e), completed_at=timezone.now())
+
+    return job
+
+
+def start_report_book(job):
+    """Run a job in a background thread so the request can return immediately"""
+
+    def target():
+        try:
+            run_report_book(job.pk)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=target, name=f'report-book-{job.pk}', daemon=True)
+    thread.start()
+    return thread
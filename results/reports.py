@@ -0,0 +1,286 @@
+"""
+Report Card PDF Rendering
+Renders ReportCardSerializer data with reportlab and caches the PDF on disk,
+keyed by result id and a version hash of everything printed on the card
+"""
+from django.conf import settings
+from django.db.models import Max, Count, F, OuterRef, Subquery
+from io import BytesIO
+from pathlib import Path
+import hashlib
+import logging
+import os
+import tempfile
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+logger = logging.getLogger(__name__)
+
+# Bump when the card layout changes so every cached PDF is re-rendered
+REPORT_LAYOUT_VERSION = 3
+
+TABLE_STYLE = TableStyle([
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#e8eef7')),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+
+INFO_STYLE = TableStyle([
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+])
+
+
+def get_cache_dir():
+    """Directory cached report cards are written to"""
+    return Path(getattr(settings, 'RESULTS_REPORT_CACHE_DIR', Path(settings.MEDIA_ROOT) / 'report_cards'))
+
+
+def _version_key(result_id, row):
+    key = '|'.join(str(value) for value in (
+        REPORT_LAYOUT_VERSION, settings.SCHOOL_NAME, result_id, *row
+    ))
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def _version_rows(results):
+    """
+    Annotate a StudentResult queryset with everything a card's version covers:
+    the result row, its scores, psychomotor/affective ratings, the position
+    fields (the ranking UPDATE doesn't touch updated_at) and the cohort's
+    subject statistics, which are refreshed whenever subject positions change.
+    """
+    from .models import SubjectClassStatistics
+
+    subject_statistics = SubjectClassStatistics.objects.filter(
+        class_level=OuterRef('class_level'), session=OuterRef('session'), term=OuterRef('term')
+    ).order_by().values('class_level').annotate(latest=Max('updated_at')).values('latest')[:1]
+
+    return results.order_by().annotate(
+        scores_updated=Max('subject_scores__updated_at'),
+        score_count=Count('subject_scores'),
+        psychomotor_updated=F('psychomotor_skills__updated_at'),
+        affective_updated=F('affective_domains__updated_at'),
+        subject_statistics_updated=Subquery(subject_statistics)
+    ).values_list(
+        'id', 'updated_at', 'position_in_class', 'number_of_pupils_in_class',
+        'scores_updated', 'score_count', 'psychomotor_updated', 'affective_updated',
+        'student__user__first_name', 'student__user__last_name', 'class_level__name',
+        'subject_statistics_updated'
+    )
+
+
+def report_card_version(result_id):
+    """Content version of a result's report card, computed in one query"""
+    from .models import StudentResult
+
+    row = _version_rows(StudentResult.objects.filter(pk=result_id)).first()
+    if row is None:
+        return None
+    return _version_key(result_id, row[1:])
+
+
+def report_card_versions(results):
+    """{result_id: version} for a whole StudentResult queryset in one query"""
+    return {row[0]: _version_key(row[0], row[1:]) for row in _version_rows(results)}
+
+
+def report_card_path(result_id, version):
+    return get_cache_dir() / f"{result_id}-{version}.pdf"
+
+
+def load_report_card_results(result_ids):
+    """Fetch results with everything the report card serializer touches (two queries)"""
+    from .models import StudentResult
+
+    return StudentResult.objects.filter(pk__in=result_ids).select_related(
+        'student__user', 'class_level', 'session', 'term',
+        'psychomotor_skills', 'affective_domains'
+    ).prefetch_related('subject_scores__subject')
+
+
+def report_card_data(result, subject_statistics=None):
+    """
+    Plain (picklable) report card data for a result. Pass the cohort's
+    `subject_statistics` when building many cards to share one lookup.
+    """
+    from .serializers import ReportCardSerializer
+
+    context = {} if subject_statistics is None else {'subject_statistics': subject_statistics}
+    data = dict(ReportCardSerializer(result, context=context).data)
+    data['subject_scores'] = [dict(score) for score in data['subject_scores']]
+    return data
+
+
+def school_details():
+    return {'name': settings.SCHOOL_NAME, 'address': settings.SCHOOL_ADDRESS}
+
+
+def _rating(value):
+    return '-' if value in (None, '') else str(value)
+
+
+def render_report_card(data, school):
+    """
+    Render report card data to PDF bytes.
+
+    Pure function of its arguments - no database or settings access - so it
+    can run in worker processes.
+    """
+    styles = getSampleStyleSheet()
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=A4,
+        leftMargin=15 * mm, rightMargin=15 * mm, topMargin=12 * mm, bottomMargin=12 * mm,
+        title=f"Report Card - {data['student_name']}"
+    )
+    story = []
+
+    # Header
+    story.append(Paragraph(escape(school['name']), styles['Title']))
+    if school['address']:
+        story.append(Paragraph(escape(school['address']), styles['Normal']))
+    story.append(Paragraph(
+        f"Report Card - {data['term_name']}, {data['session_name']}", styles['Heading2']
+    ))
+
+    story.append(Table([
+        ['Name', data['student_name'], 'Admission No.', data['admission_number']],
+        ['Class', data['class_level_name'], 'Position', data['class_position']],
+    ], colWidths=[25 * mm, 65 * mm, 30 * mm, 60 * mm], style=INFO_STYLE))
+    story.append(Spacer(1, 5 * mm))
+
+    # Subject scores
+    score_rows = [['Subject', 'CA', 'Exam', 'Total', 'Grade', 'Pos.', 'Class Avg', 'High', 'Low', 'Comment']]
+    for score in data['subject_scores']:
+        score_rows.append([
+            Paragraph(escape(score['subject_name'] or ''), styles['BodyText']),
+            score['ca_score'], score['exam_score'], score['total_score'], score['grade'],
+            score['position_in_subject'] or '-', score['class_average'] or '-',
+            score['highest_in_class'] or '-', score['lowest_in_class'] or '-',
+            Paragraph(escape(score['teacher_comment'] or ''), styles['BodyText'])
+        ])
+    if len(score_rows) == 1:
+        score_rows.append(['No subject scores recorded'] + [''] * 9)
+    story.append(Table(
+        score_rows,
+        colWidths=[38 * mm, 13 * mm, 13 * mm, 13 * mm, 12 * mm, 11 * mm, 17 * mm, 13 * mm, 13 * mm, 37 * mm],
+        repeatRows=1, style=TABLE_STYLE
+    ))
+    story.append(Spacer(1, 4 * mm))
+
+    story.append(Table([
+        ['Total Score', 'Percentage', 'Overall Grade', 'Remark'],
+        [data['overall_total_score'], f"{data['percentage']}%", data['overall_grade'] or '-',
+         data['overall_remark'] or '-'],
+    ], colWidths=[45 * mm] * 4, style=TABLE_STYLE))
+    if data.get('annual_position'):
+        story.append(Paragraph(
+            f"<b>Cumulative Average:</b> {data['annual_average']}% &nbsp; "
+            f"<b>Cumulative Position:</b> {data['annual_position']}",
+            styles['BodyText']
+        ))
+    story.append(Spacer(1, 4 * mm))
+
+    # Attendance
+    attendance = data['attendance_summary']
+    story.append(Table([
+        ['Times School Opened', 'Times Present', 'Times Absent', 'Attendance'],
+        [attendance['total_days'], attendance['present'], attendance['absent'],
+         f"{attendance['percentage']}%"],
+    ], colWidths=[45 * mm] * 4, style=TABLE_STYLE))
+    story.append(Spacer(1, 4 * mm))
+
+    # Psychomotor and affective summaries side by side
+    psychomotor = data['psychomotor_summary'] or {}
+    affective = data['affective_summary'] or {}
+    psychomotor_rows = [['Psychomotor', 'Rating']] + [
+        [label.replace('_', ' ').title(), _rating(value)] for label, value in psychomotor.items()
+    ]
+    affective_rows = [['Affective', 'Rating']] + [
+        [label.replace('_', ' ').title(), _rating(value)] for label, value in affective.items()
+    ]
+    story.append(Table([[
+        Table(psychomotor_rows, colWidths=[55 * mm, 30 * mm], style=TABLE_STYLE),
+        Table(affective_rows, colWidths=[55 * mm, 30 * mm], style=TABLE_STYLE),
+    ]], colWidths=[90 * mm, 90 * mm]))
+    story.append(Spacer(1, 4 * mm))
+
+    # Comments and next term
+    story.append(Paragraph(
+        f"<b>Class Teacher's Comment:</b> {escape(data['class_teacher_comment'] or '-')}", styles['BodyText']
+    ))
+    story.append(Paragraph(
+        f"<b>Head's Comment:</b> {escape(data['headmaster_comment'] or '-')}", styles['BodyText']
+    ))
+    if data['next_term_begins_on']:
+        story.append(Paragraph(
+            f"<b>Next Term Begins:</b> {data['next_term_begins_on']}", styles['BodyText']
+        ))
+    if data['next_term_fees']:
+        story.append(Paragraph(f"<b>Next Term Fees:</b> {data['next_term_fees']}", styles['BodyText']))
+    if data['is_promoted']:
+        story.append(Paragraph("<b>Promoted to the next class</b>", styles['BodyText']))
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def write_report_card(data, school, path):
+    """Render a card straight to its cache file (process pool entry point)"""
+    content = render_report_card(data, school)
+    write_atomic(Path(path), content)
+    return len(content)
+
+
+def write_atomic(path, content):
+    """Write to a temp file and rename, so readers never see a half-written PDF"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(content)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def remove_stale(result_id, keep):
+    """Delete older cached versions of a result's card"""
+    for stale in get_cache_dir().glob(f"{result_id}-*.pdf"):
+        if stale != keep:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+
+def get_report_card(result_id, version=None):
+    """
+    Return (path, version) of a result's report card PDF, rendering and
+    caching it first when the cached copy is missing or out of date.
+    """
+    version = version or report_card_version(result_id)
+    if version is None:
+        raise LookupError(f"Result {result_id} does not exist")
+
+    path = report_card_path(result_id, version)
+    if path.exists():
+        return path, version
+
+    result = load_report_card_results([result_id]).get()
+    content = render_report_card(report_card_data(result), school_details())
+    write_atomic(path, content)
+    remove_stale(result_id, keep=path)
+    logger.info(f"Rendered report card for result {result_id} ({len(content)} bytes)")
+    return path, version
@@ -12,12 +12,14 @@ import json
 
 from .models import (
     StudentResult, SubjectScore, PsychomotorSkills, 
-    AffectiveDomains, ResultPublishing
+    AffectiveDomains, ResultPublishing, ReportBookJob, ScoreModeration
 )
+from .summaries import subject_statistics_for
+from .bulk import SCORE_INPUT_FIELDS, PSYCHOMOTOR_GRID_FIELDS, AFFECTIVE_GRID_FIELDS
 
 # Import models for related fields
 from students.models import Student
-from academic.models import AcademicSession, AcademicTerm, ClassLevel, Subject
+from academic.models import AcademicSession, AcademicTerm, ClassLevel, Subject, Class
 from users.models import User
 
 
@@ -161,7 +163,7 @@ class SubjectScoreSerializer(serializers.ModelSerializer):
             'first_term_score', 'second_term_score', 'third_term_score',
             'aggregated_score', 'average_score', 'grade',
             'observation_conduct', 'subject_remark', 'position_in_subject', 
-            'teacher_comment', 'created_at', 'updated_at'
+            'teacher_comment', 'version', 'created_at', 'updated_at'
         ]
         read_only_fields = [
             'id', 'result_id', 'total_score', 'grade', 
@@ -192,22 +194,19 @@ class SubjectScoreSerializer(serializers.ModelSerializer):
         exam_score = validated_data.get('exam_score', 0)
         validated_data['total_score'] = ca_score + exam_score
         
-        # Create the object
+        # Create the object (save() calculates grade and term scores;
+        # the parent result is recomputed once at commit)
+        validated_data.pop('version', None)
         instance = super().create(validated_data)
         
-        # Calculate grade and term scores
-        instance.calculate_total_and_grade()
-        instance.save()
-        
-        # Update parent result
-        if instance.result:
-            instance.result.calculate_totals()
-            instance.result.save()
-        
         return instance
     
     def update(self, instance, validated_data):
-        """Update subject score and recalculate"""
+        """
+        Update subject score and recalculate
+        A submitted `version` is the one the editor loaded; save() rejects the
+        edit with VersionConflict if the score has changed since
+        """
         # Update fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -215,15 +214,9 @@ class SubjectScoreSerializer(serializers.ModelSerializer):
         # Calculate total score
         instance.total_score = instance.ca_score + instance.exam_score
         
-        # Calculate grade and term scores
-        instance.calculate_total_and_grade()
+        # save() calculates grade and term scores; the parent result is recomputed once at commit
         instance.save()
         
-        # Update parent result
-        if instance.result:
-            instance.result.calculate_totals()
-            instance.result.save()
-        
         return instance
 
 
@@ -385,6 +378,9 @@ class StudentResultSerializer(serializers.ModelSerializer):
             'position_in_class', 'number_of_pupils_in_class',
             'overall_grade', 'overall_remark',
             
+            # Cumulative (annual)
+            'annual_total_score', 'annual_average', 'annual_position',
+            
             # Comments
             'class_teacher_comment', 'headmaster_comment',
             
@@ -402,7 +398,7 @@ class StudentResultSerializer(serializers.ModelSerializer):
             'subject_scores', 'psychomotor_skills', 'affective_domains',
             
             # Metadata
-            'created_by', 'created_at', 'updated_at'
+            'version', 'created_by', 'created_at', 'updated_at'
         ]
         read_only_fields = [
             # Auto-calculated fields
@@ -410,6 +406,7 @@ class StudentResultSerializer(serializers.ModelSerializer):
             'total_obtainable', 'percentage', 'average_score', 
             'overall_grade', 'overall_remark', 'position_in_class', 
             'number_of_pupils_in_class',
+            'annual_total_score', 'annual_average', 'annual_position',
             
             # Metadata
             'created_by', 'created_at', 'updated_at'
@@ -454,6 +451,13 @@ class StudentResultSerializer(serializers.ModelSerializer):
                         'student': f"Student is not in class level {class_level.name}"
                     })
         
+        # Archived sessions are read-only
+        session = data.get('session')
+        if session and session.status == 'archived':
+            raise serializers.ValidationError({
+                'session_id': f"Session {session.name} is archived"
+            })
+        
         # Validate attendance
         freq = data.get('frequency_of_school_opened', 0)
         present = data.get('no_of_times_present', 0)
@@ -473,19 +477,18 @@ class StudentResultSerializer(serializers.ModelSerializer):
         if request and hasattr(request, 'user'):
             validated_data['created_by'] = request.user
         
-        # Create the result
+        # Create the result - totals and position are recomputed at commit
+        validated_data.pop('version', None)
         instance = super().create(validated_data)
         
-        # Calculate totals and position
-        instance.calculate_totals()
-        
-        # Save to trigger position calculation
-        instance.save()
-        
         return instance
     
     def update(self, instance, validated_data):
-        """Update student result"""
+        """
+        Update student result
+        A submitted `version` is the one the editor loaded; save() rejects the
+        edit with VersionConflict if the result has changed since
+        """
         # Update fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -493,7 +496,7 @@ class StudentResultSerializer(serializers.ModelSerializer):
         # Validate attendance
         instance.clean()
         
-        # Save to trigger calculations
+        # Save - totals and position are recomputed at commit
         instance.save()
         
         return instance
@@ -633,6 +636,26 @@ class ResultPublishingSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class ReportBookJobSerializer(serializers.ModelSerializer):
+    """Serializer for report book generation jobs"""
+    
+    requested_by = SimpleUserSerializer(read_only=True)
+    progress = serializers.FloatField(read_only=True)
+    download_ready = serializers.SerializerMethodField(read_only=True)
+    
+    class Meta:
+        model = ReportBookJob
+        fields = [
+            'id', 'publishing', 'status', 'total_cards', 'completed_cards',
+            'reused_cards', 'progress', 'download_ready', 'error',
+            'requested_by', 'created_at', 'started_at', 'completed_at'
+        ]
+        read_only_fields = fields
+    
+    def get_download_ready(self, obj):
+        return obj.status == 'completed' and bool(obj.archive_path)
+
+
 # ============================================
 # BULK OPERATION SERIALIZERS
 # ============================================
@@ -718,6 +741,239 @@ class SubjectScoreBulkSerializer(serializers.Serializer):
     )
 
 
+class ScoreSheetImportSerializer(serializers.Serializer):
+    """Serializer for a subject score sheet uploaded as CSV"""
+    
+    file = serializers.FileField(
+        help_text="CSV with columns: admission_number, ca_score, exam_score, remarks"
+    )
+    session_id = serializers.PrimaryKeyRelatedField(
+        queryset=AcademicSession.objects.all(),
+        help_text="ID of the academic session"
+    )
+    term_id = serializers.PrimaryKeyRelatedField(
+        queryset=AcademicTerm.objects.all(),
+        help_text="ID of the academic term"
+    )
+    class_level_id = serializers.PrimaryKeyRelatedField(
+        queryset=ClassLevel.objects.all(),
+        help_text="ID of the class level"
+    )
+    subject_id = serializers.PrimaryKeyRelatedField(
+        queryset=Subject.objects.all(),
+        help_text="ID of the subject"
+    )
+    
+    def validate_file(self, value):
+        """Only accept CSV uploads"""
+        if not value.name.lower().endswith('.csv'):
+            raise serializers.ValidationError("Score sheet must be a .csv file")
+        return value
+    
+    def validate(self, data):
+        if data['term_id'].session_id != data['session_id'].id:
+            raise serializers.ValidationError("Term does not belong to the selected session")
+        return data
+
+
+class ScoreModerationSerializer(serializers.Serializer):
+    """Serializer for moderating one subject's scores across a class level"""
+    
+    session_id = serializers.PrimaryKeyRelatedField(
+        queryset=AcademicSession.objects.all(),
+        help_text="ID of the academic session"
+    )
+    term_id = serializers.PrimaryKeyRelatedField(
+        queryset=AcademicTerm.objects.all(),
+        help_text="ID of the academic term"
+    )
+    class_level_id = serializers.PrimaryKeyRelatedField(
+        queryset=ClassLevel.objects.all(),
+        help_text="ID of the class level"
+    )
+    subject_id = serializers.PrimaryKeyRelatedField(
+        queryset=Subject.objects.all(),
+        help_text="ID of the subject"
+    )
+    component = serializers.ChoiceField(choices=ScoreModeration.COMPONENT_CHOICES)
+    operation = serializers.ChoiceField(choices=ScoreModeration.OPERATION_CHOICES)
+    amount = serializers.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        required=False,
+        allow_null=True,
+        help_text="Marks to add (negative to deduct) or the scaling factor"
+    )
+    reason = serializers.CharField(required=False, allow_blank=True, default='')
+    
+    def validate(self, data):
+        if data['term_id'].session_id != data['session_id'].id:
+            raise serializers.ValidationError("Term does not belong to the selected session")
+        if data['session_id'].status == 'archived':
+            raise serializers.ValidationError("Results of an archived session can't be moderated")
+        if data['operation'] != 'cap' and data.get('amount') is None:
+            raise serializers.ValidationError({'amount': f"Required to {data['operation']} scores"})
+        if data['operation'] == 'scale' and data['amount'] <= 0:
+            raise serializers.ValidationError({'amount': "Scaling factor must be greater than 0"})
+        return data
+
+
+
+class ScoreGridRowSerializer(serializers.ModelSerializer):
+    """One student's cell of a subject score grid - any subset of the inputs"""
+    
+    student_id = serializers.IntegerField()
+    version = serializers.IntegerField(
+        required=False,
+        allow_null=True,
+        help_text="Score version the grid was loaded with; omit for last-write-wins"
+    )
+    
+    class Meta:
+        model = SubjectScore
+        fields = ['student_id', 'version'] + SCORE_INPUT_FIELDS
+        extra_kwargs = {field: {'required': False} for field in SCORE_INPUT_FIELDS}
+
+
+class ScoreGridSerializer(serializers.Serializer):
+    """Serializer for saving one subject's scores for a whole class"""
+    
+    session_id = serializers.PrimaryKeyRelatedField(
+        queryset=AcademicSession.objects.all(),
+        help_text="ID of the academic session"
+    )
+    term_id = serializers.PrimaryKeyRelatedField(
+        queryset=AcademicTerm.objects.all(),
+        help_text="ID of the academic term"
+    )
+    class_level_id = serializers.PrimaryKeyRelatedField(
+        queryset=ClassLevel.objects.all(),
+        help_text="ID of the class level"
+    )
+    class_id = serializers.PrimaryKeyRelatedField(
+        queryset=Class.objects.all(),
+        required=False,
+        allow_null=True,
+        help_text="Optional class arm to narrow the grid to"
+    )
+    subject_id = serializers.PrimaryKeyRelatedField(
+        queryset=Subject.objects.all(),
+        help_text="ID of the subject"
+    )
+    scores = ScoreGridRowSerializer(many=True, allow_empty=False)
+    
+    def validate_scores(self, value):
+        """Each student may appear once"""
+        student_ids = [row['student_id'] for row in value]
+        if len(student_ids) != len(set(student_ids)):
+            raise serializers.ValidationError("Each student may only appear once")
+        return value
+    
+    def validate(self, data):
+        if data['term_id'].session_id != data['session_id'].id:
+            raise serializers.ValidationError("Term does not belong to the selected session")
+        class_obj = data.get('class_id')
+        if class_obj and class_obj.class_level_id != data['class_level_id'].id:
+            raise serializers.ValidationError("Class arm does not belong to the selected class level")
+        return data
+
+class PsychomotorGridSerializer(serializers.ModelSerializer):
+    """Ratings of one psychomotor grid row - any subset of the columns"""
+    
+    class Meta:
+        model = PsychomotorSkills
+        fields = PSYCHOMOTOR_GRID_FIELDS
+        extra_kwargs = {field: {'required': False} for field in PSYCHOMOTOR_GRID_FIELDS}
+
+
+class AffectiveGridSerializer(serializers.ModelSerializer):
+    """Ratings of one affective grid row - any subset of the columns"""
+    
+    class Meta:
+        model = AffectiveDomains
+        fields = AFFECTIVE_GRID_FIELDS
+        extra_kwargs = {field: {'required': False} for field in AFFECTIVE_GRID_FIELDS}
+
+
+class AssessmentGridRowSerializer(serializers.Serializer):
+    """One student's psychomotor and affective ratings"""
+    
+    result_id = serializers.IntegerField()
+    psychomotor = PsychomotorGridSerializer(required=False)
+    affective = AffectiveGridSerializer(required=False)
+
+
+class AssessmentGridSerializer(serializers.Serializer):
+    """Serializer for saving a whole cohort's psychomotor/affective grid"""
+    
+    session_id = serializers.PrimaryKeyRelatedField(
+        queryset=AcademicSession.objects.all(),
+        help_text="ID of the academic session"
+    )
+    term_id = serializers.PrimaryKeyRelatedField(
+        queryset=AcademicTerm.objects.all(),
+        help_text="ID of the academic term"
+    )
+    class_level_id = serializers.PrimaryKeyRelatedField(
+        queryset=ClassLevel.objects.all(),
+        help_text="ID of the class level"
+    )
+    rows = AssessmentGridRowSerializer(many=True, allow_empty=False)
+    
+    def validate_rows(self, value):
+        """Each result may appear once"""
+        result_ids = [row['result_id'] for row in value]
+        if len(result_ids) != len(set(result_ids)):
+            raise serializers.ValidationError("Each result may only appear once")
+        return value
+    
+    def validate(self, data):
+        if data['term_id'].session_id != data['session_id'].id:
+            raise serializers.ValidationError("Term does not belong to the selected session")
+        return data
+
+
+class BatchResultActionSerializer(serializers.Serializer):
+    """Serializer for approving or publishing many results at once"""
+    
+    result_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        help_text="IDs of selected results"
+    )
+    session_id = serializers.PrimaryKeyRelatedField(
+        queryset=AcademicSession.objects.all(),
+        required=False,
+        help_text="ID of the academic session (whole cohorts)"
+    )
+    term_id = serializers.PrimaryKeyRelatedField(
+        queryset=AcademicTerm.objects.all(),
+        required=False,
+        help_text="ID of the academic term (whole cohorts)"
+    )
+    class_level_ids = serializers.PrimaryKeyRelatedField(
+        queryset=ClassLevel.objects.all(),
+        many=True,
+        required=False,
+        allow_empty=False,
+        help_text="Class levels whose whole cohort is processed"
+    )
+    force = serializers.BooleanField(
+        default=False,
+        help_text="Publish even if the completeness check finds gaps"
+    )
+    
+    def validate(self, data):
+        if bool(data.get('result_ids')) == bool(data.get('class_level_ids')):
+            raise serializers.ValidationError("Provide either result_ids or class_level_ids")
+        if data.get('class_level_ids'):
+            if not data.get('session_id') or not data.get('term_id'):
+                raise serializers.ValidationError("session_id and term_id are required with class_level_ids")
+            if data['term_id'].session_id != data['session_id'].id:
+                raise serializers.ValidationError("Term does not belong to the selected session")
+        return data
+
 # ============================================
 # LIGHTWEIGHT SERIALIZERS FOR LISTS
 # ============================================
@@ -759,7 +1015,8 @@ class SubjectScoreListSerializer(serializers.ModelSerializer):
         model = SubjectScore
         fields = [
             'id', 'result_id', 'subject_id', 'subject_name', 'subject_code',
-            'ca_score', 'exam_score', 'total_score', 'grade', 'teacher_comment'
+            'ca_score', 'exam_score', 'total_score', 'grade', 'position_in_subject',
+            'teacher_comment', 'version'
         ]
         read_only_fields = fields
 
@@ -829,6 +1086,7 @@ class ReportCardSerializer(serializers.ModelSerializer):
             # Academic
             'subject_scores', 'overall_total_score', 'percentage',
             'overall_grade', 'overall_remark', 'class_position',
+            'annual_average', 'annual_position',
             
             # Behavioral
             'psychomotor_summary', 'affective_summary',
@@ -900,6 +1158,25 @@ class ReportCardSerializer(serializers.ModelSerializer):
             return f"{obj.position_in_class}{suffix} out of {obj.number_of_pupils_in_class}"
         return "Not available"
     
+    def to_representation(self, obj):
+        """
+        Add the subject's class average, highest and lowest score to each
+        subject score. Statistics come from SubjectClassStatistics: pass
+        `subject_statistics` (see summaries.subject_statistics_for) in the
+        context when serializing many cards, otherwise one query per card.
+        """
+        data = super().to_representation(obj)
+        statistics = self.context.get('subject_statistics')
+        if statistics is None:
+            statistics = subject_statistics_for([obj.cohort])
+        
+        for score in data['subject_scores']:
+            stat = statistics.get((*obj.cohort, score['subject_id']))
+            score['class_average'] = str(stat.class_average) if stat else None
+            score['highest_in_class'] = str(stat.highest_score) if stat else None
+            score['lowest_in_class'] = str(stat.lowest_score) if stat else None
+        return data
+    
     def get_attendance_summary(self, obj):
         """Get attendance summary"""
         if obj.frequency_of_school_opened > 0:
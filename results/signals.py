@@ -1,8 +1,15 @@
 # results/signals.py
 from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
-from django.db import transaction
-from .models import StudentResult, SubjectScore, PsychomotorSkills, AffectiveDomains
+from django.utils import timezone
+from .models import (
+    StudentResult, SubjectScore, PsychomotorSkills, AffectiveDomains, GradingScheme, GradeBoundary
+)
+from academic.models import ClassLevel
+from .recompute import mark_result_dirty, mark_cohort_dirty, recompute_results
+from .bulk import create_assessment_records as create_companion_records
+from .grading import clear_grading_cache
+from .snapshots import materialize_snapshots
 
 
 @receiver(pre_save, sender=SubjectScore)
@@ -19,42 +26,48 @@ def validate_subject_score(sender, instance, **kwargs):
 @receiver(post_save, sender=SubjectScore)
 def update_result_on_subject_score_change(sender, instance, created, **kwargs):
     """Update parent result when subject score changes"""
-    # Use transaction.on_commit to ensure it runs after the main transaction
-    transaction.on_commit(
-        lambda: update_result_totals(instance.result)
-    )
+    # Coalesced - the result is recomputed once when the request/transaction commits
+    mark_result_dirty(instance.result_id)
 
 
 @receiver(post_delete, sender=SubjectScore)
 def update_result_on_subject_score_delete(sender, instance, **kwargs):
     """Update parent result when subject score is deleted"""
-    transaction.on_commit(
-        lambda: update_result_totals(instance.result)
-    )
+    mark_result_dirty(instance.result_id)
+
+
+@receiver(post_delete, sender=StudentResult)
+def rerank_class_on_result_delete(sender, instance, **kwargs):
+    """Positions of the rest of the class shift when a result is removed"""
+    mark_cohort_dirty(instance.cohort)
 
 
 def update_result_totals(result):
-    """Helper function to update result totals"""
-    # Recalculate totals
-    result.calculate_totals()
-    
-    # Recalculate position
-    result.calculate_position()
-    
-    # Save the result
-    result.save(update_fields=[
-        'total_ca_score', 'total_exam_score', 'overall_total_score',
-        'total_obtainable', 'percentage', 'average_score',
-        'overall_grade', 'overall_remark', 'position_in_class',
-        'number_of_pupils_in_class'
+    """Helper function to update result totals (totals and the class ranking, right away)"""
+    recompute_results([result.pk])
+    result.refresh_from_db(fields=StudentResult.TOTAL_FIELDS + [
+        'position_in_class', 'number_of_pupils_in_class'
     ])
 
 
+@receiver([post_save, post_delete], sender=GradingScheme)
+@receiver([post_save, post_delete], sender=GradeBoundary)
+@receiver([post_save, post_delete], sender=ClassLevel)
+def reload_grading_schemes(sender, instance, **kwargs):
+    """Schemes are compiled once per process; recompile after any change"""
+    if sender is GradeBoundary:
+        # Other processes only notice scheme rows changing (see grading._generation)
+        GradingScheme.objects.filter(pk=instance.scheme_id).update(updated_at=timezone.now())
+    clear_grading_cache()
+
+
 @receiver(post_save, sender=PsychomotorSkills)
 def calculate_psychomotor_rating(sender, instance, created, **kwargs):
     """Calculate overall psychomotor rating"""
     instance.calculate_overall_rating()
     # Don't save here to avoid infinite loop - rating is calculated in save()
+    # Ratings are part of the published snapshot; no-op for unpublished results
+    materialize_snapshots(StudentResult.objects.filter(pk=instance.result_id))
 
 
 @receiver(post_save, sender=AffectiveDomains)
@@ -62,19 +75,19 @@ def calculate_affective_rating(sender, instance, created, **kwargs):
     """Calculate overall affective rating"""
     instance.calculate_overall_rating()
     # Don't save here to avoid infinite loop - rating is calculated in save()
+    # Ratings are part of the published snapshot; no-op for unpublished results
+    materialize_snapshots(StudentResult.objects.filter(pk=instance.result_id))
 
 
 @receiver(post_save, sender=StudentResult)
 def create_assessment_records(sender, instance, created, **kwargs):
-    """Create psychomotor and affective records when result is created"""
+    """
+    Create psychomotor and affective records when result is created
+    A new result can't have either yet, so there is nothing to look up first;
+    bulk-created results get theirs from bulk.create_assessment_records
+    """
     if created:
-        # Create psychomotor skills record if it doesn't exist
-        if not hasattr(instance, 'psychomotor_skills'):
-            PsychomotorSkills.objects.create(result=instance)
-        
-        # Create affective domains record if it doesn't exist
-        if not hasattr(instance, 'affective_domains'):
-            AffectiveDomains.objects.create(result=instance)
+        create_companion_records([instance])
 
 
 @receiver(pre_save, sender=StudentResult)
@@ -0,0 +1,204 @@
+"""
+Published Result Snapshots
+Materializes PublishedResultSnapshot rows when results are published and keeps
+each student's published results warm in the cache, so student and parent
+reads never re-serialize results with their nested scores and ratings
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+import logging
+
+from .trends import forget_trends
+
+logger = logging.getLogger(__name__)
+
+# Results serialized per batch while materializing
+SNAPSHOT_CHUNK_SIZE = 200
+
+# Media fields the live serializer makes absolute from the request
+SNAPSHOT_URL_FIELDS = ['profile_picture', 'student_image_url', 'student_image']
+
+
+def get_snapshot_timeout():
+    """Seconds a student's published results stay cached (RESULTS_SNAPSHOT_CACHE_TIMEOUT)"""
+    return getattr(settings, 'RESULTS_SNAPSHOT_CACHE_TIMEOUT', 60 * 60)
+
+
+def _cache_key(student_id):
+    return f'results:published:{student_id}'
+
+
+def _serialize(results):
+    """StudentResultSerializer data with request-relative media URLs kept relative"""
+    from .serializers import StudentResultSerializer
+
+    data = StudentResultSerializer(results, many=True).data
+    for result, row in zip(results, data):
+        student = row.get('student')
+        if not student or not result.student:
+            continue
+        user = result.student.user
+        if user and user.profile_picture:
+            student['profile_picture'] = user.profile_picture.url
+        if result.student.student_image:
+            student['student_image_url'] = result.student.student_image.url
+    return data
+
+
+def materialize_snapshots(results):
+    """
+    Write (or rewrite) the snapshot of every published result in a
+    StudentResult queryset, then re-warm the cache of the students concerned
+    once the transaction commits. Returns the number of snapshots written.
+    """
+    from .models import StudentResult, PublishedResultSnapshot
+
+    result_ids = list(results.filter(is_published=True).order_by().values_list('id', flat=True))
+    now = timezone.now()
+    student_ids = set()
+
+    for start in range(0, len(result_ids), SNAPSHOT_CHUNK_SIZE):
+        chunk = list(
+            StudentResult.objects.filter(pk__in=result_ids[start:start + SNAPSHOT_CHUNK_SIZE])
+            .select_related(
+                'student', 'student__user', 'session', 'term',
+                'class_level', 'class_teacher', 'headmaster', 'created_by',
+                'psychomotor_skills', 'affective_domains'
+            )
+            .prefetch_related('subject_scores__subject')
+        )
+        PublishedResultSnapshot.objects.bulk_create(
+            [
+                PublishedResultSnapshot(
+                    result_id=result.pk, student_id=result.student_id, data=data,
+                    created_at=now, updated_at=now
+                )
+                for result, data in zip(chunk, _serialize(chunk))
+            ],
+            update_conflicts=True,
+            unique_fields=['result'],
+            update_fields=['student', 'data', 'updated_at']
+        )
+        student_ids.update(result.student_id for result in chunk)
+
+    if student_ids:
+        cache.delete_many([_cache_key(student_id) for student_id in student_ids])
+        transaction.on_commit(lambda: warm_student_caches(student_ids))
+        forget_trends(student_ids)
+    return len(result_ids)
+
+
+def remove_snapshots(results):
+    """Delete the snapshots of a StudentResult queryset and drop the cached copies"""
+    from .models import PublishedResultSnapshot
+
+    snapshots = PublishedResultSnapshot.objects.filter(result__in=results.order_by().values('id'))
+    student_ids = set(snapshots.values_list('student_id', flat=True))
+    snapshots.delete()
+
+    if student_ids:
+        keys = [_cache_key(student_id) for student_id in student_ids]
+        cache.delete_many(keys)
+        # A read racing the delete may have re-cached the old rows
+        transaction.on_commit(lambda: cache.delete_many(keys))
+        forget_trends(student_ids)
+    return len(student_ids)
+
+
+def sync_snapshots(result_ids):
+    """
+    Bring the snapshots of changed results in line with their publish state:
+    published results are re-materialized, the rest dropped. Callers include
+    the classmates whose positions moved when a cohort was re-ranked (see
+    ranking.rank_cohorts), since positions and pupil counts are in the snapshot.
+    """
+    from .models import StudentResult
+
+    results = StudentResult.objects.filter(pk__in=result_ids)
+    remove_snapshots(results.filter(is_published=False))
+    materialize_snapshots(results)
+
+
+def _load(student_ids):
+    """Snapshots per student, newest first, followed by their archived published results"""
+    from .models import PublishedResultSnapshot
+    from .archive import archived_results
+
+    snapshots = {student_id: [] for student_id in student_ids}
+    for student_id, data in PublishedResultSnapshot.objects.filter(
+        student_id__in=student_ids
+    ).order_by('-result__created_at').values_list('student_id', 'data'):
+        snapshots[student_id].append(data)
+    for student_id, rows in archived_results(student_ids, published_only=True).items():
+        snapshots[student_id].extend(reversed(rows))
+    return snapshots
+
+
+def warm_student_caches(student_ids):
+    """Cache the published results of several students with one query"""
+    snapshots = _load(list(student_ids))
+    cache.set_many(
+        {_cache_key(student_id): rows for student_id, rows in snapshots.items()},
+        timeout=get_snapshot_timeout()
+    )
+
+
+def get_published_results(student_id):
+    """A student's published results (newest first) from the cache, or one query"""
+    rows = cache.get(_cache_key(student_id))
+    if rows is None:
+        rows = _load([student_id])[student_id]
+        cache.set(_cache_key(student_id), rows, timeout=get_snapshot_timeout())
+    return rows
+
+
+def absolute_urls(rows, request):
+    """Copies of snapshot rows with media URLs made absolute for this request"""
+    if request is None:
+        return rows
+
+    absolute = []
+    for row in rows:
+        student = row.get('student')
+        if student:
+            student = {
+                key: request.build_absolute_uri(value)
+                if key in SNAPSHOT_URL_FIELDS and isinstance(value, str) and value.startswith('/')
+                else value
+                for key, value in student.items()
+            }
+            row = {**row, 'student': student}
+        absolute.append(row)
+    return absolute
+
+
+def snapshot_statistics(rows):
+    """Overall statistics for a student's published results, from their snapshots"""
+    percentages = [float(row['percentage'] or 0) for row in rows]
+    best = max(rows, key=lambda row: float(row['percentage'] or 0)) if rows else None
+
+    by_term = {}
+    for row in rows:
+        term = row.get('term') or {}
+        by_term.setdefault((term.get('term'), term.get('name')), []).append(row)
+
+    results_by_term = []
+    for (term_code, term_name), term_rows in by_term.items():
+        positions = [row['position_in_class'] for row in term_rows if row['position_in_class'] is not None]
+        results_by_term.append({
+            'term__term': term_code,
+            'term__name': term_name,
+            'avg_percentage': sum(float(row['percentage'] or 0) for row in term_rows) / len(term_rows),
+            'avg_position': sum(positions) / len(positions) if positions else None
+        })
+
+    return {
+        'total_results': len(rows),
+        'average_percentage': round(sum(percentages) / len(percentages), 2) if percentages else 0,
+        'best_percentage': best['percentage'] if best else 0,
+        'best_grade': best['overall_grade'] if best else '',
+        'best_position': best['position_in_class'] if best else None,
+        'results_by_term': results_by_term
+    }
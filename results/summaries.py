@@ -0,0 +1,358 @@
+"""
+Result Cohort Summaries
+Maintains ResultCohortSummary rows so statistics endpoints read one
+precomputed row per (class_level, session, term) instead of aggregating
+StudentResult on every request, SubjectClassStatistics rows with the
+per-subject class average, highest and lowest score, and
+TeacherPerformanceRollup rows per subject teacher
+"""
+from decimal import Decimal
+from django.db.models import Avg, Max, Min, Count, Q, OuterRef, Subquery
+from functools import reduce
+import logging
+import operator
+
+from .grading import pass_filter
+
+logger = logging.getLogger(__name__)
+
+# Cohorts refreshed per aggregate query
+SUMMARY_CHUNK_SIZE = 200
+
+SUMMARY_FIELDS = [
+    'total_results', 'scored_results', 'published_count', 'promoted_count',
+    'avg_percentage', 'max_percentage', 'min_percentage',
+    'avg_total_score', 'max_total_score', 'min_total_score', 'avg_position',
+    'grade_distribution', 'avg_present', 'avg_absent', 'avg_days_opened', 'updated_at'
+]
+
+
+SUBJECT_STATISTICS_FIELDS = [
+    'student_count', 'class_average', 'average_ca_score', 'average_exam_score',
+    'highest_score', 'lowest_score', 'updated_at'
+]
+
+TEACHER_ROLLUP_FIELDS = [
+    'student_count', 'pass_count', 'average_score', 'highest_score', 'lowest_score',
+    'grade_distribution', 'updated_at'
+]
+
+
+def _cohort_filter(cohorts, prefix=''):
+    return reduce(operator.or_, (
+        Q(**{
+            f'{prefix}class_level_id': class_level_id,
+            f'{prefix}session_id': session_id,
+            f'{prefix}term_id': term_id
+        })
+        for class_level_id, session_id, term_id in cohorts
+    ))
+
+
+def _rounded(value):
+    return Decimal('0.00') if value is None else round(Decimal(value), 2)
+
+
+def refresh_cohort_summaries(cohorts):
+    """
+    Recompute the summary rows of the given (class_level_id, session_id, term_id)
+    cohorts with two grouped aggregate queries per chunk and upsert them.
+    Summaries of cohorts that no longer have results are deleted.
+    """
+    from django.utils import timezone
+    from .models import StudentResult, ResultCohortSummary
+
+    cohorts = [cohort for cohort in set(cohorts) if cohort and all(cohort)]
+    now = timezone.now()
+    refreshed = 0
+
+    for start in range(0, len(cohorts), SUMMARY_CHUNK_SIZE):
+        chunk = cohorts[start:start + SUMMARY_CHUNK_SIZE]
+        results = StudentResult.objects.filter(_cohort_filter(chunk)).order_by()
+
+        stats = results.values('class_level_id', 'session_id', 'term_id').annotate(
+            total_results=Count('id'),
+            scored_results=Count('id', filter=Q(overall_total_score__gt=0)),
+            published_count=Count('id', filter=Q(is_published=True)),
+            promoted_count=Count('id', filter=Q(is_promoted=True)),
+            avg_percentage=Avg('percentage'),
+            max_percentage=Max('percentage'),
+            min_percentage=Min('percentage'),
+            avg_total_score=Avg('overall_total_score'),
+            max_total_score=Max('overall_total_score'),
+            min_total_score=Min('overall_total_score'),
+            avg_position=Avg('position_in_class'),
+            avg_present=Avg('no_of_times_present'),
+            avg_absent=Avg('no_of_times_absent'),
+            avg_days_opened=Avg('frequency_of_school_opened')
+        )
+
+        grades = {}
+        for row in results.values('class_level_id', 'session_id', 'term_id', 'overall_grade').annotate(
+            count=Count('id')
+        ):
+            key = (row['class_level_id'], row['session_id'], row['term_id'])
+            grades.setdefault(key, {})[row['overall_grade']] = row['count']
+
+        summaries = []
+        for row in stats:
+            key = (row['class_level_id'], row['session_id'], row['term_id'])
+            summaries.append(ResultCohortSummary(
+                class_level_id=key[0],
+                session_id=key[1],
+                term_id=key[2],
+                total_results=row['total_results'],
+                scored_results=row['scored_results'],
+                published_count=row['published_count'],
+                promoted_count=row['promoted_count'],
+                avg_percentage=_rounded(row['avg_percentage']),
+                max_percentage=_rounded(row['max_percentage']),
+                min_percentage=_rounded(row['min_percentage']),
+                avg_total_score=_rounded(row['avg_total_score']),
+                max_total_score=_rounded(row['max_total_score']),
+                min_total_score=_rounded(row['min_total_score']),
+                avg_position=None if row['avg_position'] is None else _rounded(row['avg_position']),
+                grade_distribution=grades.get(key, {}),
+                avg_present=_rounded(row['avg_present']),
+                avg_absent=_rounded(row['avg_absent']),
+                avg_days_opened=_rounded(row['avg_days_opened']),
+                updated_at=now
+            ))
+
+        if summaries:
+            ResultCohortSummary.objects.bulk_create(
+                summaries,
+                update_conflicts=True,
+                unique_fields=['class_level', 'session', 'term'],
+                update_fields=SUMMARY_FIELDS
+            )
+
+        # Cohorts that lost all their results
+        present = {(s.class_level_id, s.session_id, s.term_id) for s in summaries}
+        emptied = [cohort for cohort in chunk if cohort not in present]
+        if emptied:
+            ResultCohortSummary.objects.filter(_cohort_filter(emptied)).delete()
+
+        refreshed += len(summaries)
+
+    return refreshed
+
+
+def refresh_subject_statistics(cohorts):
+    """
+    Recompute SubjectClassStatistics for the given cohorts with one grouped
+    aggregate per chunk and upsert them. Only scores above zero count, the
+    same rule subject positions use; rows for subjects that no longer have
+    scores are deleted.
+    """
+    from django.utils import timezone
+    from .models import SubjectScore, SubjectClassStatistics
+
+    cohorts = [cohort for cohort in set(cohorts) if cohort and all(cohort)]
+    now = timezone.now()
+    refreshed = 0
+
+    for start in range(0, len(cohorts), SUMMARY_CHUNK_SIZE):
+        chunk = cohorts[start:start + SUMMARY_CHUNK_SIZE]
+
+        rows = SubjectScore.objects.filter(
+            _cohort_filter(chunk, prefix='result__'), total_score__gt=0
+        ).order_by().values(
+            'result__class_level_id', 'result__session_id', 'result__term_id', 'subject_id'
+        ).annotate(
+            student_count=Count('id'),
+            class_average=Avg('total_score'),
+            average_ca_score=Avg('ca_score'),
+            average_exam_score=Avg('exam_score'),
+            highest_score=Max('total_score'),
+            lowest_score=Min('total_score')
+        )
+
+        statistics = [
+            SubjectClassStatistics(
+                class_level_id=row['result__class_level_id'],
+                session_id=row['result__session_id'],
+                term_id=row['result__term_id'],
+                subject_id=row['subject_id'],
+                student_count=row['student_count'],
+                class_average=_rounded(row['class_average']),
+                average_ca_score=_rounded(row['average_ca_score']),
+                average_exam_score=_rounded(row['average_exam_score']),
+                highest_score=_rounded(row['highest_score']),
+                lowest_score=_rounded(row['lowest_score']),
+                updated_at=now
+            )
+            for row in rows
+        ]
+
+        if statistics:
+            SubjectClassStatistics.objects.bulk_create(
+                statistics,
+                update_conflicts=True,
+                unique_fields=['class_level', 'session', 'term', 'subject'],
+                update_fields=SUBJECT_STATISTICS_FIELDS
+            )
+
+        # Subjects that lost all their scores
+        present = {
+            (stat.class_level_id, stat.session_id, stat.term_id, stat.subject_id) for stat in statistics
+        }
+        stale = [
+            pk for pk, *key in SubjectClassStatistics.objects.filter(_cohort_filter(chunk)).values_list(
+                'pk', 'class_level_id', 'session_id', 'term_id', 'subject_id'
+            )
+            if tuple(key) not in present
+        ]
+        if stale:
+            SubjectClassStatistics.objects.filter(pk__in=stale).delete()
+
+        refreshed += len(statistics)
+
+    return refreshed
+
+
+def _score_teacher():
+    """
+    Subquery of the teacher of a SubjectScore row: the ClassSubject teacher
+    for its subject in the arm its student is enrolled in that session and term
+    """
+    from academic.models import ClassSubject
+    from students.models import StudentEnrollment
+
+    arms = StudentEnrollment.objects.filter(
+        student_id=OuterRef(OuterRef('result__student_id')),
+        session_id=OuterRef(OuterRef('result__session_id')),
+        term_id=OuterRef(OuterRef('result__term_id'))
+    ).values('class_obj_id')
+
+    return Subquery(
+        ClassSubject.objects.filter(
+            subject_id=OuterRef('subject_id'), class_obj_id__in=arms, teacher__isnull=False
+        ).order_by('class_obj_id').values('teacher_id')[:1]
+    )
+
+
+def refresh_teacher_rollups(cohorts):
+    """
+    Recompute TeacherPerformanceRollup rows for the given cohorts with two
+    grouped aggregates per chunk and upsert them. Only scores above zero
+    count; scores of students with no subject teacher are left out. Rows a
+    teacher no longer has (reassigned, scores removed) are deleted.
+    """
+    from django.utils import timezone
+    from .models import SubjectScore, TeacherPerformanceRollup
+
+    cohorts = [cohort for cohort in set(cohorts) if cohort and all(cohort)]
+    now = timezone.now()
+    refreshed = 0
+    key_fields = ['teacher', 'result__class_level_id', 'result__session_id', 'result__term_id', 'subject_id']
+
+    for start in range(0, len(cohorts), SUMMARY_CHUNK_SIZE):
+        chunk = cohorts[start:start + SUMMARY_CHUNK_SIZE]
+        scores = SubjectScore.objects.filter(
+            _cohort_filter(chunk, prefix='result__'), total_score__gt=0
+        ).annotate(teacher=_score_teacher()).filter(teacher__isnull=False).order_by()
+
+        rows = scores.values(*key_fields).annotate(
+            student_count=Count('id'),
+            pass_count=Count('id', filter=pass_filter(
+                {class_level_id for class_level_id, _, _ in chunk}, prefix='result__'
+            )),
+            average_score=Avg('total_score'),
+            highest_score=Max('total_score'),
+            lowest_score=Min('total_score')
+        )
+
+        grades = {}
+        for row in scores.values(*key_fields, 'grade').annotate(count=Count('id')):
+            key = tuple(row[field] for field in key_fields)
+            grades.setdefault(key, {})[row['grade']] = row['count']
+
+        rollups = []
+        for row in rows:
+            key = tuple(row[field] for field in key_fields)
+            rollups.append(TeacherPerformanceRollup(
+                teacher_id=key[0],
+                class_level_id=key[1],
+                session_id=key[2],
+                term_id=key[3],
+                subject_id=key[4],
+                student_count=row['student_count'],
+                pass_count=row['pass_count'],
+                average_score=_rounded(row['average_score']),
+                highest_score=_rounded(row['highest_score']),
+                lowest_score=_rounded(row['lowest_score']),
+                grade_distribution=grades.get(key, {}),
+                updated_at=now
+            ))
+
+        if rollups:
+            TeacherPerformanceRollup.objects.bulk_create(
+                rollups,
+                update_conflicts=True,
+                unique_fields=['teacher', 'subject', 'class_level', 'session', 'term'],
+                update_fields=TEACHER_ROLLUP_FIELDS
+            )
+
+        # Rows whose teacher no longer has scores in the cohort
+        present = {
+            (rollup.teacher_id, rollup.class_level_id, rollup.session_id, rollup.term_id, rollup.subject_id)
+            for rollup in rollups
+        }
+        stale = [
+            pk for pk, *key in TeacherPerformanceRollup.objects.filter(_cohort_filter(chunk)).values_list(
+                'pk', 'teacher_id', 'class_level_id', 'session_id', 'term_id', 'subject_id'
+            )
+            if tuple(key) not in present
+        ]
+        if stale:
+            TeacherPerformanceRollup.objects.filter(pk__in=stale).delete()
+
+        refreshed += len(rollups)
+
+    return refreshed
+
+
+def subject_statistics_for(cohorts):
+    """
+    {(class_level_id, session_id, term_id, subject_id): SubjectClassStatistics}
+    for the given cohorts, in one query per chunk
+    """
+    from .models import SubjectClassStatistics
+
+    cohorts = [cohort for cohort in set(cohorts) if cohort and all(cohort)]
+    statistics = {}
+    for start in range(0, len(cohorts), SUMMARY_CHUNK_SIZE):
+        for stat in SubjectClassStatistics.objects.filter(
+            _cohort_filter(cohorts[start:start + SUMMARY_CHUNK_SIZE])
+        ):
+            statistics[(stat.class_level_id, stat.session_id, stat.term_id, stat.subject_id)] = stat
+    return statistics
+
+
+def get_cohort_summary(class_level_id, session_id, term_id):
+    """Summary row for a cohort, built on first use if it doesn't exist yet"""
+    from .models import ResultCohortSummary
+
+    summary = ResultCohortSummary.objects.filter(
+        class_level_id=class_level_id, session_id=session_id, term_id=term_id
+    ).first()
+    if summary is None and refresh_cohort_summaries([(class_level_id, session_id, term_id)]):
+        summary = ResultCohortSummary.objects.get(
+            class_level_id=class_level_id, session_id=session_id, term_id=term_id
+        )
+    return summary
+
+
+def weighted_average(summaries, field, weight='total_results'):
+    """Average of a per-cohort average, weighted by cohort size"""
+    total_weight = 0
+    total = 0
+    for summary in summaries:
+        value = getattr(summary, field)
+        count = getattr(summary, weight)
+        if value is None or not count:
+            continue
+        total += float(value) * count
+        total_weight += count
+    return total / total_weight if total_weight else 0
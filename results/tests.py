@@ -1,3 +1,1241 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from academic.models import Program, ClassLevel, AcademicSession, AcademicTerm, Subject, Class, ClassSubject
+from students.models import StudentEnrollment
+from users.models import User
+
+from .models import StudentResult, SubjectScore, PublishedResultSnapshot
+from .publishing import publish_results
+from .grading import clear_grading_cache
+
+
+class ResultsTestCase(TestCase):
+    """A primary class level with one arm, three terms, subjects and students"""
+
+    student_count = 4
+    subject_count = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.head = User.objects.create_user(
+            first_name='Head', last_name='Teacher', role='head', password='x', registration_number='HEAD001'
+        )
+        program = Program.objects.create(code='PRI', name='Primary', program_type='primary')
+        cls.class_level = ClassLevel.objects.create(
+            program=program, level='primary_1', name='Primary 1', code='P1', order=1
+        )
+        cls.session = AcademicSession.objects.create(
+            name='2025/2026', start_date=datetime.date(2025, 9, 1), end_date=datetime.date(2026, 7, 31)
+        )
+        cls.terms = [
+            AcademicTerm.objects.create(
+                session=cls.session, term=term, name=f'{term.title()} Term',
+                start_date=datetime.date(2025, 9, 1) + datetime.timedelta(days=120 * i),
+                end_date=datetime.date(2025, 12, 15) + datetime.timedelta(days=120 * i)
+            )
+            for i, term in enumerate(['first', 'second', 'third'])
+        ]
+        cls.term = cls.terms[0]
+        cls.subjects = [
+            Subject.objects.create(code=f'SUB{i}', name=f'Subject {i}', available_for_primary=True)
+            for i in range(cls.subject_count)
+        ]
+        cls.arm = Class.objects.create(
+            session=cls.session, term=cls.term, class_level=cls.class_level, name='Primary 1 A', code='P1A'
+        )
+        for subject in cls.subjects:
+            ClassSubject.objects.update_or_create(class_obj=cls.arm, subject=subject, defaults={'teacher': cls.head})
+
+        cls.students = []
+        for i in range(cls.student_count):
+            user = User.objects.create_user(
+                first_name=f'Student{i}', last_name='Test', role='student', registration_number=f'STU{i:03d}'
+            )
+            student = user.student_profile
+            student.class_level = cls.class_level
+            student.save()
+            StudentEnrollment.objects.create(
+                student=student, session=cls.session, term=cls.term, class_obj=cls.arm,
+                status='active', enrolled_by=cls.head
+            )
+            cls.students.append(student)
+
+    def setUp(self):
+        # Schemes compiled by an earlier test may belong to rolled back rows
+        clear_grading_cache()
+
+    @property
+    def cohort(self):
+        return (self.class_level.pk, self.session.pk, self.term.pk)
+
+    def set_score(self, result, subject, total):
+        """Create or change a subject score; CA takes up to 40 marks, the exam the rest"""
+        total = Decimal(str(total))
+        ca, exam = min(total, Decimal('40')), max(total - Decimal('40'), Decimal('0'))
+        score = SubjectScore.objects.filter(result=result, subject=subject).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            if score is None:
+                score = SubjectScore.objects.create(result=result, subject=subject, ca_score=ca, exam_score=exam)
+            else:
+                score.ca_score, score.exam_score = ca, exam
+                score.save()
+        return score
+
+    def make_results(self, totals, term=None):
+        """One result per student with a first-subject score of each total (None = no scores)"""
+        results = []
+        for student, total in zip(self.students, totals):
+            with self.captureOnCommitCallbacks(execute=True):
+                result = StudentResult.objects.create(
+                    student=student, session=self.session, term=term or self.term, class_level=self.class_level
+                )
+            if total is not None:
+                self.set_score(result, self.subjects[0], total)
+            results.append(result)
+        return results
+
+    def refreshed(self, results):
+        return [StudentResult.objects.get(pk=result.pk) for result in results]
+
+    def use_temporary_report_cache(self):
+        """Point RESULTS_REPORT_CACHE_DIR at a directory removed after the test"""
+        import shutil
+        import tempfile
+
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        settings = self.settings(RESULTS_REPORT_CACHE_DIR=cache_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        return cache_dir
+
+
+class SnapshotSyncTests(ResultsTestCase):
+    """Published snapshots follow re-ranking and annual computation (user-011)"""
+
+    def publish(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            publish_results(
+                StudentResult.objects.filter(session=self.session, term=self.term), self.head,
+                cohorts=[(self.class_level, self.session, self.term)]
+            )
+
+    def snapshot_positions(self, results):
+        return [
+            PublishedResultSnapshot.objects.get(result_id=result.pk).data['position_in_class']
+            for result in results
+        ]
+
+    def test_classmates_snapshots_follow_reranking(self):
+        results = self.make_results([90, 80, 70])
+        self.publish()
+        self.assertEqual(self.snapshot_positions(results), [1, 2, 3])
+
+        # Only the last student's score changes, but everyone's position moves
+        self.set_score(results[2], self.subjects[0], 95)
+
+        positions = [result.position_in_class for result in self.refreshed(results)]
+        self.assertEqual(positions, [2, 3, 1])
+        self.assertEqual(self.snapshot_positions(results), positions)
+
+    def test_unmoved_classmates_snapshots_are_left_alone(self):
+        results = self.make_results([90, 80, 70])
+        self.publish()
+        written = dict(PublishedResultSnapshot.objects.values_list('result_id', 'updated_at'))
+
+        # The leader extends their lead; nobody else's position changes
+        self.set_score(results[0], self.subjects[0], 95)
+
+        rewritten = dict(PublishedResultSnapshot.objects.values_list('result_id', 'updated_at'))
+        self.assertNotEqual(rewritten[results[0].pk], written[results[0].pk])
+        self.assertEqual(rewritten[results[1].pk], written[results[1].pk])
+        self.assertEqual(rewritten[results[2].pk], written[results[2].pk])
+
+    def test_annual_results_update_snapshots(self):
+        from .annual import compute_annual_results
+
+        results = self.make_results([80, 60])
+        self.publish()
+        compute_annual_results(self.session.pk)
+
+        for result in self.refreshed(results):
+            data = PublishedResultSnapshot.objects.get(result_id=result.pk).data
+            self.assertEqual(Decimal(data['annual_average']), result.annual_average)
+            self.assertEqual(data['annual_position'], result.annual_position)
+        self.assertEqual([result.annual_position for result in self.refreshed(results)], [1, 2])
+
+    def test_rating_edits_update_snapshot(self):
+        result, = self.make_results([75])
+        self.publish()
+
+        skills = result.psychomotor_skills
+        skills.handwriting = 5
+        skills.save()
+        domains = result.affective_domains
+        domains.honesty = 1
+        domains.save()
+
+        data = PublishedResultSnapshot.objects.get(result_id=result.pk).data
+        self.assertEqual(data['psychomotor_skills']['handwriting'], 5)
+        self.assertEqual(data['affective_domains']['honesty'], 1)
+
+
+class ConsistencyTests(ResultsTestCase):
+    """The ORM and SQL recomputes store the same totals (user-012)"""
+
+    def test_average_rounds_half_up_on_both_paths(self):
+        from .consistency import diff_cohort, recompute_cohort
+
+        result, = self.make_results([60.25])
+        self.set_score(result, self.subjects[1], 40)
+
+        result.refresh_from_db()
+        self.assertEqual(result.overall_total_score, Decimal('100.25'))
+        self.assertEqual(result.average_score, Decimal('50.13'))
+        self.assertEqual(diff_cohort(*self.cohort), [])
+
+        # The SQL recompute finds nothing to change
+        self.assertEqual(recompute_cohort(*self.cohort), [])
+        result.refresh_from_db()
+        self.assertEqual(result.average_score, Decimal('50.13'))
+
+    def test_drift_is_reported_and_repaired(self):
+        from .consistency import diff_cohort, recompute_cohort
+
+        result, = self.make_results([70])
+        StudentResult.objects.filter(pk=result.pk).update(overall_total_score=10)
+
+        drifted = diff_cohort(*self.cohort)
+        self.assertEqual([row['result_id'] for row in drifted], [result.pk])
+        self.assertEqual(recompute_cohort(*self.cohort), [result.pk])
+        self.assertEqual(diff_cohort(*self.cohort), [])
+        result.refresh_from_db()
+        self.assertEqual(result.overall_total_score, Decimal('70.00'))
+
+
+class GradingSchemeTests(ResultsTestCase):
+    """Scheme lookup, resolution, cross-process reloads and regrading (user-021)"""
+
+    def make_scheme(self, name='Strict', bands=((70, 'A', 'excellent'), (50, 'C', 'credit'), (0, 'F', 'fail')), **scope):
+        from .models import GradingScheme, GradeBoundary
+
+        scheme = GradingScheme.objects.create(name=name, **scope)
+        for minimum, grade, remark in bands:
+            GradeBoundary.objects.create(scheme=scheme, min_score=minimum, grade=grade, remark=remark)
+        return scheme
+
+    def test_bisect_lookup_boundaries(self):
+        from .grading import CompiledScheme
+
+        scheme = CompiledScheme('Test', [(50, 'C', 'credit'), (70, 'A', 'excellent'), (10, 'F', 'fail')], 50)
+        self.assertEqual(scheme.lookup(70), ('A', 'excellent'))
+        self.assertEqual(scheme.lookup(69.99), ('C', 'credit'))
+        self.assertEqual(scheme.lookup(50), ('C', 'credit'))
+        self.assertEqual(scheme.lookup(10), ('F', 'fail'))
+        # Below the lowest boundary, or missing, gets the lowest band
+        self.assertEqual(scheme.lookup(3), ('F', 'fail'))
+        self.assertEqual(scheme.lookup(None), ('F', 'fail'))
+
+    def test_resolution_order(self):
+        from .grading import scheme_for
+
+        self.assertEqual(scheme_for(self.class_level.pk).name, 'Standard')
+        self.make_scheme('School', is_default=True)
+        self.assertEqual(scheme_for(self.class_level.pk).name, 'School')
+        self.make_scheme('Primary', program=self.class_level.program)
+        self.assertEqual(scheme_for(self.class_level.pk).name, 'Primary')
+        self.make_scheme('Primary 1', class_level=self.class_level)
+        self.assertEqual(scheme_for(self.class_level.pk).name, 'Primary 1')
+
+    def edit_elsewhere(self, scheme):
+        """Change a boundary the way another process would: no signal reaches this one"""
+        from .models import GradeBoundary
+
+        GradeBoundary.objects.filter(scheme=scheme, grade='C').update(grade='B')
+        type(scheme).objects.filter(pk=scheme.pk).update(updated_at=timezone.now())
+
+    def test_changes_from_other_processes_are_seen_on_recheck(self):
+        from .grading import scheme_for, recheck_grading_schemes
+
+        scheme = self.make_scheme(is_default=True)
+        self.assertEqual(scheme_for(self.class_level.pk).lookup(60)[0], 'C')
+
+        # Within the recheck interval lookups don't query the generation
+        self.edit_elsewhere(scheme)
+        with self.assertNumQueries(0):
+            self.assertEqual(scheme_for(self.class_level.pk).lookup(60)[0], 'C')
+
+        recheck_grading_schemes()
+        self.assertEqual(scheme_for(self.class_level.pk).lookup(60)[0], 'B')
+
+    @override_settings(RESULTS_GRADING_RECHECK_SECONDS=0)
+    def test_elapsed_interval_rechecks_generation(self):
+        from .grading import scheme_for
+
+        scheme = self.make_scheme(is_default=True)
+        self.assertEqual(scheme_for(self.class_level.pk).lookup(60)[0], 'C')
+
+        self.edit_elsewhere(scheme)
+        self.assertEqual(scheme_for(self.class_level.pk).lookup(60)[0], 'B')
+
+    def test_boundary_edit_moves_the_generation(self):
+        from .grading import _generation
+
+        scheme = self.make_scheme(is_default=True)
+        before = _generation()
+        boundary = scheme.boundaries.get(grade='C')
+        boundary.min_score = 55
+        boundary.save()
+        self.assertNotEqual(_generation(), before)
+
+    def test_regrade_session(self):
+        from .grading import regrade_session
+
+        results = self.make_results([75, 55, 30])
+        self.assertEqual([result.overall_grade for result in self.refreshed(results)], ['B', 'C', 'E'])
+
+        self.make_scheme(class_level=self.class_level)
+        summary = regrade_session(self.session.pk)
+
+        self.assertEqual(summary['results'], 3)
+        self.assertEqual([result.overall_grade for result in self.refreshed(results)], ['A', 'C', 'F'])
+        self.assertEqual(
+            list(SubjectScore.objects.filter(result__in=results).order_by('result_id').values_list('grade', flat=True)),
+            ['A', 'C', 'F']
+        )
+        # Nothing left to change
+        self.assertEqual(regrade_session(self.session.pk)['results'], 0)
+
+
+class TeacherVisibilityTests(ResultsTestCase):
+    """Teachers follow only the terms of their own classes (user-018/019)"""
+
+    def setUp(self):
+        super().setUp()
+        self.teacher = User.objects.create_user(
+            first_name='Class', last_name='Teacher', role='teacher', password='x', registration_number='TCH001'
+        )
+        self.first, = self.make_results([70])
+        self.second, = self.make_results([50], term=self.terms[1])
+        StudentResult.objects.filter(pk=self.first.pk).update(class_teacher=self.teacher)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def test_trend_is_limited_to_the_teachers_results(self):
+        response = self.client.get('/api/results/results/trend/', {'student_id': self.students[0].pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([term['result_id'] for term in response.data['terms']], [self.first.pk])
+        self.assertEqual(response.data['subjects'][self.subjects[0].code]['totals'], ['70.00'])
+
+        # The head sees the whole series
+        self.client.force_authenticate(self.head)
+        response = self.client.get('/api/results/results/trend/', {'student_id': self.students[0].pk})
+        self.assertEqual([term['result_id'] for term in response.data['terms']], [self.first.pk, self.second.pk])
+
+    def test_trend_refused_without_a_visible_result(self):
+        response = self.client.get('/api/results/results/trend/', {'student_id': self.students[1].pk})
+        self.assertEqual(response.status_code, 403)
+
+    def test_transcript_is_limited_to_the_teachers_results(self):
+        from .transcripts import load_transcripts
+
+        StudentResult.objects.filter(pk__in=[self.first.pk, self.second.pk]).update(is_published=True)
+        full = load_transcripts([self.students[0].pk])[self.students[0].pk]
+        partial = load_transcripts([self.students[0].pk], result_ids={self.first.pk})[self.students[0].pk]
+        self.assertEqual(list(full['sessions'][0]['terms']), ['first', 'second'])
+        self.assertEqual(list(partial['sessions'][0]['terms']), ['first'])
+
+
+class ResultPublishingTests(ResultsTestCase):
+    """Publishing a ResultPublishing record goes through the batch publisher (user-023)"""
+
+    def test_publish_and_unpublish_bump_versions_and_snapshots(self):
+        from .models import ResultPublishing
+
+        results = self.make_results([70, 60])
+        versions = [result.version for result in self.refreshed(results)]
+        record = ResultPublishing(session=self.session, term=self.term, class_level=self.class_level)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            record.publish_results(self.head)
+
+        published = self.refreshed(results)
+        self.assertTrue(all(result.is_published for result in published))
+        self.assertEqual([result.version for result in published], [version + 1 for version in versions])
+        self.assertEqual(PublishedResultSnapshot.objects.filter(result__in=results).count(), 2)
+        record = ResultPublishing.objects.get(session=self.session, term=self.term, class_level=self.class_level)
+        self.assertTrue(record.is_published)
+        self.assertEqual(record.published_by, self.head)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            record.unpublish_results()
+
+        unpublished = self.refreshed(results)
+        self.assertFalse(any(result.is_published for result in unpublished))
+        self.assertEqual([result.version for result in unpublished], [version + 2 for version in versions])
+        self.assertFalse(PublishedResultSnapshot.objects.filter(result__in=results).exists())
+        self.assertFalse(ResultPublishing.objects.get(pk=record.pk).is_published)
+
+    def test_admin_counts_results_without_cohort_summaries(self):
+        from django.contrib import admin
+        from django.test import RequestFactory
+        from .models import ResultPublishing, ResultCohortSummary
+
+        self.make_results([70, 60, None])
+        ResultCohortSummary.objects.all().delete()
+        ResultPublishing.objects.create(session=self.session, term=self.term, class_level=self.class_level)
+        ResultPublishing.objects.create(session=self.session, term=self.terms[1])
+
+        model_admin = admin.site._registry[ResultPublishing]
+        request = RequestFactory().get('/')
+        request.user = self.head
+        counts = {record.term_id: model_admin.results_count(record) for record in model_admin.get_queryset(request)}
+        self.assertEqual(counts, {self.term.pk: 3, self.terms[1].pk: 0})
+
+
+class PassMarkTests(ResultsTestCase):
+    """Pass counts follow the pass mark of the class level's grading scheme (user-020)"""
+
+    def pass_count(self):
+        from .models import TeacherPerformanceRollup
+
+        return TeacherPerformanceRollup.objects.get(subject=self.subjects[0], teacher=self.head).pass_count
+
+    def test_rollup_pass_count_uses_the_scheme_pass_mark(self):
+        from .models import GradingScheme, GradeBoundary
+        from .summaries import refresh_teacher_rollups
+
+        self.make_results([75, 50, 45, 30])
+        refresh_teacher_rollups([self.cohort])
+        self.assertEqual(self.pass_count(), 2)
+
+        scheme = GradingScheme.objects.create(name='Lenient', class_level=self.class_level, pass_mark=40)
+        GradeBoundary.objects.create(scheme=scheme, min_score=0, grade='P', remark='average')
+        refresh_teacher_rollups([self.cohort])
+        self.assertEqual(self.pass_count(), 3)
+
+
+class DeferredRecomputeTests(ResultsTestCase):
+    """Score saves are coalesced into one recompute per batch (user-002)"""
+
+    def flushes(self, callbacks):
+        from .recompute import DirtyResults
+
+        return sum(getattr(callback, '__func__', None) is DirtyResults.flush for callback in callbacks)
+
+    def test_one_commit_callback_per_transaction(self):
+        results = self.make_results([None, None, None])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for result, total in zip(results, [60, 70, 80]):
+                for subject in self.subjects:
+                    SubjectScore.objects.create(result=result, subject=subject, ca_score=30, exam_score=total - 30)
+        self.assertEqual(self.flushes(callbacks), 1)
+        self.assertEqual([result.position_in_class for result in self.refreshed(results)], [3, 2, 1])
+
+    def test_rolled_back_savepoint_does_not_strand_the_batch(self):
+        from django.db import transaction
+
+        result, other = self.make_results([None, None])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    SubjectScore.objects.create(result=other, subject=self.subjects[0], ca_score=30, exam_score=30)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            SubjectScore.objects.create(result=result, subject=self.subjects[0], ca_score=30, exam_score=40)
+        self.assertEqual(self.flushes(callbacks), 1)
+        result.refresh_from_db()
+        self.assertEqual(result.overall_total_score, Decimal('70.00'))
+
+    def test_scope_recomputes_once(self):
+        from unittest import mock
+        from . import recompute
+
+        results = self.make_results([None, None, None])
+        with mock.patch.object(recompute, 'recompute_results', wraps=recompute.recompute_results) as recomputed:
+            with self.captureOnCommitCallbacks(execute=True):
+                with recompute.defer_recompute():
+                    for result in results:
+                        SubjectScore.objects.create(result=result, subject=self.subjects[0], ca_score=20, exam_score=30)
+        recomputed.assert_called_once()
+        self.assertEqual(set(recomputed.call_args.args[0]), {result.pk for result in results})
+
+    def test_update_returns_recomputed_position(self):
+        moved, stays = self.make_results([90, 80])
+        other_level = ClassLevel.objects.create(
+            program=self.class_level.program, level='primary_2', name='Primary 2', code='P2', order=2
+        )
+        client = APIClient()
+        client.force_authenticate(self.head)
+
+        response = client.patch(
+            f'/api/results/results/{stays.pk}/', {'class_level_id': other_level.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['position_in_class'], 1)
+        self.assertEqual(response.data['number_of_pupils_in_class'], 1)
+
+
+class ScoreModerationTests(ResultsTestCase):
+    """Bulk moderation clamps, audits and recomputes; only HODs and admins may moderate (user-025)"""
+
+    url = '/api/results/results/moderate-scores/'
+
+    def payload(self, **overrides):
+        return {
+            'session_id': self.session.pk, 'term_id': self.term.pk, 'class_level_id': self.class_level.pk,
+            'subject_id': self.subjects[0].pk, 'component': 'exam_score', 'operation': 'add', 'amount': '5',
+            'reason': 'Paper too hard', **overrides
+        }
+
+    def teacher(self, registration_number, teacher_type):
+        from academic.models import TeacherProfile
+
+        user = User.objects.create_user(
+            first_name='Subject', last_name='Teacher', role='teacher', password='x',
+            registration_number=registration_number
+        )
+        profile = TeacherProfile.objects.create(staff=user.staff_profile, teacher_type=teacher_type)
+        profile.subjects.add(self.subjects[0])
+        return user
+
+    def test_add_marks_clamps_records_and_reranks(self):
+        from .moderation import moderate_scores
+
+        results = self.make_results([40, 98, 70])
+        with self.captureOnCommitCallbacks(execute=True):
+            moderation = moderate_scores(
+                self.subjects[0], self.class_level, self.session, self.term, 'exam_score', 'add', 5, self.head
+            )
+
+        totals = [
+            SubjectScore.objects.get(result=result, subject=self.subjects[0]).total_score for result in results
+        ]
+        # An exam of 0 moves to 5; 58 out of 60 is capped at 60
+        self.assertEqual(totals, [Decimal('45.00'), Decimal('100.00'), Decimal('75.00')])
+        self.assertEqual(moderation.scores_moderated, 3)
+        self.assertEqual(
+            [(change['before'], change['after']) for change in moderation.changes],
+            [(Decimal('0.00'), Decimal('5.00')), (Decimal('58.00'), Decimal('60.00')), (Decimal('30.00'), Decimal('35.00'))]
+        )
+        refreshed = self.refreshed(results)
+        self.assertEqual([result.overall_total_score for result in refreshed], totals)
+        self.assertEqual([result.position_in_class for result in refreshed], [3, 1, 2])
+
+    def test_only_heads_of_department_and_admins_moderate(self):
+        self.make_results([40, 60])
+        client = APIClient()
+
+        client.force_authenticate(self.teacher('TCH001', 'subject_teacher'))
+        self.assertEqual(client.post(self.url, self.payload(), format='json').status_code, 403)
+
+        hod = self.teacher('TCH002', 'head_of_department')
+        client.force_authenticate(hod)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(self.url, self.payload(), format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['scores_moderated'], 2)
+
+        # Not a subject of their department
+        response = client.post(self.url, self.payload(subject_id=self.subjects[1].pk), format='json')
+        self.assertEqual(response.status_code, 403)
+
+        client.force_authenticate(self.head)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(self.url, self.payload(subject_id=self.subjects[1].pk), format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+
+class ResultStatisticsTests(ResultsTestCase):
+    """Subject averages are read from SubjectClassStatistics (user-008)"""
+
+    def test_subject_averages_weighted_across_terms(self):
+        from .summaries import refresh_subject_statistics
+
+        self.make_results([80, 60])
+        self.make_results([50], term=self.terms[1])
+        refresh_subject_statistics([self.cohort, (self.class_level.pk, self.session.pk, self.terms[1].pk)])
+
+        client = APIClient()
+        client.force_authenticate(self.head)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/results/statistics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if 'results_subjectscore' in query['sql']])
+
+        subject, = response.data['subject_statistics']
+        self.assertEqual(subject['subject__code'], self.subjects[0].code)
+        self.assertEqual(subject['total_students'], 3)
+        self.assertEqual(subject['avg_score'], round((80 + 60 + 50) / 3, 2))
+        self.assertEqual(subject['avg_ca'], 40)
+        self.assertEqual(subject['avg_exam'], round((40 + 20 + 10) / 3, 2))
+
+
+class BulkUploadTests(ResultsTestCase):
+    """Bulk upload writes chunks set-based and reports only offending rows (user-003)"""
+
+    def rows(self, totals):
+        return [
+            {
+                'student_registration_number': student.user.registration_number,
+                'subjects': [{'subject_code': self.subjects[0].code, 'ca_score': 40, 'exam_score': total - 40}],
+                'comments': {'class_teacher': 'Good', 'headmaster': 'Keep it up'}
+            }
+            for student, total in zip(self.students, totals)
+        ]
+
+    def upload(self, rows):
+        from .bulk import upload_results
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return upload_results(self.session, self.term, self.class_level, rows, self.head)
+
+    def test_upload_creates_and_ranks(self):
+        rows = self.rows([70, 90, 80])
+        rows[0]['subjects'].append({'subject_code': 'NOPE', 'ca_score': 10, 'exam_score': 10})
+        rows.append({'student_registration_number': 'MISSING'})
+
+        report = self.upload(rows)
+
+        self.assertEqual((report['created'], report['updated']), (3, 0))
+        self.assertEqual(report['errors'], [
+            {'student_registration': 'MISSING', 'error': 'Student not found'},
+            {
+                'student_registration': self.students[0].user.registration_number,
+                'subject': 'NOPE', 'error': 'Subject not found: NOPE'
+            },
+        ])
+        results = StudentResult.objects.filter(session=self.session, term=self.term).order_by('student_id')
+        self.assertEqual([result.position_in_class for result in results], [3, 1, 2])
+        self.assertEqual(self.upload(self.rows([70]))['updated'], 1)
+
+    def test_failed_chunk_reports_only_the_offending_row(self):
+        from unittest import mock
+        from . import bulk
+
+        apply_details = bulk._apply_result_details
+        offender = self.students[1]
+
+        def failing(result, result_data):
+            if result.student_id == offender.pk:
+                raise RuntimeError('Database error')
+            return apply_details(result, result_data)
+
+        with mock.patch.object(bulk, '_apply_result_details', side_effect=failing):
+            report = self.upload(self.rows([70, 90, 80]))
+
+        self.assertEqual(report['created'], 2)
+        self.assertEqual(report['errors'], [
+            {'student_registration': offender.user.registration_number, 'error': 'Database error'}
+        ])
+        self.assertEqual(
+            set(StudentResult.objects.values_list('student_id', flat=True)),
+            {self.students[0].pk, self.students[2].pk}
+        )
+
+
+class ScoreSheetImportTests(ResultsTestCase):
+    """CSV score sheets are validated before anything is written (user-004)"""
+
+    def import_sheet(self, lines):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from .bulk import import_score_sheet
+
+        content = '\n'.join(['admission_number,ca_score,exam_score', *lines]).encode()
+        with self.captureOnCommitCallbacks(execute=True):
+            return import_score_sheet(
+                SimpleUploadedFile('sheet.csv', content), self.session, self.term, self.class_level,
+                self.subjects[0], self.head
+            )
+
+    def test_rows_over_obtainable_create_no_result(self):
+        first, second = self.students[:2]
+        report = self.import_sheet([f'{first.admission_number},30,50', f'{second.admission_number},45,50'])
+
+        self.assertEqual(report['created'], 1)
+        self.assertEqual([error['row'] for error in report['errors']], [3])
+        results = StudentResult.objects.filter(session=self.session, term=self.term)
+        self.assertEqual(list(results.values_list('student_id', flat=True)), [first.pk])
+        self.assertEqual(results.get().number_of_pupils_in_class, 1)
+
+    def test_membership_follows_the_imported_term(self):
+        other_level = ClassLevel.objects.create(
+            program=self.class_level.program, level='primary_2', name='Primary 2', code='P2', order=2
+        )
+        # Promoted since, but enrolled in Primary 1 for the imported term
+        promoted, outsider = self.students[0], self.students[1]
+        promoted.class_level = other_level
+        promoted.save()
+        StudentEnrollment.objects.filter(student=outsider).delete()
+
+        report = self.import_sheet([f'{promoted.admission_number},30,50', f'{outsider.admission_number},30,50'])
+
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['errors'], [
+            {'row': 3, 'admission_number': outsider.admission_number, 'error': 'Student is not in Primary 1'}
+        ])
+        self.assertTrue(StudentResult.objects.filter(student=promoted, class_level=self.class_level).exists())
+
+
+class RankingTests(ResultsTestCase):
+    """Class positions with ties and unscored results (user-001)"""
+
+    def positions(self, results):
+        return [(result.position_in_class, result.number_of_pupils_in_class) for result in self.refreshed(results)]
+
+    def test_tie_handling_methods(self):
+        from .ranking import rank_cohort
+
+        results = self.make_results([80, 80, 70, None])
+        self.assertEqual(self.positions(results), [(1, 3), (1, 3), (3, 3), (None, 3)])
+
+        rank_cohort(*self.cohort, method='dense')
+        self.assertEqual(self.positions(results), [(1, 3), (1, 3), (2, 3), (None, 3)])
+
+        rank_cohort(*self.cohort, method='ordinal')
+        positions = self.positions(results)
+        self.assertEqual(sorted(position for position, _ in positions[:2]), [1, 2])
+        self.assertEqual(positions[2:], [(3, 3), (None, 3)])
+
+    def test_removing_the_last_score_unranks_a_result(self):
+        results = self.make_results([90, 60])
+        with self.captureOnCommitCallbacks(execute=True):
+            SubjectScore.objects.filter(result=results[0]).delete()
+        self.assertEqual(self.positions(results), [(None, 1), (1, 1)])
+
+
+class VersionConflictTests(ResultsTestCase):
+    """Edits of a stale copy are rejected (user-015)"""
+
+    def test_stale_score_save_conflicts(self):
+        from .concurrency import VersionConflict
+
+        result, = self.make_results([60])
+        score = SubjectScore.objects.get(result=result)
+        stale = SubjectScore.objects.get(pk=score.pk)
+
+        score.exam_score = 25
+        with self.captureOnCommitCallbacks(execute=True):
+            score.save()
+
+        stale.exam_score = 30
+        with self.assertRaises(VersionConflict) as raised:
+            stale.save()
+        self.assertEqual(raised.exception.conflicts[0]['current_version'], score.version)
+        self.assertEqual(SubjectScore.objects.get(pk=score.pk).exam_score, Decimal('25.00'))
+
+    def test_api_answers_stale_version_with_409(self):
+        result, = self.make_results([60])
+        version = StudentResult.objects.get(pk=result.pk).version
+        client = APIClient()
+        client.force_authenticate(self.head)
+        url = f'/api/results/results/{result.pk}/'
+
+        response = client.patch(url, {'class_teacher_comment': 'Good', 'version': version}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        response = client.patch(url, {'class_teacher_comment': 'Lost update', 'version': version}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(StudentResult.objects.get(pk=result.pk).class_teacher_comment, 'Good')
+
+    def test_approving_or_publishing_a_changed_result_conflicts(self):
+        result, = self.make_results([60])
+        reviewed = StudentResult.objects.get(pk=result.pk).version
+        client = APIClient()
+        client.force_authenticate(self.head)
+
+        # Someone edits the result after it was reviewed
+        response = client.patch(
+            f'/api/results/results/{result.pk}/', {'class_teacher_comment': 'Edited', 'version': reviewed},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+
+        for action in ['approve', 'publish']:
+            response = client.post(f'/api/results/results/{result.pk}/{action}/', {'version': reviewed}, format='json')
+            self.assertEqual(response.status_code, 409, action)
+        result.refresh_from_db()
+        self.assertFalse(result.is_published)
+        self.assertIsNone(result.headmaster_signature_date)
+
+
+class ArchiveTests(ResultsTestCase):
+    """Archived sessions round-trip through ArchivedResult (user-022)"""
+
+    def test_archive_and_restore_round_trip(self):
+        from .archive import archive_session, restore_session, archived_results
+        from .models import ArchivedResult
+
+        results = self.make_results([80, 60])
+        with self.captureOnCommitCallbacks(execute=True):
+            publish_results(StudentResult.objects.filter(pk__in=[result.pk for result in results]), self.head)
+        before = list(
+            StudentResult.objects.filter(session=self.session).order_by('pk')
+            .values('pk', 'overall_total_score', 'position_in_class', 'is_published', 'updated_at')
+        )
+        scores = list(SubjectScore.objects.order_by('pk').values('pk', 'result_id', 'total_score', 'grade'))
+
+        self.session.status = 'archived'
+        self.session.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archive_session(self.session.pk), {'students': 2, 'results': 2})
+
+        self.assertFalse(StudentResult.objects.filter(session=self.session).exists())
+        self.assertFalse(SubjectScore.objects.exists())
+        self.assertEqual(ArchivedResult.objects.count(), 2)
+        archived = archived_results([self.students[0].pk], published_only=True)[self.students[0].pk]
+        self.assertEqual([row['id'] for row in archived], [results[0].pk])
+
+        self.session.status = 'active'
+        self.session.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(restore_session(self.session.pk), {'students': 2, 'results': 2})
+
+        self.assertEqual(list(
+            StudentResult.objects.filter(session=self.session).order_by('pk')
+            .values('pk', 'overall_total_score', 'position_in_class', 'is_published', 'updated_at')
+        ), before)
+        self.assertEqual(list(SubjectScore.objects.order_by('pk').values('pk', 'result_id', 'total_score', 'grade')), scores)
+        self.assertEqual(PublishedResultSnapshot.objects.count(), 2)
+        self.assertFalse(ArchivedResult.objects.exists())
+
+
+class CompletenessTests(ResultsTestCase):
+    """Missing scores, results, attendance and comments block publishing when required (user-024)"""
+
+    def complete(self, results):
+        """Give results every subject score, attendance and both comments"""
+        for result in results:
+            for subject in self.subjects:
+                self.set_score(result, subject, 60)
+        StudentResult.objects.filter(pk__in=[result.pk for result in results]).update(
+            frequency_of_school_opened=100, no_of_times_present=95, no_of_times_absent=5,
+            class_teacher_comment='Good', headmaster_comment='Well done'
+        )
+
+    def test_report_finds_every_gap(self):
+        from .completeness import completeness_report
+
+        results = self.make_results([70, 60, 50])
+        self.complete(results[:1])
+
+        cohort, = completeness_report(self.session.pk, self.term.pk)
+        self.assertEqual(
+            {key: cohort[key] for key in [
+                'students', 'expected_scores', 'missing_scores', 'missing_results', 'missing_attendance',
+                'missing_class_teacher_comments', 'missing_headmaster_comments', 'students_with_gaps', 'is_complete'
+            ]},
+            {
+                'students': 4, 'expected_scores': 8, 'missing_scores': 4, 'missing_results': 1,
+                'missing_attendance': 2, 'missing_class_teacher_comments': 2, 'missing_headmaster_comments': 2,
+                'students_with_gaps': 3, 'is_complete': False
+            }
+        )
+        gaps = {gap['student_id']: gap for gap in cohort['gaps']}
+        self.assertNotIn(self.students[0].pk, gaps)
+        self.assertEqual(
+            [subject['code'] for subject in gaps[self.students[1].pk]['missing_subjects']], [self.subjects[1].code]
+        )
+        self.assertTrue(gaps[self.students[3].pk]['missing_result'])
+        self.assertEqual(len(gaps[self.students[3].pk]['missing_subjects']), 2)
+
+        # Withdrawn students are not expected to have a report card
+        StudentEnrollment.objects.filter(student__in=self.students[1:]).update(status='withdrawn')
+        cohort, = completeness_report(self.session.pk, self.term.pk)
+        self.assertTrue(cohort['is_complete'])
+
+    @override_settings(RESULTS_REQUIRE_COMPLETE=True)
+    def test_publishing_gate(self):
+        from .completeness import IncompleteResults
+
+        results = self.make_results([70, 60, 50, 40])
+        self.complete(results[:3])
+        cohort = [(self.class_level, self.session, self.term)]
+        scope = StudentResult.objects.filter(session=self.session, term=self.term)
+
+        with self.assertRaises(IncompleteResults) as raised:
+            publish_results(scope, self.head, cohort)
+        self.assertEqual(raised.exception.report[0]['students_with_gaps'], 1)
+        self.assertFalse(scope.filter(is_published=True).exists())
+
+        # Publishing only the complete results checks just those students
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(publish_results(scope.filter(pk__in=[result.pk for result in results[:3]]), self.head), 3)
+
+        client = APIClient()
+        client.force_authenticate(self.head)
+        payload = {'session_id': self.session.pk, 'term_id': self.term.pk, 'class_level_ids': [self.class_level.pk]}
+        response = client.post('/api/results/results/batch-publish/', payload, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['incomplete'][0]['class_level_id'], self.class_level.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/results/results/batch-publish/', {**payload, 'force': True}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['published_count'], 1)
+
+
+class ExportTests(ResultsTestCase):
+    """Broadsheet and session export row shapes (user-007, user-017)"""
+
+    def setUp(self):
+        super().setUp()
+        self.results = self.make_results([70, 90, None])
+        self.set_score(self.results[1], self.subjects[1], 50)
+
+    def test_broadsheet_json_rows(self):
+        from .exports import broadsheet_json
+
+        sheet = broadsheet_json(self.class_level, self.session, self.term)
+
+        self.assertEqual([subject['code'] for subject in sheet['subjects']], ['SUB0', 'SUB1'])
+        self.assertEqual(sheet['subjects'][0]['highest_score'], '90.00')
+        self.assertEqual(sheet['subjects'][0]['lowest_score'], '70.00')
+        top, second, unscored = sheet['students']
+        self.assertEqual(
+            [top['result_id'], second['result_id'], unscored['result_id']],
+            [self.results[1].pk, self.results[0].pk, self.results[2].pk]
+        )
+        self.assertEqual((top['position'], top['pupils'], top['total']), (1, 2, '140.00'))
+        score = top['scores'][self.subjects[0].pk]
+        self.assertEqual(
+            (score['ca'], score['exam'], score['total'], score['position']), ('40.00', '50.00', '90.00', 1)
+        )
+        self.assertEqual(list(second['scores']), [self.subjects[0].pk])
+        self.assertEqual(second['scores'][self.subjects[0].pk]['position'], 2)
+        self.assertEqual((unscored['position'], unscored['scores']), (None, {}))
+        self.assertEqual(unscored['admission_number'], self.students[2].admission_number)
+
+    def test_broadsheet_csv_rows(self):
+        import csv
+        from .exports import iter_broadsheet_csv
+
+        rows = list(csv.reader(''.join(iter_broadsheet_csv(self.class_level, self.session, self.term)).splitlines()))
+
+        header, *students, average, highest, lowest = rows
+        self.assertEqual(
+            header[:7], ['Position', 'Admission No', 'Student', 'SUB0 CA', 'SUB0 Exam', 'SUB0 Total', 'SUB0 Pos']
+        )
+        self.assertEqual(header[-5:], ['Total', 'Average', 'Percentage', 'Grade', 'Out Of'])
+        self.assertEqual(len(students), 3)
+        self.assertTrue(all(len(row) == len(header) for row in students))
+        self.assertEqual(
+            students[1][:7], ['2', self.students[0].admission_number, 'Student0 Test', '40.00', '30.00', '70.00', '2']
+        )
+        # A student without SUB1 gets blank cells, not a shifted row
+        self.assertEqual(students[1][7:11], ['', '', '', ''])
+        self.assertEqual(students[2][0], '')
+        self.assertEqual([average[2], highest[2], lowest[2]], ['Class Average', 'Highest', 'Lowest'])
+        self.assertEqual(highest[5], '90.00')
+
+    def test_session_export_rows(self):
+        import csv
+        import json
+        from .exports import iter_session_ndjson, iter_session_csv, SESSION_EXPORT_RESULT_FIELDS
+
+        results = StudentResult.objects.filter(session=self.session)
+        records = [json.loads(line) for line in iter_session_ndjson(results)]
+
+        self.assertEqual([record['result_id'] for record in records], sorted(result.pk for result in self.results))
+        by_result = {record['result_id']: record for record in records}
+        self.assertEqual(
+            [score['subject_code'] for score in by_result[self.results[1].pk]['scores']], ['SUB0', 'SUB1']
+        )
+        self.assertEqual(by_result[self.results[1].pk]['overall_total_score'], '140.00')
+        self.assertEqual(by_result[self.results[2].pk]['scores'], [])
+
+        header, *rows = csv.reader(''.join(iter_session_csv(results)).splitlines())
+        self.assertEqual(header[0], 'result_id')
+        # One row per score, plus one for the result without scores
+        self.assertEqual(len(rows), 4)
+        width = len(SESSION_EXPORT_RESULT_FIELDS)
+        unscored = [row for row in rows if row[0] == str(self.results[2].pk)]
+        self.assertEqual(len(unscored), 1)
+        self.assertTrue(all(value == '' for value in unscored[0][width:]))
+
+
+class ReportCardTests(ResultsTestCase):
+    """Cached report cards are keyed by a hash of everything printed on them (user-005)"""
+
+    def setUp(self):
+        super().setUp()
+        self.use_temporary_report_cache()
+
+    def test_version_follows_card_content(self):
+        from .reports import report_card_version, report_card_versions
+
+        first, second = self.make_results([80, 60])
+        version = report_card_version(first.pk)
+        self.assertEqual(report_card_version(first.pk), version)
+        self.assertEqual(report_card_versions(StudentResult.objects.filter(pk=first.pk)), {first.pk: version})
+
+        versions = [version]
+
+        # A classmate overtakes: only the position printed on this card changes
+        self.set_score(second, self.subjects[0], 90)
+        versions.append(report_card_version(first.pk))
+
+        self.set_score(first, self.subjects[1], 30)
+        versions.append(report_card_version(first.pk))
+
+        skills = StudentResult.objects.get(pk=first.pk).psychomotor_skills
+        skills.handwriting = 5
+        skills.save()
+        versions.append(report_card_version(first.pk))
+
+        result = StudentResult.objects.get(pk=first.pk)
+        result.class_teacher_comment = 'Keep it up'
+        with self.captureOnCommitCallbacks(execute=True):
+            result.save()
+        versions.append(report_card_version(first.pk))
+
+        self.assertEqual(len(set(versions)), len(versions))
+
+    def test_cached_card_is_reused_until_it_changes(self):
+        from .reports import get_report_card
+
+        result, = self.make_results([75])
+        path, version = get_report_card(result.pk)
+        self.assertTrue(path.read_bytes().startswith(b'%PDF'))
+        self.assertEqual(get_report_card(result.pk), (path, version))
+
+        self.set_score(result, self.subjects[1], 50)
+        new_path, new_version = get_report_card(result.pk)
+        self.assertNotEqual(new_version, version)
+        self.assertTrue(new_path.exists())
+        self.assertFalse(path.exists())
+
+
+@override_settings(RESULTS_REPORT_WORKERS=1)
+class ReportBookTests(ResultsTestCase):
+    """Report books zip every card of a cohort and reuse unchanged archives (user-006)"""
+
+    def run_book(self, publishing):
+        from .models import ReportBookJob
+        from .reportbook import run_report_book
+
+        job = ReportBookJob.objects.create(publishing=publishing, requested_by=self.head)
+        run_report_book(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed', job.error)
+        return job
+
+    def test_book_zips_every_card_and_reuses_the_archive(self):
+        import zipfile
+        from pathlib import Path
+        from .models import ResultPublishing
+
+        cache_dir = Path(self.use_temporary_report_cache())
+        results = self.make_results([90, 80, None])
+        publishing = ResultPublishing.objects.create(
+            session=self.session, term=self.term, class_level=self.class_level
+        )
+
+        job = self.run_book(publishing)
+        self.assertEqual((job.total_cards, job.completed_cards, job.reused_cards), (3, 3, 0))
+        with zipfile.ZipFile(cache_dir / job.archive_path) as book:
+            names = book.namelist()
+        self.assertEqual(len(names), 3)
+        self.assertTrue(all(name.startswith('Primary_1/') and name.endswith('.pdf') for name in names))
+        self.assertIn(f'Primary_1/{self.students[0].admission_number}_Test_Student0.pdf', names)
+
+        again = self.run_book(publishing)
+        self.assertEqual((again.archive_path, again.reused_cards), (job.archive_path, 3))
+
+        # A changed score means a new book; the old archive is removed
+        self.set_score(results[2], self.subjects[0], 70)
+        changed = self.run_book(publishing)
+        self.assertNotEqual(changed.book_version, job.book_version)
+        self.assertTrue((cache_dir / changed.archive_path).exists())
+        self.assertFalse((cache_dir / job.archive_path).exists())
+
+
+class SubjectStatisticsTests(ResultsTestCase):
+    """Per-subject class statistics and subject positions follow score changes (user-010)"""
+
+    def statistics(self):
+        from .summaries import subject_statistics_for
+
+        return {key[-1]: stat for key, stat in subject_statistics_for([self.cohort]).items()}
+
+    def test_statistics_and_positions_follow_scores(self):
+        results = self.make_results([90, 70, None])
+        unscored = self.set_score(results[2], self.subjects[0], 0)
+
+        stat = self.statistics()[self.subjects[0].pk]
+        self.assertEqual(
+            (stat.student_count, stat.class_average, stat.highest_score, stat.lowest_score),
+            (2, Decimal('80.00'), Decimal('90.00'), Decimal('70.00'))
+        )
+        self.assertEqual((stat.average_ca_score, stat.average_exam_score), (Decimal('40.00'), Decimal('40.00')))
+        positions = SubjectScore.objects.filter(subject=self.subjects[0]).order_by('result__student_id')
+        self.assertEqual([score.position_in_subject for score in positions], [1, 2, None])
+
+        # Zero scores don't count; once scored they are ranked and averaged
+        self.set_score(results[2], self.subjects[0], 100)
+        stat = self.statistics()[self.subjects[0].pk]
+        self.assertEqual((stat.student_count, stat.highest_score), (3, Decimal('100.00')))
+        unscored.refresh_from_db()
+        self.assertEqual(unscored.position_in_subject, 1)
+
+    def test_subject_without_scores_loses_its_row(self):
+        result, = self.make_results([60])
+        score = self.set_score(result, self.subjects[1], 50)
+        self.assertEqual(set(self.statistics()), {self.subjects[0].pk, self.subjects[1].pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            score.delete()
+        self.assertEqual(set(self.statistics()), {self.subjects[0].pk})
+
+
+class AssessmentGridTests(ResultsTestCase):
+    """Psychomotor and affective ratings of a whole cohort are read and saved at once (user-013)"""
+
+    def test_grid_saves_ratings_in_bulk(self):
+        from .bulk import assessment_grid, save_assessment_grid
+
+        results = self.make_results([80, 60])
+        other_term, = self.make_results([50], term=self.terms[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            publish_results(StudentResult.objects.filter(pk=results[0].pk), self.head)
+
+        grid = assessment_grid(self.class_level, self.session, self.term)
+        self.assertEqual([row['result_id'] for row in grid], [result.pk for result in results])
+        self.assertEqual(grid[0]['psychomotor']['handwriting'], 3)
+        before = grid[0]['psychomotor']['overall_psychomotor_rating']
+
+        updated, errors = save_assessment_grid(self.class_level, self.session, self.term, [
+            {'result_id': results[0].pk, 'psychomotor': {'handwriting': 5, 'sports': 5}},
+            {'result_id': results[1].pk, 'affective': {'honesty': 1}},
+            {'result_id': other_term.pk, 'affective': {'honesty': 5}},
+        ])
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(list(errors), [other_term.pk])
+        grid = {row['result_id']: row for row in assessment_grid(self.class_level, self.session, self.term)}
+        self.assertEqual(grid[results[0].pk]['psychomotor']['handwriting'], 5)
+        self.assertGreater(grid[results[0].pk]['psychomotor']['overall_psychomotor_rating'], before)
+        self.assertEqual(grid[results[1].pk]['affective']['honesty'], 1)
+        self.assertEqual(grid[results[1].pk]['psychomotor']['handwriting'], 3)
+        self.assertEqual(StudentResult.objects.get(pk=other_term.pk).affective_domains.honesty, 3)
+
+        # The published result's snapshot carries the new ratings
+        data = PublishedResultSnapshot.objects.get(result_id=results[0].pk).data
+        self.assertEqual(data['psychomotor_skills']['handwriting'], 5)
+
+
+class ScoreGridTests(ResultsTestCase):
+    """A subject column is saved for the whole class at once (user-014)"""
+
+    def save(self, rows):
+        from .bulk import save_score_grid
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return save_score_grid(self.class_level, self.session, self.term, self.subjects[0], rows, self.head)
+
+    def test_grid_creates_results_and_ranks_once(self):
+        from .bulk import score_grid
+
+        result, = self.make_results([55])
+        grid = score_grid(self.class_level, self.session, self.term, self.subjects[0])
+        self.assertEqual([row['student_id'] for row in grid], [student.pk for student in self.students])
+        self.assertEqual([row['result_id'] for row in grid], [result.pk, None, None, None])
+        self.assertEqual(grid[0]['total_score'], Decimal('55.00'))
+
+        outsider = User.objects.create_user(
+            first_name='Other', last_name='Class', role='student', registration_number='OUT001'
+        ).student_profile
+        report = self.save([
+            {'student_id': self.students[0].pk, 'ca_score': 30, 'exam_score': 30, 'version': grid[0]['version']},
+            {'student_id': self.students[1].pk, 'ca_score': 40, 'exam_score': 50},
+            {'student_id': self.students[2].pk, 'ca_score': 45, 'exam_score': 10},
+            {'student_id': outsider.pk, 'ca_score': 10, 'exam_score': 10},
+        ])
+
+        self.assertEqual((report['created'], report['updated']), (1, 1))
+        self.assertEqual(set(report['errors']), {self.students[2].pk, outsider.pk})
+        grid = score_grid(self.class_level, self.session, self.term, self.subjects[0])
+        self.assertEqual([row['total_score'] for row in grid[:2]], [Decimal('60.00'), Decimal('90.00')])
+        self.assertEqual([row['position_in_subject'] for row in grid[:2]], [2, 1])
+        self.assertEqual(
+            StudentResult.objects.get(student=self.students[1], term=self.term).position_in_class, 1
+        )
+
+    def test_stale_grid_saves_nothing(self):
+        from .bulk import score_grid
+        from .concurrency import VersionConflict
+
+        self.make_results([55, 65])
+        loaded = score_grid(self.class_level, self.session, self.term, self.subjects[0])
+        self.save([{'student_id': self.students[1].pk, 'ca_score': 20, 'version': loaded[1]['version']}])
+
+        with self.assertRaises(VersionConflict) as raised:
+            self.save([
+                {'student_id': self.students[0].pk, 'ca_score': 10, 'version': loaded[0]['version']},
+                {'student_id': self.students[1].pk, 'ca_score': 10, 'version': loaded[1]['version']},
+            ])
+        self.assertEqual([conflict['student_id'] for conflict in raised.exception.conflicts], [self.students[1].pk])
+        grid = score_grid(self.class_level, self.session, self.term, self.subjects[0])
+        self.assertEqual([row['ca_score'] for row in grid[:2]], [Decimal('40.00'), Decimal('20.00')])
+
+
+class BatchActionTests(ResultsTestCase):
+    """Selected results or whole cohorts are approved and published in one update (user-016)"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.head)
+
+    def post(self, action, payload):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f'/api/results/results/{action}/', payload, format='json')
+
+    def test_batch_approve_and_publish(self):
+        from .models import ResultPublishing
+
+        results = self.make_results([80, 70, 60])
+        versions = [result.version for result in self.refreshed(results)]
+
+        response = self.post('batch-approve', {'result_ids': [results[0].pk, results[1].pk]})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['approved_count'], 2)
+        approved = self.refreshed(results)
+        self.assertEqual([result.headmaster_id for result in approved], [self.head.pk, self.head.pk, None])
+        self.assertEqual(
+            [result.version for result in approved], [versions[0] + 1, versions[1] + 1, versions[2]]
+        )
+
+        cohort = {'session_id': self.session.pk, 'term_id': self.term.pk, 'class_level_ids': [self.class_level.pk]}
+        response = self.post('batch-publish', cohort)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['published_count'], response.data['class_levels']), (3, 1))
+        self.assertTrue(all(result.is_published for result in self.refreshed(results)))
+        self.assertEqual(PublishedResultSnapshot.objects.filter(result__in=results).count(), 3)
+        self.assertTrue(ResultPublishing.objects.get(
+            session=self.session, term=self.term, class_level=self.class_level
+        ).is_published)
+
+        # Already published results are not counted again
+        self.assertEqual(self.post('batch-publish', cohort).data['published_count'], 0)
+
+        # Approving published results rewrites their snapshots with the signature
+        self.post('batch-approve', {'result_ids': [results[2].pk]})
+        data = PublishedResultSnapshot.objects.get(result_id=results[2].pk).data
+        self.assertEqual(data['headmaster']['id'], self.head.pk)
+
+    def test_batch_actions_need_a_scope_and_a_role(self):
+        self.make_results([80])
+        self.assertEqual(self.post('batch-publish', {'session_id': self.session.pk}).status_code, 400)
+
+        self.client.force_authenticate(self.students[0].user)
+        response = self.post('batch-publish', {'result_ids': [1]})
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,337 @@
+"""
+Student Transcripts
+Multi-session transcripts for graduating and transferring students: every
+published result and subject score of a set of students is read in two
+queries, grouped per session and term, and rendered with reportlab. Batches
+render in parallel across a process pool and are cached on disk by content.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.core.serializers.json import DjangoJSONEncoder
+from io import BytesIO
+from itertools import groupby
+from pathlib import Path
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, KeepTogether
+
+from .reports import TABLE_STYLE, INFO_STYLE, get_cache_dir, school_details, write_atomic
+from .reportbook import get_worker_count, _slug
+
+logger = logging.getLogger(__name__)
+
+# Bump when the transcript layout changes so cached PDFs are re-rendered
+TRANSCRIPT_LAYOUT_VERSION = 1
+
+# Terms printed as columns, in order
+TRANSCRIPT_TERMS = ['first', 'second', 'third']
+
+
+def _decimal(value):
+    return None if value is None else str(value)
+
+
+def _archived_rows(student_ids, published_only, scores):
+    """
+    Archived results in the row layout of load_transcripts; their subject
+    scores are added to `scores`
+    """
+    from .archive import archived_results
+
+    for student_id, rows in archived_results(student_ids, published_only).items():
+        for result in rows:
+            student = result['student'] or {}
+            session = result['session'] or {}
+            term = result['term'] or {}
+            yield (
+                result['id'], student_id, student.get('admission_number'), student.get('first_name'),
+                student.get('last_name'), session.get('name'), term.get('term'),
+                (result['class_level'] or {}).get('name'), result['overall_total_score'],
+                result['percentage'], result['overall_grade'], result['position_in_class'],
+                result['number_of_pupils_in_class'], result['annual_average'], result['annual_position'],
+                session.get('start_date'), term.get('start_date')
+            )
+            scores[result['id']] = sorted(
+                (
+                    (score['subject']['code'], score['subject']['name'], score['total_score'], score['grade'])
+                    for score in result['subject_scores'] or []
+                ),
+                key=lambda score: score[1] or ''
+            )
+
+
+def load_transcripts(student_ids, published_only=True, result_ids=None):
+    """
+    Transcript data for each student with at least one result, keyed by
+    student id. One query reads the results (with student, session, term and
+    class), one the subject scores of those results and one the ArchivedResult
+    documents of archived sessions. `result_ids` limits the results used.
+    """
+    from .models import StudentResult, SubjectScore
+
+    student_ids = list(student_ids)
+    results = StudentResult.objects.filter(student_id__in=student_ids)
+    if published_only:
+        results = results.filter(is_published=True)
+    if result_ids is not None:
+        results = results.filter(pk__in=list(result_ids))
+
+    result_rows = results.order_by(
+        'student_id', 'session__start_date', 'term__start_date', 'id'
+    ).values_list(
+        'id', 'student_id', 'student__admission_number', 'student__user__first_name',
+        'student__user__last_name', 'session__name', 'term__term', 'class_level__name',
+        'overall_total_score', 'percentage', 'overall_grade', 'position_in_class',
+        'number_of_pupils_in_class', 'annual_average', 'annual_position',
+        'session__start_date', 'term__start_date'
+    )
+
+    scores = {}
+    for result_id, code, name, total, grade in SubjectScore.objects.filter(
+        result__in=results.order_by().values('id')
+    ).order_by('subject__name').values_list(
+        'result_id', 'subject__code', 'subject__name', 'total_score', 'grade'
+    ):
+        scores.setdefault(result_id, []).append((code, name, total, grade))
+
+    archived = list(_archived_rows(student_ids, published_only, scores))
+    if result_ids is not None:
+        archived = [row for row in archived if row[0] in result_ids]
+    if archived:
+        result_rows = sorted(
+            [*archived, *result_rows], key=lambda row: (row[1], str(row[15]), str(row[16]), row[0])
+        )
+
+    transcripts = {}
+    for student_id, student_rows in groupby(result_rows, key=lambda row: row[1]):
+        sessions = []
+        for session_name, session_rows in groupby(student_rows, key=lambda row: row[5]):
+            session_rows = list(session_rows)
+            subjects = {}
+            terms = {}
+            for row in session_rows:
+                terms[row[6]] = {
+                    'class_level': row[7],
+                    'total_score': _decimal(row[8]),
+                    'percentage': _decimal(row[9]),
+                    'grade': row[10],
+                    'position': row[11],
+                    'pupils': row[12]
+                }
+                for code, name, total, grade in scores.get(row[0], []):
+                    subject = subjects.setdefault(code, {'code': code, 'name': name, 'terms': {}})
+                    subject['terms'][row[6]] = {'total': _decimal(total), 'grade': grade}
+
+            last = session_rows[-1]
+            sessions.append({
+                'session': session_name,
+                'class_level': last[7],
+                'terms': terms,
+                'subjects': sorted(subjects.values(), key=lambda subject: subject['name'] or ''),
+                'annual_average': _decimal(last[13]),
+                'annual_position': last[14]
+            })
+
+        first = session_rows[0]
+        transcripts[student_id] = {
+            'student_id': student_id,
+            'admission_number': first[2],
+            'student_name': f"{first[3] or ''} {first[4] or ''}".strip(),
+            'sessions': sessions
+        }
+    return transcripts
+
+
+def transcript_version(data):
+    """Content hash of a transcript - its cached PDF is reused while this holds"""
+    key = json.dumps([TRANSCRIPT_LAYOUT_VERSION, school_details(), data], cls=DjangoJSONEncoder, sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def transcript_path(student_id, version):
+    return get_cache_dir() / 'transcripts' / f"{student_id}-{version}.pdf"
+
+
+def render_transcript(data, school):
+    """Render transcript data to PDF bytes"""
+    styles = getSampleStyleSheet()
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=A4,
+        leftMargin=15 * mm, rightMargin=15 * mm, topMargin=12 * mm, bottomMargin=12 * mm,
+        title=f"Transcript - {data['student_name']}"
+    )
+    story = []
+
+    # Header
+    story.append(Paragraph(escape(school['name']), styles['Title']))
+    if school['address']:
+        story.append(Paragraph(escape(school['address']), styles['Normal']))
+    story.append(Paragraph('Academic Transcript', styles['Heading2']))
+    story.append(Table([
+        ['Name', data['student_name'], 'Admission No.', data['admission_number']],
+        ['Sessions', len(data['sessions']), '', ''],
+    ], colWidths=[25 * mm, 65 * mm, 30 * mm, 60 * mm], style=INFO_STYLE))
+    story.append(Spacer(1, 5 * mm))
+
+    if not data['sessions']:
+        story.append(Paragraph('No published results recorded', styles['BodyText']))
+
+    for session in data['sessions']:
+        block = [Paragraph(
+            f"{escape(session['session'])} - {escape(session['class_level'] or '')}", styles['Heading3']
+        )]
+
+        rows = [['Subject'] + [f"{term.title()} Term" for term in TRANSCRIPT_TERMS for _ in (0, 1)]]
+        rows.append([''] + ['Total', 'Grade'] * len(TRANSCRIPT_TERMS))
+        for subject in session['subjects']:
+            row = [Paragraph(escape(subject['name'] or subject['code'] or ''), styles['BodyText'])]
+            for term in TRANSCRIPT_TERMS:
+                score = subject['terms'].get(term)
+                row += [score['total'], score['grade']] if score else ['-', '-']
+            rows.append(row)
+
+        percentage = ['Percentage']
+        position = ['Position']
+        for term in TRANSCRIPT_TERMS:
+            summary = session['terms'].get(term)
+            percentage += [f"{summary['percentage']}%", summary['grade'] or '-'] if summary else ['-', '-']
+            position += (
+                [summary['position'] or '-', f"of {summary['pupils']}" if summary['pupils'] else '']
+                if summary else ['-', '']
+            )
+        rows += [percentage, position]
+
+        table = Table(
+            rows,
+            colWidths=[54 * mm] + [21 * mm] * (2 * len(TRANSCRIPT_TERMS)),
+            repeatRows=2, style=TABLE_STYLE
+        )
+        table.setStyle([
+            ('SPAN', (0, 0), (0, 1)),
+            *[('SPAN', (1 + 2 * i, 0), (2 + 2 * i, 0)) for i in range(len(TRANSCRIPT_TERMS))],
+            ('FONTNAME', (0, -2), (-1, -1), 'Helvetica-Bold'),
+        ])
+        block.append(table)
+        if session['annual_average']:
+            block.append(Paragraph(
+                f"<b>Cumulative Average:</b> {session['annual_average']}% &nbsp; "
+                f"<b>Cumulative Position:</b> {session['annual_position'] or '-'}",
+                styles['BodyText']
+            ))
+        block.append(Spacer(1, 5 * mm))
+        story.append(KeepTogether(block))
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def write_transcript(data, school, path):
+    """Render a transcript straight to its cache file (process pool entry point)"""
+    content = render_transcript(data, school)
+    write_atomic(Path(path), content)
+    return len(content)
+
+
+def _remove_stale(student_id, keep):
+    for stale in (get_cache_dir() / 'transcripts').glob(f"{student_id}-*.pdf"):
+        if stale != keep:
+            stale.unlink(missing_ok=True)
+
+
+def get_transcript(student_id, published_only=True, result_ids=None):
+    """
+    Return (path, version) of a student's transcript PDF, rendering it first
+    unless an identical one is cached. None if the student has no results.
+    `result_ids` limits the transcript to those results.
+    """
+    data = load_transcripts([student_id], published_only, result_ids).get(student_id)
+    if data is None:
+        return None
+
+    version = transcript_version(data)
+    path = transcript_path(student_id, version)
+    if not path.exists():
+        write_transcript(data, school_details(), path)
+        # A partial transcript leaves the student's full one in place
+        if result_ids is None:
+            _remove_stale(student_id, keep=path)
+        logger.info(f"Rendered transcript for student {student_id}")
+    return path, version
+
+
+def render_transcripts(student_ids, published_only=True, workers=None):
+    """
+    Render (or reuse) the transcripts of many students, in parallel across a
+    process pool. Data is loaded in the parent in two queries; workers only
+    run reportlab. Returns {student_id: path} for students with results.
+    """
+    transcripts = load_transcripts(student_ids, published_only)
+    school = school_details()
+
+    paths = {}
+    jobs = []
+    for student_id, data in transcripts.items():
+        path = transcript_path(student_id, transcript_version(data))
+        paths[student_id] = path
+        if not path.exists():
+            jobs.append((data, str(path), student_id))
+
+    workers = min(workers or get_worker_count(), len(jobs))
+    if workers <= 1:
+        for data, path, student_id in jobs:
+            write_transcript(data, school, path)
+            _remove_stale(student_id, keep=Path(path))
+    else:
+        # spawn, not fork: the parent may be a threaded web worker holding DB connections
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = {
+                pool.submit(write_transcript, data, school, path): student_id
+                for data, path, student_id in jobs
+            }
+            for future in as_completed(futures):
+                future.result()
+                student_id = futures[future]
+                _remove_stale(student_id, keep=paths[student_id])
+
+    logger.info(f"Transcripts: {len(paths)} students, {len(jobs)} rendered, {len(paths) - len(jobs)} from cache")
+    return paths
+
+
+def write_transcript_book(student_ids, destination, published_only=True, workers=None):
+    """
+    Render the transcripts of many students and zip them into `destination`,
+    named by admission number. Returns the number of transcripts archived.
+    """
+    from students.models import Student
+
+    paths = render_transcripts(student_ids, published_only, workers)
+    names = Student.objects.filter(pk__in=list(paths)).order_by(
+        'user__last_name', 'user__first_name'
+    ).values_list('id', 'admission_number', 'user__first_name', 'user__last_name')
+
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=destination.parent, suffix='.tmp')
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED) as book:
+            for student_id, admission_number, first_name, last_name in names:
+                book.write(
+                    paths[student_id],
+                    f"{_slug(admission_number)}_{_slug(last_name)}_{_slug(first_name)}.pdf"
+                )
+        os.replace(tmp_path, destination)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return len(paths)
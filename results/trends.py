@@ -0,0 +1,167 @@
+"""
+Student Performance Trends
+A student's percentage, position and per-subject totals across every term
+and session, read with one query and cached per student. Recomputes and
+publishing drop the cached series of the students they touch, so the cache
+must be shared by every worker (see CACHES in settings).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from itertools import groupby
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def get_trend_timeout():
+    """Seconds a student's trend stays cached (RESULTS_TREND_CACHE_TIMEOUT)"""
+    return getattr(settings, 'RESULTS_TREND_CACHE_TIMEOUT', 60 * 60)
+
+
+def _cache_key(student_id, published_only):
+    return f"results:trend:{student_id}:{'published' if published_only else 'all'}"
+
+
+def _decimal(value):
+    return None if value is None else str(value)
+
+
+def _archived_rows(student_id, published_only):
+    """Archived results of a student in the row layout of build_student_trend"""
+    from .archive import archived_results
+
+    for result in archived_results([student_id], published_only).get(student_id, []):
+        term = result['term'] or {}
+        row = (
+            result['id'], (result['session'] or {}).get('name'), term.get('term'), term.get('name'),
+            (result['class_level'] or {}).get('name'), result['percentage'], result['average_score'],
+            result['overall_total_score'], result['overall_grade'], result['position_in_class'],
+            result['number_of_pupils_in_class'], result['is_published']
+        )
+        sort_key = (str((result['session'] or {}).get('start_date')), str(term.get('start_date')))
+        for score in result['subject_scores'] or [None]:
+            subject = (score or {}).get('subject') or {}
+            yield row + (subject.get('code'), subject.get('name'), (score or {}).get('total_score')) + sort_key
+
+
+def build_student_trend(student_id, published_only=False):
+    """
+    Compact time series for one student: a list of terms in chronological
+    order, and per subject a list of totals aligned with it (None where the
+    subject wasn't taken). Results are LEFT JOINed to their scores in one
+    query; archived sessions are read from their ArchivedResult documents.
+    """
+    from .models import StudentResult
+
+    results = StudentResult.objects.filter(student_id=student_id)
+    if published_only:
+        results = results.filter(is_published=True)
+
+    rows = results.order_by(
+        'session__start_date', 'term__start_date', 'id', 'subject_scores__subject__code'
+    ).values_list(
+        'id', 'session__name', 'term__term', 'term__name', 'class_level__name',
+        'percentage', 'average_score', 'overall_total_score', 'overall_grade',
+        'position_in_class', 'number_of_pupils_in_class', 'is_published',
+        'subject_scores__subject__code', 'subject_scores__subject__name',
+        'subject_scores__total_score', 'session__start_date', 'term__start_date'
+    )
+    archived = list(_archived_rows(student_id, published_only))
+    if archived:
+        # Stable sort: each result's score rows stay together and in order
+        rows = sorted(
+            [*archived, *rows], key=lambda row: (str(row[15]), str(row[16]), row[0])
+        )
+
+    terms = []
+    subjects = {}
+    for index, (result_id, group) in enumerate(groupby(rows, key=lambda row: row[0])):
+        for row in group:
+            if row[12] is not None:
+                subject = subjects.setdefault(row[12], {'name': row[13], 'totals': {}})
+                subject['totals'][index] = _decimal(row[14])
+        terms.append({
+            'result_id': result_id,
+            'session': row[1],
+            'term': row[2],
+            'term_name': row[3],
+            'class_level': row[4],
+            'percentage': _decimal(row[5]),
+            'average_score': _decimal(row[6]),
+            'total_score': _decimal(row[7]),
+            'grade': row[8],
+            'position': row[9],
+            'pupils': row[10],
+            'is_published': row[11]
+        })
+
+    return {
+        'student_id': student_id,
+        'terms': terms,
+        'subjects': {
+            code: {
+                'name': subject['name'],
+                'totals': [subject['totals'].get(index) for index in range(len(terms))]
+            }
+            for code, subject in sorted(subjects.items())
+        }
+    }
+
+
+def get_student_trend(student_id, published_only=False):
+    """A student's trend from the cache, or built with one query and cached"""
+    key = _cache_key(student_id, published_only)
+    trend = cache.get(key)
+    if trend is None:
+        trend = build_student_trend(student_id, published_only)
+        cache.set(key, trend, timeout=get_trend_timeout())
+    return trend
+
+
+def restrict_trend(trend, result_ids):
+    """
+    A trend cut down to the terms of `result_ids` (what a teacher may see);
+    subjects with no total left are dropped
+    """
+    kept = [index for index, term in enumerate(trend['terms']) if term['result_id'] in result_ids]
+    subjects = {}
+    for code, subject in trend['subjects'].items():
+        totals = [subject['totals'][index] for index in kept]
+        if any(total is not None for total in totals):
+            subjects[code] = {'name': subject['name'], 'totals': totals}
+    return {
+        'student_id': trend['student_id'],
+        'terms': [trend['terms'][index] for index in kept],
+        'subjects': subjects
+    }
+
+
+def forget_trends(student_ids):
+    """Drop the cached trends (both variants) of these students"""
+    keys = [
+        _cache_key(student_id, published_only)
+        for student_id in set(student_ids)
+        for published_only in (True, False)
+    ]
+    if keys:
+        cache.delete_many(keys)
+        # A read racing the write may have re-cached the old series
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def forget_cohort_trends(cohorts):
+    """
+    Drop the cached trends of every student in these (class_level_id,
+    session_id, term_id) cohorts - a re-rank moves positions of the whole class
+    """
+    from .models import StudentResult
+    from .summaries import _cohort_filter
+
+    cohorts = list(cohorts)
+    if not cohorts:
+        return
+    forget_trends(
+        StudentResult.objects.filter(_cohort_filter(cohorts)).order_by()
+        .values_list('student_id', flat=True).distinct()
+    )
@@ -19,10 +19,22 @@ urlpatterns = [
     
     # Custom Actions
     path('results/by-student/', views.StudentResultViewSet.as_view({'get': 'by_student'}), name='by-student'),
-    path('results/by-class/', views.StudentResultViewSet.as_view({'get': 'by_class'}), name='by-class'),
+    path('results/trend/', views.StudentResultViewSet.as_view({'get': 'trend'}), name='student-trend'),
+    path('results/transcript/', views.StudentResultViewSet.as_view({'get': 'transcript'}), name='student-transcript'),
+    path('results/by-class/', views.StudentResultViewSet.as_view({'get': 'by_class_level'}), name='by-class'),
+    path('results/compute-annual/', views.StudentResultViewSet.as_view({'post': 'compute_annual'}), name='compute-annual'),
+    path('results/regrade/', views.StudentResultViewSet.as_view({'post': 'regrade'}), name='regrade-results'),
+    path('results/broadsheet/', views.StudentResultViewSet.as_view({'get': 'broadsheet'}), name='broadsheet'),
+    path('results/export/', views.StudentResultViewSet.as_view({'get': 'export_session'}), name='export-results'),
+    path('results/score-grid/', views.StudentResultViewSet.as_view({'get': 'score_grid', 'put': 'score_grid'}), name='score-grid'),
+    path('results/assessment-grid/', views.StudentResultViewSet.as_view({'get': 'assessment_grid', 'put': 'assessment_grid'}), name='assessment-grid'),
+    path('results/batch-approve/', views.StudentResultViewSet.as_view({'post': 'batch_approve'}), name='batch-approve'),
+    path('results/batch-publish/', views.StudentResultViewSet.as_view({'post': 'batch_publish'}), name='batch-publish'),
     path('results/my-results/', views.StudentResultViewSet.as_view({'get': 'student_self_results'}), name='my-results'),
     path('results/search/', views.StudentResultViewSet.as_view({'get': 'search'}), name='search-results'),
     path('results/bulk-upload/', views.StudentResultViewSet.as_view({'post': 'bulk_upload'}), name='bulk-upload'),
+    path('results/import-score-sheet/', views.StudentResultViewSet.as_view({'post': 'import_score_sheet'}), name='import-score-sheet'),
+    path('results/moderate-scores/', views.StudentResultViewSet.as_view({'post': 'moderate_scores'}), name='moderate-scores'),
     path('results/<int:pk>/add-subject-scores/', views.StudentResultViewSet.as_view({'post': 'add_subject_scores'}), name='add-subject-scores'),
     path('results/<int:pk>/approve/', views.StudentResultViewSet.as_view({'post': 'approve_result'}), name='approve-result'),
     path('results/<int:pk>/publish/', views.StudentResultViewSet.as_view({'post': 'publish'}), name='publish-result'),
@@ -65,7 +77,12 @@ urlpatterns = [
     }), name='result-publishing-detail'),
     path('result-publishing/<int:pk>/toggle-publish/', views.ResultPublishingViewSet.as_view({'post': 'toggle_publish'}), name='toggle-publish'),
     path('result-publishing/publishing-status/', views.ResultPublishingViewSet.as_view({'get': 'publishing_status'}), name='publishing-status'),
+    path('result-publishing/completeness/', views.ResultPublishingViewSet.as_view({'get': 'completeness'}), name='result-completeness'),
+    path('result-publishing/<int:pk>/report-book/', views.ResultPublishingViewSet.as_view({'post': 'report_book'}), name='report-book'),
+    path('result-publishing/report-books/<int:job_id>/', views.ResultPublishingViewSet.as_view({'get': 'report_book_status'}), name='report-book-status'),
+    path('result-publishing/report-books/<int:job_id>/download/', views.ResultPublishingViewSet.as_view({'get': 'download_report_book'}), name='download-report-book'),
     
     # ============ Statistics ============
     path('statistics/', views.ResultStatisticsView.as_view(), name='result-statistics'),
+    path('statistics/teachers/', views.TeacherPerformanceView.as_view(), name='teacher-performance'),
 ]
\ No newline at end of file
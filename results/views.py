@@ -8,28 +8,58 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, JSONParser
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Avg, Max, Min, Count, Sum
+from django.db import transaction
+from django.db.models import Q, Avg, Count
 from django.shortcuts import get_object_or_404
+from django.http import FileResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils import timezone
-import json
+import logging
 
 from .models import (
     StudentResult, SubjectScore, PsychomotorSkills, 
-    AffectiveDomains, ResultPublishing
+    AffectiveDomains, ResultPublishing, ReportBookJob, ResultCohortSummary,
+    SubjectClassStatistics, TeacherPerformanceRollup
 )
 from .serializers import (
     StudentResultSerializer, SubjectScoreSerializer,
     PsychomotorSkillsSerializer, AffectiveDomainsSerializer,
     ResultPublishingSerializer, BulkResultUploadSerializer,
     SubjectScoreBulkSerializer, StudentResultListSerializer,
-    SubjectScoreListSerializer, ReportCardSerializer
+    SubjectScoreListSerializer, ReportCardSerializer,
+    ScoreSheetImportSerializer, ReportBookJobSerializer, AssessmentGridSerializer,
+    ScoreGridSerializer, BatchResultActionSerializer, ScoreModerationSerializer
+)
+
+from .recompute import defer_recompute, flush_recompute
+from .bulk import (
+    upload_results, import_score_sheet, assessment_grid, save_assessment_grid,
+    score_grid, save_score_grid
+)
+from .reports import get_report_card, report_card_version, get_cache_dir
+from .reportbook import start_report_book, REPORT_BOOK_STALE_AFTER
+from .exports import broadsheet_json, iter_broadsheet_csv, iter_session_ndjson, iter_session_csv
+from .summaries import get_cohort_summary, weighted_average
+from .annual import compute_annual_results
+from .grading import regrade_session, pass_filter
+from .moderation import moderate_scores, ModerationError
+from .snapshots import get_published_results, absolute_urls, snapshot_statistics
+from .concurrency import VersionConflict
+from .trends import get_student_trend, restrict_trend
+from .transcripts import get_transcript
+from .archive import archived_results
+from .completeness import completeness_report, IncompleteResults
+from .publishing import (
+    APPROVER_ROLES, HEADMASTER_ROLES, approval_fields, approve_results, publish_results,
+    publishing_status
 )
 
 # Import only the permissions that actually exist
 from .permissions import (
     CanViewResults, CanManageResults, CanPublishResults,
     CanApproveResults, StudentResultPermission,
-    CanAccessResultStatistics, CanBulkUploadResults
+    CanAccessResultStatistics, CanBulkUploadResults,
+    CanImportScoreSheets, CanModerateScores
 )
 
 # Import related models
@@ -37,6 +67,24 @@ from students.models import Student
 from academic.models import AcademicSession, AcademicTerm, ClassLevel, Subject
 from users.models import User
 
+logger = logging.getLogger(__name__)
+
+
+def _version_conflict_response(error):
+    """409 telling the editor to reload: someone saved the row after they loaded it"""
+    return Response(
+        {'error': str(error), 'conflicts': error.conflicts},
+        status=status.HTTP_409_CONFLICT
+    )
+
+
+def _incomplete_results_response(error):
+    """409 listing the cohorts whose scores, attendance or comments are still missing"""
+    return Response(
+        {'error': str(error), 'incomplete': error.report},
+        status=status.HTTP_409_CONFLICT
+    )
+
 
 # ============================================
 # STUDENT RESULT VIEWSET
@@ -71,13 +119,18 @@ class StudentResultViewSet(viewsets.ModelViewSet):
     
     def get_permissions(self):
         """Override permissions for specific actions"""
-        if self.action in ['list', 'retrieve', 'download_report', 'student_self_results']:
+        if self.action in ['list', 'retrieve', 'download_report', 'student_self_results', 'by_student',
+                           'trend', 'transcript']:
             return [IsAuthenticated(), CanViewResults()]
         elif self.action in ['bulk_upload']:
             return [IsAuthenticated(), CanBulkUploadResults()]
-        elif self.action in ['publish', 'approve_result']:
+        elif self.action in ['import_score_sheet', 'score_grid']:
+            return [IsAuthenticated(), CanImportScoreSheets()]
+        elif self.action in ['moderate_scores']:
+            return [IsAuthenticated(), CanModerateScores()]
+        elif self.action in ['publish', 'approve_result', 'compute_annual', 'regrade', 'batch_approve', 'batch_publish']:
             return [IsAuthenticated(), CanApproveResults()]
-        elif self.action in ['add_subject_scores']:
+        elif self.action in ['add_subject_scores', 'broadsheet', 'assessment_grid', 'export_session']:
             return [IsAuthenticated(), CanManageResults()]
         return super().get_permissions()
     
@@ -135,6 +188,24 @@ class StudentResultViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Set created_by user when creating result"""
         serializer.save(created_by=self.request.user)
+        self._recomputed(serializer.instance)
+    
+    def perform_update(self, serializer):
+        """Save, then return the result with its recomputed totals and position"""
+        serializer.save()
+        self._recomputed(serializer.instance)
+    
+    def _recomputed(self, result):
+        """Recompute what the request changed so far and reload the result before it is serialized"""
+        flush_recompute()
+        result.refresh_from_db()
+    
+    def update(self, request, *args, **kwargs):
+        """Update a result; a stale `version` is answered with 409 Conflict"""
+        try:
+            return super().update(request, *args, **kwargs)
+        except VersionConflict as e:
+            return _version_conflict_response(e)
     
     def check_object_permissions(self, request, obj):
         """Check if user has permission to access this specific result"""
@@ -173,15 +244,17 @@ class StudentResultViewSet(viewsets.ModelViewSet):
                 if obj.class_teacher != user and obj.headmaster != user:
                     self.permission_denied(request, message='Not authorized to access this result')
     
-    @action(detail=False, methods=['get'])
-    def by_student(self, request):
-        """Get results for a specific student"""
+    def _requested_student(self, request):
+        """
+        Student named by student_id / admission_number / registration_number,
+        or an error Response if missing or not visible to this user
+        """
         student_id = request.query_params.get('student_id')
         admission_number = request.query_params.get('admission_number')
         registration_number = request.query_params.get('registration_number')
         
         if not any([student_id, admission_number, registration_number]):
-            return Response(
+            return None, Response(
                 {'error': 'Please provide student_id, admission_number, or registration_number'},
                 status=status.HTTP_400_BAD_REQUEST
             )
@@ -202,12 +275,12 @@ class StudentResultViewSet(viewsets.ModelViewSet):
             try:
                 student_profile = user.student_profile
                 if student != student_profile:
-                    return Response(
+                    return None, Response(
                         {'error': 'Not authorized to view these results'},
                         status=status.HTTP_403_FORBIDDEN
                     )
             except:
-                return Response(
+                return None, Response(
                     {'error': 'Student profile not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
@@ -217,19 +290,132 @@ class StudentResultViewSet(viewsets.ModelViewSet):
             try:
                 parent_profile = user.parent_profile
                 if student not in parent_profile.children.all():
-                    return Response(
+                    return None, Response(
                         {'error': 'Not authorized to view these results'},
                         status=status.HTTP_403_FORBIDDEN
                     )
             except:
-                return Response(
+                return None, Response(
                     {'error': 'Parent profile not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
         
+        return student, None
+    
+    @action(detail=False, methods=['get'])
+    def by_student(self, request):
+        """Get results for a specific student"""
+        student, error = self._requested_student(request)
+        if error:
+            return error
+        user = request.user
+        
+        # Students and parents only see published results - serve the snapshots
+        if user.role in ['student', 'parent']:
+            return Response(absolute_urls(get_published_results(student.pk), request))
+        
         results = self.get_queryset().filter(student=student)
         serializer = self.get_serializer(results, many=True)
-        return Response(serializer.data)
+        return Response(serializer.data + absolute_urls(self._archived_results(student), request))
+    
+    def _archived_results(self, student):
+        """A student's archived results (newest first) this staff user may see"""
+        user = self.request.user
+        rows = archived_results([student.pk]).get(student.pk, [])[::-1]
+        
+        if user.role in ['teacher', 'form_teacher', 'subject_teacher']:
+            try:
+                teacher_profile = user.staff_profile.teacher_profile
+                class_level_ids = set(teacher_profile.assigned_class_levels.values_list('id', flat=True))
+                return [row for row in rows if (row['class_level'] or {}).get('id') in class_level_ids]
+            except:
+                return [
+                    row for row in rows
+                    if user.pk in [(row['class_teacher'] or {}).get('id'), (row['headmaster'] or {}).get('id')]
+                ]
+        return rows
+    
+    def _visible_result_ids(self, student):
+        """Ids of a student's live and archived results this user may see"""
+        result_ids = set(self.get_queryset().filter(student=student).values_list('id', flat=True))
+        return result_ids | {row['id'] for row in self._archived_results(student)}
+    
+    @action(detail=False, methods=['get'])
+    def trend(self, request):
+        """
+        A student's percentage, position and per-subject totals across all
+        terms and sessions, as a compact cached time series
+        """
+        student, error = self._requested_student(request)
+        if error:
+            return error
+        user = request.user
+        
+        # Students and parents only follow published results
+        published_only = user.role in ['student', 'parent']
+        trend = get_student_trend(student.pk, published_only)
+        
+        # Teachers only follow the terms of their own classes
+        if user.role in ['teacher', 'form_teacher', 'subject_teacher']:
+            result_ids = self._visible_result_ids(student)
+            if not result_ids:
+                return Response(
+                    {'error': 'Not authorized to view these results'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            trend = restrict_trend(trend, result_ids)
+        
+        return Response(trend)
+    
+    @action(detail=False, methods=['get'])
+    def transcript(self, request):
+        """Download a student's multi-session transcript of published results"""
+        student, error = self._requested_student(request)
+        if error:
+            return error
+        user = request.user
+        
+        # Teachers get a transcript of the results of their own classes
+        result_ids = None
+        if user.role in ['teacher', 'form_teacher', 'subject_teacher']:
+            result_ids = self._visible_result_ids(student)
+            if not result_ids:
+                return Response(
+                    {'error': 'Not authorized to view these results'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+        
+        try:
+            transcript = get_transcript(student.pk, result_ids=result_ids)
+        except Exception as e:
+            logger.error(f"Error rendering transcript for student {student.pk}: {str(e)}")
+            return Response(
+                {'error': f'Error generating transcript: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        if transcript is None:
+            return Response(
+                {'error': 'No published results found for this student'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        path, version = transcript
+        etag = f'"{version}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+        
+        response = FileResponse(
+            open(path, 'rb'),
+            content_type='application/pdf',
+            as_attachment=True,
+            filename=f'transcript_{student.admission_number}.pdf'.replace('/', '-')
+        )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
     
     @action(detail=False, methods=['get'])
     def by_class_level(self, request):
@@ -272,16 +458,28 @@ class StudentResultViewSet(viewsets.ModelViewSet):
             term=term
         )
         
-        # Add class level statistics
-        statistics = {
-            'total_students': results.count(),
-            'average_percentage': results.aggregate(Avg('percentage'))['percentage__avg'] or 0,
-            'highest_score': results.aggregate(Max('overall_total_score'))['overall_total_score__max'] or 0,
-            'lowest_score': results.aggregate(Min('overall_total_score'))['overall_total_score__min'] or 0,
-            'grade_distribution': results.values('overall_grade').annotate(count=Count('id')),
-            'promoted_count': results.filter(is_promoted=True).count(),
-            'published_count': results.filter(is_published=True).count()
-        }
+        # Class level statistics come from the precomputed cohort summary
+        summary = get_cohort_summary(class_level.id, session.id, term.id)
+        if summary:
+            statistics = {
+                'total_students': summary.total_results,
+                'average_percentage': summary.avg_percentage,
+                'highest_score': summary.max_total_score,
+                'lowest_score': summary.min_total_score,
+                'grade_distribution': summary.grade_distribution_list(),
+                'promoted_count': summary.promoted_count,
+                'published_count': summary.published_count
+            }
+        else:
+            statistics = {
+                'total_students': 0,
+                'average_percentage': 0,
+                'highest_score': 0,
+                'lowest_score': 0,
+                'grade_distribution': [],
+                'promoted_count': 0,
+                'published_count': 0
+            }
         
         serializer = self.get_serializer(results, many=True)
         return Response({
@@ -304,52 +502,50 @@ class StudentResultViewSet(viewsets.ModelViewSet):
             subject_scores = []
             errors = []
             
-            for subject_data in serializer.validated_data:
-                try:
-                    subject = Subject.objects.get(code=subject_data['subject_code'])
-                    
-                    # Check if subject score already exists
-                    existing_score = SubjectScore.objects.filter(
-                        result=result,
-                        subject=subject
-                    ).first()
+            # Score saves only mark the result dirty; it is recomputed once when the block exits
+            with defer_recompute():
+                for subject_data in serializer.validated_data:
+                    try:
+                        subject = Subject.objects.get(code=subject_data['subject_code'])
                     
-                    if existing_score:
-                        # Update existing score
-                        existing_score.ca_score = subject_data['ca_score']
-                        existing_score.exam_score = subject_data['exam_score']
-                        existing_score.observation_conduct = subject_data.get('observation_conduct', '')
-                        existing_score.subject_remark = subject_data.get('subject_remark', '')
-                        existing_score.teacher_comment = subject_data.get('teacher_comment', '')
-                        existing_score.save()
-                        subject_scores.append(existing_score)
-                    else:
-                        # Create new score
-                        score = SubjectScore.objects.create(
+                        # Check if subject score already exists
+                        existing_score = SubjectScore.objects.filter(
                             result=result,
-                            subject=subject,
-                            ca_score=subject_data['ca_score'],
-                            exam_score=subject_data['exam_score'],
-                            observation_conduct=subject_data.get('observation_conduct', ''),
-                            subject_remark=subject_data.get('subject_remark', ''),
-                            teacher_comment=subject_data.get('teacher_comment', '')
-                        )
-                        subject_scores.append(score)
+                            subject=subject
+                        ).first()
+                    
+                        if existing_score:
+                            # Update existing score
+                            existing_score.ca_score = subject_data['ca_score']
+                            existing_score.exam_score = subject_data['exam_score']
+                            existing_score.observation_conduct = subject_data.get('observation_conduct', '')
+                            existing_score.subject_remark = subject_data.get('subject_remark', '')
+                            existing_score.teacher_comment = subject_data.get('teacher_comment', '')
+                            existing_score.save()
+                            subject_scores.append(existing_score)
+                        else:
+                            # Create new score
+                            score = SubjectScore.objects.create(
+                                result=result,
+                                subject=subject,
+                                ca_score=subject_data['ca_score'],
+                                exam_score=subject_data['exam_score'],
+                                observation_conduct=subject_data.get('observation_conduct', ''),
+                                subject_remark=subject_data.get('subject_remark', ''),
+                                teacher_comment=subject_data.get('teacher_comment', '')
+                            )
+                            subject_scores.append(score)
                         
-                except Subject.DoesNotExist:
-                    errors.append({
-                        'subject_code': subject_data['subject_code'],
-                        'error': f"Subject not found"
-                    })
-                except Exception as e:
-                    errors.append({
-                        'subject_code': subject_data.get('subject_code', 'unknown'),
-                        'error': str(e)
-                    })
-            
-            # Recalculate result totals
-            result.calculate_totals()
-            result.save()
+                    except Subject.DoesNotExist:
+                        errors.append({
+                            'subject_code': subject_data['subject_code'],
+                            'error': f"Subject not found"
+                        })
+                    except Exception as e:
+                        errors.append({
+                            'subject_code': subject_data.get('subject_code', 'unknown'),
+                            'error': str(e)
+                        })
             
             response_data = {
                 'message': f'{len(subject_scores)} subject scores processed',
@@ -365,6 +561,306 @@ class StudentResultViewSet(viewsets.ModelViewSet):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'])
+    def compute_annual(self, request):
+        """Assemble cumulative (annual) results for every class in a session"""
+        session_id = request.data.get('session_id')
+        if not session_id:
+            return Response(
+                {'error': 'session_id is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        session = get_object_or_404(AcademicSession, pk=session_id)
+        
+        try:
+            summary = compute_annual_results(session.pk)
+        except Exception as e:
+            logger.error(f"Error computing annual results for session {session.pk}: {str(e)}")
+            return Response(
+                {'error': f'Error computing annual results: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        return Response({
+            'message': 'Annual results computed successfully',
+            'session': session.name,
+            **summary
+        })
+    
+    @action(detail=False, methods=['post'])
+    def regrade(self, request):
+        """Reassign grades and remarks for a session under the current grading schemes"""
+        if request.user.role not in HEADMASTER_ROLES:
+            return Response(
+                {'error': 'Only the headmaster or principal can regrade results'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        session_id = request.data.get('session_id')
+        if not session_id:
+            return Response(
+                {'error': 'session_id is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        session = get_object_or_404(AcademicSession, pk=session_id)
+        class_level_ids = request.data.get('class_level_ids') or None
+        
+        try:
+            summary = regrade_session(session.pk, class_level_ids)
+        except Exception as e:
+            logger.error(f"Error regrading results for session {session.pk}: {str(e)}")
+            return Response(
+                {'error': f'Error regrading results: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        return Response({
+            'message': 'Results regraded successfully',
+            'session': session.name,
+            **summary
+        })
+    
+    def _can_access_class_level(self, user, class_level):
+        """Teachers only reach class levels assigned to them (or whose arm they teach)"""
+        if user.role not in ['teacher', 'form_teacher', 'subject_teacher']:
+            return True
+        try:
+            teacher_profile = user.staff_profile.teacher_profile
+            return class_level in teacher_profile.assigned_class_levels.all()
+        except:
+            # Fall back to being class teacher of one of the level's arms
+            from academic.models import Class
+            return Class.objects.filter(class_level=class_level, class_teacher=user).exists()
+    
+    def _teaches_subject(self, user, subject, class_level, session, class_obj=None):
+        """Teachers only enter scores for subjects they teach in that class level (or arm)"""
+        if user.role not in ['teacher', 'form_teacher', 'subject_teacher']:
+            return True
+        from academic.models import ClassSubject
+        
+        assignments = ClassSubject.objects.filter(
+            teacher=user,
+            subject=subject,
+            class_obj__class_level=class_level,
+            class_obj__session=session
+        )
+        if class_obj is not None:
+            assignments = assignments.filter(class_obj=class_obj)
+        return assignments.exists()
+    
+    def _heads_subject(self, user, subject):
+        """Heads of department only reach the subjects on their teacher profile"""
+        if user.role not in ['teacher', 'form_teacher', 'subject_teacher']:
+            return True
+        try:
+            return user.staff_profile.teacher_profile.subjects.filter(pk=subject.pk).exists()
+        except:
+            return False
+    
+    @action(detail=False, methods=['get', 'put'])
+    def score_grid(self, request):
+        """
+        One subject's scores for a whole class level (or arm with class_id).
+        GET returns every student with their existing score; PUT saves the
+        column in bulk and recomputes the class once.
+        """
+        if request.method == 'PUT':
+            serializer = ScoreGridSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            
+            class_level = serializer.validated_data['class_level_id']
+            session = serializer.validated_data['session_id']
+            term = serializer.validated_data['term_id']
+            subject = serializer.validated_data['subject_id']
+            class_obj = serializer.validated_data.get('class_id')
+        else:
+            params = request.query_params
+            if not all(params.get(key) for key in ['class_level_id', 'session_id', 'term_id', 'subject_id']):
+                return Response(
+                    {'error': 'class_level_id, session_id, term_id, and subject_id are required'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            from academic.models import Class
+            class_level = get_object_or_404(ClassLevel, pk=params['class_level_id'])
+            session = get_object_or_404(AcademicSession, pk=params['session_id'])
+            term = get_object_or_404(AcademicTerm, pk=params['term_id'])
+            subject = get_object_or_404(Subject, pk=params['subject_id'])
+            class_obj = None
+            if params.get('class_id'):
+                class_obj = get_object_or_404(Class, pk=params['class_id'], class_level=class_level)
+        
+        if not self._teaches_subject(request.user, subject, class_level, session, class_obj):
+            return Response(
+                {'error': 'You are not assigned to teach this subject in this class'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        if request.method == 'PUT':
+            try:
+                report = save_score_grid(
+                    class_level, session, term, subject, serializer.validated_data['scores'],
+                    request.user, class_obj
+                )
+            except VersionConflict as e:
+                return _version_conflict_response(e)
+            except Exception as e:
+                logger.error(f"Error saving score grid: {str(e)}")
+                return Response(
+                    {'error': f'Error saving score grid: {str(e)}'},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+            
+            return Response({'message': 'Scores saved', **report})
+        
+        return Response({
+            'class_level': class_level.name,
+            'class': class_obj.name if class_obj else None,
+            'session': session.name,
+            'term': term.name,
+            'subject': {'id': subject.id, 'code': subject.code, 'name': subject.name},
+            'rows': score_grid(class_level, session, term, subject, class_obj)
+        })
+    
+    @action(detail=False, methods=['get', 'put'])
+    def assessment_grid(self, request):
+        """
+        Psychomotor and affective ratings for a whole class level.
+        GET returns one row per student; PUT saves any number of rows at once.
+        """
+        if request.method == 'PUT':
+            serializer = AssessmentGridSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            
+            class_level = serializer.validated_data['class_level_id']
+            session = serializer.validated_data['session_id']
+            term = serializer.validated_data['term_id']
+        else:
+            class_level_id = request.query_params.get('class_level_id')
+            session_id = request.query_params.get('session_id')
+            term_id = request.query_params.get('term_id')
+            
+            if not all([class_level_id, session_id, term_id]):
+                return Response(
+                    {'error': 'class_level_id, session_id, and term_id are required'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            class_level = get_object_or_404(ClassLevel, pk=class_level_id)
+            session = get_object_or_404(AcademicSession, pk=session_id)
+            term = get_object_or_404(AcademicTerm, pk=term_id)
+        
+        if not self._can_access_class_level(request.user, class_level):
+            return Response(
+                {'error': 'Not authorized to manage results for this class level'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        if request.method == 'PUT':
+            try:
+                updated, errors = save_assessment_grid(
+                    class_level, session, term, serializer.validated_data['rows']
+                )
+            except Exception as e:
+                logger.error(f"Error saving assessment grid: {str(e)}")
+                return Response(
+                    {'error': f'Error saving assessment grid: {str(e)}'},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+            
+            return Response({
+                'message': 'Assessment grid saved',
+                'updated': updated,
+                'errors': errors
+            })
+        
+        return Response({
+            'class_level': class_level.name,
+            'session': session.name,
+            'term': term.name,
+            'rows': assessment_grid(class_level, session, term)
+        })
+    
+    @action(detail=False, methods=['get'])
+    def broadsheet(self, request):
+        """
+        Master score sheet for a class level: one row per student with CA, exam
+        and total per subject. ?output=csv streams it as a CSV download.
+        """
+        class_level_id = request.query_params.get('class_level_id')
+        session_id = request.query_params.get('session_id')
+        term_id = request.query_params.get('term_id')
+        
+        if not all([class_level_id, session_id, term_id]):
+            return Response(
+                {'error': 'class_level_id, session_id, and term_id are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        class_level = get_object_or_404(ClassLevel, pk=class_level_id)
+        session = get_object_or_404(AcademicSession, pk=session_id)
+        term = get_object_or_404(AcademicTerm, pk=term_id)
+        
+        if not self._can_access_class_level(request.user, class_level):
+            return Response(
+                {'error': 'Not authorized to view results for this class level'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        if request.query_params.get('output') == 'csv':
+            filename = f'broadsheet_{class_level.name}_{session.name}_{term.term}_term.csv'
+            response = StreamingHttpResponse(
+                iter_broadsheet_csv(class_level, session, term),
+                content_type='text/csv'
+            )
+            response['Content-Disposition'] = (
+                f'attachment; filename="{filename.replace(" ", "_").replace("/", "-")}"'
+            )
+            return response
+        
+        return Response(broadsheet_json(class_level, session, term))
+    
+    @action(detail=False, methods=['get'])
+    def export_session(self, request):
+        """
+        Stream every result of a session (optionally one term / class level)
+        with its subject scores. ?output=csv gives one row per subject score;
+        the default is NDJSON with one result per line.
+        """
+        session_id = request.query_params.get('session_id')
+        if not session_id:
+            return Response(
+                {'error': 'session_id is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        session = get_object_or_404(AcademicSession, pk=session_id)
+        results = self.get_queryset().filter(session=session)
+        
+        term_id = request.query_params.get('term_id')
+        if term_id:
+            results = results.filter(term=get_object_or_404(AcademicTerm, pk=term_id, session=session))
+        class_level_id = request.query_params.get('class_level_id')
+        if class_level_id:
+            results = results.filter(class_level=get_object_or_404(ClassLevel, pk=class_level_id))
+        if request.query_params.get('published_only') in ['1', 'true', 'True']:
+            results = results.filter(is_published=True)
+        
+        filename = f'results_{session.name}'.replace(' ', '_').replace('/', '-')
+        if request.query_params.get('output') == 'csv':
+            response = StreamingHttpResponse(iter_session_csv(results), content_type='text/csv')
+            response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        else:
+            response = StreamingHttpResponse(
+                iter_session_ndjson(results), content_type='application/x-ndjson'
+            )
+            response['Content-Disposition'] = f'attachment; filename="{filename}.ndjson"'
+        return response
+    
     @action(detail=True, methods=['post'])
     def approve_result(self, request, pk=None):
         """Approve and sign off on a result"""
@@ -372,7 +868,7 @@ class StudentResultViewSet(viewsets.ModelViewSet):
         user = request.user
         
         # Check if user can approve
-        if user.role not in ['head', 'hm', 'principal', 'vice_principal', 'teacher', 'form_teacher']:
+        if user.role not in APPROVER_ROLES:
             return Response(
                 {'error': 'Only administrators and teachers can approve results'},
                 status=status.HTTP_403_FORBIDDEN
@@ -380,24 +876,19 @@ class StudentResultViewSet(viewsets.ModelViewSet):
         
         # Set approver and date based on role
         today = timezone.now().date()
+        fields, message = approval_fields(user, today)
+        for field, value in fields.items():
+            setattr(result, field, value)
         
-        if user.role in ['head', 'hm']:
-            result.headmaster = user
-            result.headmaster_signature_date = today
-            message = 'Result approved by headmaster'
-        elif user.role in ['principal', 'vice_principal']:
-            result.headmaster = user
-            result.headmaster_signature_date = today
-            message = 'Result approved by principal'
-        else:
-            result.class_teacher = user
-            result.class_teacher_signature_date = today
-            message = 'Result approved by class teacher'
-        
-        result.save()
+        # A submitted `version` is the one the approver reviewed
+        result.version = request.data.get('version', result.version)
+        try:
+            result.save()
+        except VersionConflict as e:
+            return _version_conflict_response(e)
         
         return Response({
-            'message': message,
+            'message': f'Result {message}',
             'approver': user.get_full_name(),
             'role': user.get_role_display(),
             'date': today
@@ -417,7 +908,11 @@ class StudentResultViewSet(viewsets.ModelViewSet):
             )
         
         result.is_published = True
-        result.save()
+        result.version = request.data.get('version', result.version)
+        try:
+            result.save()
+        except VersionConflict as e:
+            return _version_conflict_response(e)
         
         return Response({
             'message': 'Result published successfully',
@@ -426,6 +921,88 @@ class StudentResultViewSet(viewsets.ModelViewSet):
             'published_date': timezone.now()
         })
     
+    def _batch_scope(self, data):
+        """Results a batch action covers, limited to what the user may access"""
+        results = self.get_queryset()
+        if data.get('result_ids'):
+            return results.filter(pk__in=data['result_ids']), None
+        
+        cohorts = [
+            (class_level, data['session_id'], data['term_id'])
+            for class_level in data['class_level_ids']
+        ]
+        results = results.filter(
+            session=data['session_id'],
+            term=data['term_id'],
+            class_level__in=data['class_level_ids']
+        )
+        return results, cohorts
+    
+    @action(detail=False, methods=['post'])
+    def batch_approve(self, request):
+        """Approve selected results or whole cohorts in one update"""
+        user = request.user
+        if user.role not in APPROVER_ROLES:
+            return Response(
+                {'error': 'Only administrators and teachers can approve results'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = BatchResultActionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        results, _ = self._batch_scope(serializer.validated_data)
+        try:
+            approved, message = approve_results(results, user)
+        except Exception as e:
+            logger.error(f"Error batch approving results: {str(e)}")
+            return Response(
+                {'error': f'Error approving results: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        return Response({
+            'message': f'{approved} results {message}',
+            'approved_count': approved,
+            'approver': user.get_full_name(),
+            'role': user.get_role_display(),
+            'date': timezone.now().date()
+        })
+    
+    @action(detail=False, methods=['post'])
+    def batch_publish(self, request):
+        """Publish selected results or whole cohorts in one update"""
+        user = request.user
+        if user.role not in HEADMASTER_ROLES:
+            return Response(
+                {'error': 'Only administrators can publish results'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = BatchResultActionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        results, cohorts = self._batch_scope(serializer.validated_data)
+        try:
+            published = publish_results(results, user, cohorts, force=serializer.validated_data['force'])
+        except IncompleteResults as e:
+            return _incomplete_results_response(e)
+        except Exception as e:
+            logger.error(f"Error batch publishing results: {str(e)}")
+            return Response(
+                {'error': f'Error publishing results: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        return Response({
+            'message': f'{published} results published successfully',
+            'published_count': published,
+            'class_levels': len(cohorts) if cohorts else 0,
+            'published_date': timezone.now()
+        })
+    
     @action(detail=False, methods=['get'])
     def student_self_results(self, request):
         """Get current student's own results"""
@@ -437,29 +1014,13 @@ class StudentResultViewSet(viewsets.ModelViewSet):
         
         try:
             student = request.user.student_profile
-            results = self.get_queryset().filter(student=student)
-            
-            # Calculate overall statistics
-            total_results = results.count()
-            average_percentage = results.aggregate(Avg('percentage'))['percentage__avg'] or 0
-            best_result = results.order_by('-percentage').first()
             
-            statistics = {
-                'total_results': total_results,
-                'average_percentage': round(average_percentage, 2),
-                'best_percentage': best_result.percentage if best_result else 0,
-                'best_grade': best_result.overall_grade if best_result else '',
-                'best_position': best_result.position_in_class if best_result else None,
-                'results_by_term': list(results.values('term__term', 'term__name').annotate(
-                    avg_percentage=Avg('percentage'),
-                    avg_position=Avg('position_in_class')
-                ))
-            }
+            # Published snapshots from the cache; statistics are derived from them
+            results = get_published_results(student.pk)
             
-            serializer = self.get_serializer(results, many=True)
             return Response({
-                'results': serializer.data,
-                'statistics': statistics,
+                'results': absolute_urls(results, request),
+                'statistics': snapshot_statistics(results),
                 'student': {
                     'name': student.user.get_full_name() if student.user else '',
                     'class_level': student.class_level.name if student.class_level else 'Not assigned',
@@ -484,96 +1045,105 @@ class StudentResultViewSet(viewsets.ModelViewSet):
             class_level = serializer.validated_data['class_level_id']
             results_data = serializer.validated_data['results_data']
             
-            created_count = 0
-            updated_count = 0
-            errors = []
-            
-            for result_data in results_data:
-                try:
-                    # Find student by registration number
-                    student = Student.objects.get(
-                        user__registration_number=result_data['student_registration_number']
-                    )
-                    
-                    # Check if result already exists
-                    result, created = StudentResult.objects.get_or_create(
-                        student=student,
-                        session=session,
-                        term=term,
-                        defaults={
-                            'class_level': class_level,
-                            'created_by': request.user
-                        }
-                    )
-                    
-                    if created:
-                        created_count += 1
-                    else:
-                        updated_count += 1
-                    
-                    # Add subject scores if provided
-                    for subject_score_data in result_data.get('subjects', []):
-                        subject_code = subject_score_data.get('subject_code')
-                        if subject_code:
-                            try:
-                                subject = Subject.objects.get(code=subject_code)
-                                
-                                SubjectScore.objects.update_or_create(
-                                    result=result,
-                                    subject=subject,
-                                    defaults={
-                                        'ca_score': subject_score_data.get('ca_score', 0),
-                                        'exam_score': subject_score_data.get('exam_score', 0),
-                                        'observation_conduct': subject_score_data.get('observation_conduct', ''),
-                                        'subject_remark': subject_score_data.get('subject_remark', ''),
-                                        'teacher_comment': subject_score_data.get('teacher_comment', '')
-                                    }
-                                )
-                            except Subject.DoesNotExist:
-                                errors.append({
-                                    'student': result_data['student_registration_number'],
-                                    'error': f'Subject not found: {subject_code}'
-                                })
-                    
-                    # Update attendance if provided
-                    if 'attendance' in result_data:
-                        attendance = result_data['attendance']
-                        result.frequency_of_school_opened = attendance.get('frequency', 0)
-                        result.no_of_times_present = attendance.get('present', 0)
-                        result.no_of_times_absent = attendance.get('absent', 0)
-                    
-                    # Add comments if provided
-                    if 'comments' in result_data:
-                        comments = result_data['comments']
-                        result.class_teacher_comment = comments.get('class_teacher', '')
-                        result.headmaster_comment = comments.get('headmaster', '')
-                    
-                    # Calculate totals
-                    result.calculate_totals()
-                    result.save()
-                    
-                except Student.DoesNotExist:
-                    errors.append({
-                        'student_registration': result_data.get('student_registration_number', 'Unknown'),
-                        'error': 'Student not found'
-                    })
-                except Exception as e:
-                    errors.append({
-                        'student_registration': result_data.get('student_registration_number', 'Unknown'),
-                        'error': str(e)
-                    })
+            # Two lookups, chunked bulk writes and a single recompute for the whole upload
+            report = upload_results(session, term, class_level, results_data, request.user)
             
             return Response({
                 'message': 'Bulk upload completed',
-                'created': created_count,
-                'updated': updated_count,
-                'errors': errors,
-                'total_processed': len(results_data),
-                'success_count': created_count + updated_count
+                **report
             })
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def import_score_sheet(self, request):
+        """Import one subject's CA/exam scores for a class level from a CSV sheet"""
+        serializer = ScoreSheetImportSerializer(data=request.data)
+        
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        session = serializer.validated_data['session_id']
+        term = serializer.validated_data['term_id']
+        class_level = serializer.validated_data['class_level_id']
+        subject = serializer.validated_data['subject_id']
+        user = request.user
+        
+        # Teachers may only import sheets for subjects they teach in that class level
+        if not self._teaches_subject(user, subject, class_level, session):
+            return Response(
+                {'error': 'You are not assigned to teach this subject in this class'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        try:
+            report = import_score_sheet(
+                serializer.validated_data['file'], session, term, class_level, subject, user
+            )
+        except DjangoValidationError as e:
+            return Response({'error': '; '.join(e.messages)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error importing score sheet: {str(e)}")
+            return Response(
+                {'error': f'Error importing score sheet: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        return Response({
+            'message': 'Score sheet imported',
+            'subject': subject.name,
+            'class_level': class_level.name,
+            **report
+        })
+    
+    @action(detail=False, methods=['post'])
+    def moderate_scores(self, request):
+        """Add marks to, scale or cap one subject's CA or exam scores across a class level"""
+        serializer = ScoreModerationSerializer(data=request.data)
+        
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = serializer.validated_data
+        session = data['session_id']
+        term = data['term_id']
+        class_level = data['class_level_id']
+        subject = data['subject_id']
+        user = request.user
+        
+        # Heads of department only moderate the subjects of their department
+        if not self._heads_subject(user, subject):
+            return Response(
+                {'error': 'You are not head of department for this subject'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        try:
+            moderation = moderate_scores(
+                subject, class_level, session, term, data['component'], data['operation'],
+                data.get('amount'), user, data['reason']
+            )
+        except ModerationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error moderating scores: {str(e)}")
+            return Response(
+                {'error': f'Error moderating scores: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        return Response({
+            'message': f'{moderation.scores_moderated} score(s) moderated',
+            'moderation_id': moderation.pk,
+            'subject': subject.name,
+            'class_level': class_level.name,
+            'component': moderation.component,
+            'operation': moderation.operation,
+            'amount': moderation.amount,
+            'scores_moderated': moderation.scores_moderated,
+            'changes': moderation.changes
+        })
+    
     @action(detail=True, methods=['get'])
     def download_report(self, request, pk=None):
         """Generate and download report card"""
@@ -617,20 +1187,34 @@ class StudentResultViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_403_FORBIDDEN
                 )
         
-        # Generate report data
-        serializer = ReportCardSerializer(result)
+        # Cached PDF keyed by the card's content version - repeat downloads skip rendering
+        version = report_card_version(result.pk)
+        etag = f'"{version}"'
         
-        # In production, you would generate a PDF here
-        # For now, return JSON data
-        return Response({
-            'message': 'Report card data (PDF generation would happen in production)',
-            'report_data': serializer.data,
-            'download_url': f'/api/results/{result.id}/report.pdf',  # Placeholder
-            'student_name': result.student.user.get_full_name() if result.student and result.student.user else '',
-            'class_level': result.class_level.name if result.class_level else '',
-            'session': result.session.name if result.session else '',
-            'term': result.term.name if result.term else ''
-        })
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+        
+        try:
+            path, version = get_report_card(result.pk, version)
+        except Exception as e:
+            logger.error(f"Error rendering report card for result {result.pk}: {str(e)}")
+            return Response(
+                {'error': f'Error generating report card: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        admission_number = result.student.admission_number if result.student else result.pk
+        response = FileResponse(
+            open(path, 'rb'),
+            content_type='application/pdf',
+            as_attachment=True,
+            filename=f'report_card_{admission_number}_{result.term.term}_term.pdf'
+        )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
     
     @action(detail=False, methods=['get'])
     def search(self, request):
@@ -692,6 +1276,13 @@ class SubjectScoreViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['result', 'subject', 'grade']
     
+    def update(self, request, *args, **kwargs):
+        """Update a score; a stale `version` is answered with 409 Conflict"""
+        try:
+            return super().update(request, *args, **kwargs)
+        except VersionConflict as e:
+            return _version_conflict_response(e)
+    
     def get_queryset(self):
         """Filter queryset based on user role"""
         queryset = super().get_queryset()
@@ -795,7 +1386,10 @@ class ResultPublishingViewSet(viewsets.ModelViewSet):
             publishing.unpublish_results()
             message = 'Results unpublished successfully'
         else:
-            publishing.publish_results(user)
+            try:
+                publishing.publish_results(user, force=request.data.get('force') in [True, '1', 'true', 'True'])
+            except IncompleteResults as e:
+                return _incomplete_results_response(e)
             message = 'Results published successfully'
         
         return Response({
@@ -820,36 +1414,98 @@ class ResultPublishingViewSet(viewsets.ModelViewSet):
         session = get_object_or_404(AcademicSession, pk=session_id)
         term = get_object_or_404(AcademicTerm, pk=term_id)
         
-        # Get all class levels for this session and term
-        class_levels = ClassLevel.objects.all()
+        # Every class level with its publishing record in one LEFT JOIN
+        return Response(publishing_status(session, term))
+    
+    @action(detail=False, methods=['get'])
+    def completeness(self, request):
+        """Missing scores, results, attendance and comments per class level before publishing"""
+        session_id = request.query_params.get('session_id')
+        term_id = request.query_params.get('term_id')
         
-        status_list = []
-        for class_level in class_levels:
-            try:
-                publishing = ResultPublishing.objects.get(
-                    session=session,
-                    term=term,
-                    class_level=class_level
-                )
-                status_list.append({
-                    'class_level_id': class_level.id,
-                    'class_level_name': class_level.name,
-                    'is_published': publishing.is_published,
-                    'published_date': publishing.published_date,
-                    'published_by': publishing.published_by.get_full_name() if publishing.published_by else None,
-                    'published_by_id': publishing.published_by.id if publishing.published_by else None
-                })
-            except ResultPublishing.DoesNotExist:
-                status_list.append({
-                    'class_level_id': class_level.id,
-                    'class_level_name': class_level.name,
-                    'is_published': False,
-                    'published_date': None,
-                    'published_by': None,
-                    'published_by_id': None
-                })
-        
-        return Response(status_list)
+        if not session_id or not term_id:
+            return Response(
+                {'error': 'session_id and term_id are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            class_level_ids = [int(pk) for pk in request.query_params.getlist('class_level_id')]
+        except ValueError:
+            return Response(
+                {'error': 'class_level_id must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        session = get_object_or_404(AcademicSession, pk=session_id)
+        term = get_object_or_404(AcademicTerm, pk=term_id, session=session)
+        report = completeness_report(
+            session.pk, term.pk, class_level_ids or None,
+            detail=request.query_params.get('detail', 'true') not in ['0', 'false', 'False']
+        )
+        
+        return Response({
+            'session': session.name,
+            'term': term.get_term_display(),
+            'is_complete': all(cohort['is_complete'] for cohort in report),
+            'class_levels': report
+        })
+    
+    @action(detail=True, methods=['post'])
+    def report_book(self, request, pk=None):
+        """Start building a zip of every report card in this publishing scope"""
+        publishing = self.get_object()
+        
+        if not publishing.is_published:
+            return Response(
+                {'error': 'Results must be published before generating a report book'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Don't queue a second build while one is still in progress; a job stuck past
+        # REPORT_BOOK_STALE_AFTER (e.g. its worker was restarted) no longer blocks
+        job = publishing.report_book_jobs.filter(
+            status__in=['pending', 'running'],
+            created_at__gte=timezone.now() - REPORT_BOOK_STALE_AFTER
+        ).first()
+        if job is None:
+            job = ReportBookJob.objects.create(publishing=publishing, requested_by=request.user)
+            transaction.on_commit(lambda: start_report_book(job))
+        
+        return Response(ReportBookJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'])
+    def report_book_status(self, request, job_id=None):
+        """Poll the progress of a report book job"""
+        job = get_object_or_404(ReportBookJob.objects.select_related('requested_by'), pk=job_id)
+        return Response(ReportBookJobSerializer(job).data)
+    
+    @action(detail=False, methods=['get'])
+    def download_report_book(self, request, job_id=None):
+        """Download a finished report book archive"""
+        job = get_object_or_404(
+            ReportBookJob.objects.select_related('publishing__session', 'publishing__term', 'publishing__class_level'),
+            pk=job_id
+        )
+        
+        archive = get_cache_dir() / job.archive_path if job.archive_path else None
+        if job.status != 'completed' or archive is None or not archive.exists():
+            return Response(
+                {'error': 'Report book is not ready', 'status': job.status},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        publishing = job.publishing
+        scope = publishing.class_level.name if publishing.class_level else 'all_classes'
+        filename = f'report_book_{scope}_{publishing.session.name}_{publishing.term.term}_term.zip'
+        response = FileResponse(
+            open(archive, 'rb'),
+            content_type='application/zip',
+            as_attachment=True,
+            filename=filename.replace(' ', '_').replace('/', '-')
+        )
+        response['ETag'] = f'"{job.book_version}"'
+        return response
 
 
 # ============================================
@@ -865,66 +1521,93 @@ class ResultStatisticsView(generics.GenericAPIView):
         """Get overall result statistics"""
         user = request.user
         
-        # Base queryset
-        results = StudentResult.objects.all()
-        subject_scores = SubjectScore.objects.all()
+        # Statistics are read from per-cohort summaries and per-subject class statistics
+        summaries = ResultCohortSummary.objects.select_related('session', 'term', 'class_level')
+        subject_statistics = SubjectClassStatistics.objects.select_related('subject')
         
         # Apply filters based on user role
         if user.role in ['teacher', 'form_teacher', 'subject_teacher']:
             try:
                 teacher_profile = user.staff_profile.teacher_profile
                 assigned_class_levels = teacher_profile.assigned_class_levels.all()
-                results = results.filter(class_level__in=assigned_class_levels)
-                subject_scores = subject_scores.filter(result__class_level__in=assigned_class_levels)
+                summaries = summaries.filter(class_level__in=assigned_class_levels)
+                subject_statistics = subject_statistics.filter(class_level__in=assigned_class_levels)
             except:
-                # Fallback to classes where user is class teacher
-                results = results.filter(Q(class_teacher=user) | Q(headmaster=user))
-                subject_scores = subject_scores.filter(Q(result__class_teacher=user) | Q(result__headmaster=user))
+                # Fallback to class levels where user is class teacher
+                own_results = StudentResult.objects.filter(Q(class_teacher=user) | Q(headmaster=user))
+                summaries = summaries.filter(class_level__in=own_results.values('class_level'))
+                subject_statistics = subject_statistics.filter(class_level__in=own_results.values('class_level'))
+        
+        summaries = list(summaries.order_by('session__start_date', 'term__term', 'class_level__order'))
         
         # Get basic statistics
-        total_results = results.count()
-        published_results = results.filter(is_published=True).count()
+        total_results = sum(summary.total_results for summary in summaries)
+        published_results = sum(summary.published_count for summary in summaries)
+        promoted_results = sum(summary.promoted_count for summary in summaries)
         
         # Grade distribution
-        grade_distribution = list(results.values('overall_grade').annotate(
-            count=Count('id')
-        ).order_by('overall_grade'))
+        grades = {}
+        for summary in summaries:
+            for grade, count in summary.grade_distribution.items():
+                grades[grade] = grades.get(grade, 0) + count
+        grade_distribution = [
+            {'overall_grade': grade, 'count': count} for grade, count in sorted(grades.items())
+        ]
         
         # Term-wise performance
-        term_performance = list(results.values(
-            'session__name', 'session__id', 'term__term', 'term__name'
-        ).annotate(
-            avg_percentage=Avg('percentage'),
-            total_students=Count('id'),
-            promoted=Count('id', filter=Q(is_promoted=True)),
-            published=Count('id', filter=Q(is_published=True))
-        ).order_by('session__start_date', 'term__term'))
+        terms = {}
+        for summary in summaries:
+            terms.setdefault((summary.session_id, summary.term_id), []).append(summary)
+        term_performance = [
+            {
+                'session__name': group[0].session.name,
+                'session__id': group[0].session_id,
+                'term__term': group[0].term.term,
+                'term__name': group[0].term.name,
+                'avg_percentage': weighted_average(group, 'avg_percentage'),
+                'total_students': sum(summary.total_results for summary in group),
+                'promoted': sum(summary.promoted_count for summary in group),
+                'published': sum(summary.published_count for summary in group)
+            }
+            for group in terms.values()
+        ]
         
         # Class level-wise averages
-        class_level_performance = list(results.values(
-            'class_level__name', 'class_level__id', 'session__name', 'term__name'
-        ).annotate(
-            avg_percentage=Avg('percentage'),
-            total_students=Count('id'),
-            avg_position=Avg('position_in_class'),
-            promoted_count=Count('id', filter=Q(is_promoted=True))
-        ).order_by('class_level__order'))
-        
-        # Subject-wise averages
-        subject_stats = list(subject_scores.values(
-            'subject__name', 'subject__code', 'subject__id'
-        ).annotate(
-            avg_score=Avg('total_score'),
-            avg_ca=Avg('ca_score'),
-            avg_exam=Avg('exam_score'),
-            total_students=Count('id', distinct=True),
-            avg_grade=Avg('grade')
-        ).order_by('subject__name'))
+        class_level_performance = [
+            {
+                'class_level__name': summary.class_level.name,
+                'class_level__id': summary.class_level_id,
+                'session__name': summary.session.name,
+                'term__name': summary.term.name,
+                'avg_percentage': summary.avg_percentage,
+                'total_students': summary.total_results,
+                'avg_position': summary.avg_position,
+                'promoted_count': summary.promoted_count
+            }
+            for summary in sorted(summaries, key=lambda summary: summary.class_level.order)
+        ]
+        
+        # Subject-wise averages, weighted by each class's number of scores
+        subjects = {}
+        for statistics in subject_statistics.order_by('subject__name', 'pk'):
+            subjects.setdefault(statistics.subject_id, []).append(statistics)
+        subject_stats = [
+            {
+                'subject__name': group[0].subject.name,
+                'subject__code': group[0].subject.code,
+                'subject__id': group[0].subject_id,
+                'avg_score': round(weighted_average(group, 'class_average', weight='student_count'), 2),
+                'avg_ca': round(weighted_average(group, 'average_ca_score', weight='student_count'), 2),
+                'avg_exam': round(weighted_average(group, 'average_exam_score', weight='student_count'), 2),
+                'total_students': sum(statistics.student_count for statistics in group)
+            }
+            for group in subjects.values()
+        ]
         
         # Calculate overall averages
-        overall_avg_percentage = results.aggregate(avg=Avg('percentage'))['avg'] or 0
-        overall_avg_position = results.aggregate(avg=Avg('position_in_class'))['avg'] or 0
-        promotion_rate = (results.filter(is_promoted=True).count() / total_results * 100) if total_results > 0 else 0
+        overall_avg_percentage = weighted_average(summaries, 'avg_percentage')
+        overall_avg_position = weighted_average(summaries, 'avg_position', weight='scored_results')
+        promotion_rate = (promoted_results / total_results * 100) if total_results > 0 else 0
         
         return Response({
             'overall': {
@@ -966,7 +1649,8 @@ class ResultStatisticsView(generics.GenericAPIView):
             term=term
         )
         
-        if not results.exists():
+        summary = get_cohort_summary(class_level.id, session.id, term.id)
+        if summary is None:
             return Response({
                 'message': 'No results found for this class level',
                 'class_level_info': {
@@ -977,25 +1661,25 @@ class ResultStatisticsView(generics.GenericAPIView):
             })
         
         # Calculate detailed statistics
-        total_students = results.count()
+        total_students = summary.total_results
         
         # Performance statistics
-        performance_stats = results.aggregate(
-            avg_percentage=Avg('percentage'),
-            max_percentage=Max('percentage'),
-            min_percentage=Min('percentage'),
-            avg_total_score=Avg('overall_total_score'),
-            max_total_score=Max('overall_total_score'),
-            min_total_score=Min('overall_total_score'),
-            promoted_count=Count('id', filter=Q(is_promoted=True)),
-            published_count=Count('id', filter=Q(is_published=True))
-        )
+        performance_stats = {
+            'avg_percentage': summary.avg_percentage,
+            'max_percentage': summary.max_percentage,
+            'min_percentage': summary.min_percentage,
+            'avg_total_score': summary.avg_total_score,
+            'max_total_score': summary.max_total_score,
+            'min_total_score': summary.min_total_score,
+            'promoted_count': summary.promoted_count,
+            'published_count': summary.published_count
+        }
         
         # Grade distribution
-        grade_dist = list(results.values('overall_grade').annotate(
-            count=Count('id'),
-            percentage=Count('id') * 100.0 / total_students
-        ).order_by('overall_grade'))
+        grade_dist = [
+            dict(row, percentage=row['count'] * 100.0 / total_students)
+            for row in summary.grade_distribution_list()
+        ]
         
         # Subject-wise statistics
         subject_scores = SubjectScore.objects.filter(result__in=results)
@@ -1005,24 +1689,17 @@ class ResultStatisticsView(generics.GenericAPIView):
             avg_score=Avg('total_score'),
             avg_ca=Avg('ca_score'),
             avg_exam=Avg('exam_score'),
-            pass_rate=Count('id', filter=Q(grade__in=['A', 'B', 'C'])) * 100.0 / Count('id'),
+            pass_rate=Count('id', filter=pass_filter([class_level.pk], prefix='result__')) * 100.0 / Count('id'),
             student_count=Count('result__student', distinct=True)
         ).order_by('subject__name'))
         
         # Attendance statistics
-        attendance_stats = results.aggregate(
-            avg_present=Avg('no_of_times_present'),
-            avg_absent=Avg('no_of_times_absent'),
-            total_days=Avg('frequency_of_school_opened')
-        )
-        
-        # Calculate attendance percentage
-        if attendance_stats['total_days']:
-            attendance_stats['avg_attendance_percentage'] = (
-                attendance_stats['avg_present'] / attendance_stats['total_days'] * 100
-            )
-        else:
-            attendance_stats['avg_attendance_percentage'] = 0
+        attendance_stats = {
+            'avg_present': summary.avg_present,
+            'avg_absent': summary.avg_absent,
+            'total_days': summary.avg_days_opened,
+            'avg_attendance_percentage': summary.avg_attendance_percentage
+        }
         
         return Response({
             'class_level_info': {
@@ -1045,4 +1722,94 @@ class ResultStatisticsView(generics.GenericAPIView):
                 'student__user__first_name', 'student__user__last_name',
                 'student__admission_number', 'percentage', 'overall_grade', 'position_in_class'
             ))
-        })
\ No newline at end of file
+        })
+
+
+# ============================================
+# TEACHER PERFORMANCE VIEW
+# ============================================
+
+class TeacherPerformanceView(generics.GenericAPIView):
+    """Per subject teacher performance, read from the precomputed rollups"""
+    
+    permission_classes = [IsAuthenticated, CanAccessResultStatistics]
+    
+    FILTERS = {
+        'teacher_id': 'teacher_id',
+        'subject_id': 'subject_id',
+        'class_level_id': 'class_level_id',
+        'session_id': 'session_id',
+        'term_id': 'term_id'
+    }
+    
+    def get(self, request):
+        """
+        Rollup rows per (teacher, subject, class level, session, term) and a
+        summary per teacher and subject across the filtered terms.
+        Filters: teacher_id, subject_id, class_level_id, session_id, term_id.
+        """
+        user = request.user
+        rollups = TeacherPerformanceRollup.objects.all()
+        
+        for param, field in self.FILTERS.items():
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    rollups = rollups.filter(**{field: int(value)})
+                except ValueError:
+                    return Response(
+                        {'error': f'{param} must be an integer'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+        
+        # Teachers only see their own classes' performance
+        if user.role in ['teacher', 'form_teacher', 'subject_teacher']:
+            rollups = rollups.filter(teacher=user)
+        
+        rows = list(rollups.order_by(
+            'teacher__last_name', 'teacher__first_name', 'subject__name',
+            'session__start_date', 'term__start_date', 'class_level__order'
+        ).values(
+            'teacher_id', 'teacher__first_name', 'teacher__last_name',
+            'subject_id', 'subject__code', 'subject__name',
+            'class_level_id', 'class_level__name', 'session_id', 'session__name',
+            'term_id', 'term__name', 'student_count', 'pass_count', 'average_score',
+            'highest_score', 'lowest_score', 'grade_distribution'
+        ))
+        
+        summaries = {}
+        for row in rows:
+            row['pass_rate'] = (
+                round(row['pass_count'] * 100 / row['student_count'], 2) if row['student_count'] else 0
+            )
+            summary = summaries.setdefault((row['teacher_id'], row['subject_id']), {
+                'teacher_id': row['teacher_id'],
+                'teacher_name': f"{row['teacher__first_name']} {row['teacher__last_name']}".strip(),
+                'subject_id': row['subject_id'],
+                'subject_code': row['subject__code'],
+                'subject_name': row['subject__name'],
+                'terms': 0,
+                'student_count': 0,
+                'pass_count': 0,
+                'score_total': 0,
+                'grade_distribution': {}
+            })
+            summary['terms'] += 1
+            summary['student_count'] += row['student_count']
+            summary['pass_count'] += row['pass_count']
+            summary['score_total'] += float(row['average_score']) * row['student_count']
+            for grade, count in row['grade_distribution'].items():
+                summary['grade_distribution'][grade] = summary['grade_distribution'].get(grade, 0) + count
+        
+        teachers = []
+        for summary in summaries.values():
+            count = summary.pop('student_count')
+            score_total = summary.pop('score_total')
+            teachers.append({
+                **summary,
+                'student_count': count,
+                'average_score': round(score_total / count, 2) if count else 0,
+                'pass_rate': round(summary['pass_count'] * 100 / count, 2) if count else 0
+            })
+        
+        return Response({'teachers': teachers, 'rollups': rows})
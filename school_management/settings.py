@@ -57,6 +57,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'results.middleware.DeferredResultRecomputeMiddleware',
 ]
 
 ROOT_URLCONF = 'school_management.urls'
@@ -90,6 +91,21 @@ DATABASES = {
     )
 }
 
+# ==============================================================================
+# CACHE
+# ==============================================================================
+# Must be shared by every worker process: result snapshots and trends are
+# dropped by key when results change, which a per-process cache (LocMem) would
+# only do in the worker that made the change. The database cache needs
+# `python manage.py createcachetable` (run by entrypoint.sh, render.yaml and
+# the Procfile release phase); Redis or Memcached work as well.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': config('CACHE_LOCATION', default='django_cache'),
+    }
+}
+
 # ==============================================================================
 # PASSWORD VALIDATION - SIMPLE (min 5 characters)
 # ==============================================================================
@@ -280,6 +296,26 @@ SCHOOL_NAME = config('SCHOOL_NAME', default='ConcordTS')
 SCHOOL_ADDRESS = config('SCHOOL_ADDRESS', default='')
 SCHOOL_PHONE = config('SCHOOL_PHONE', default='')
 
+# ==============================================================================
+# RESULTS
+# ==============================================================================
+# Tie handling for class positions: standard (1, 2, 2, 4), dense (1, 2, 2, 3) or ordinal
+RESULTS_RANKING_METHOD = config('RESULTS_RANKING_METHOD', default='standard')
+# Rank per class arm (enrolled Class) instead of per class level
+RESULTS_RANK_BY_ARM = config('RESULTS_RANK_BY_ARM', default=False, cast=bool)
+# Rendered report card PDFs, keyed by result id and content version
+RESULTS_REPORT_CACHE_DIR = config('RESULTS_REPORT_CACHE_DIR', default=str(MEDIA_ROOT / 'report_cards'))
+# Processes used to render report books (0 = one per CPU)
+RESULTS_REPORT_WORKERS = config('RESULTS_REPORT_WORKERS', default=0, cast=int)
+# Seconds a student's published result snapshots stay cached
+RESULTS_SNAPSHOT_CACHE_TIMEOUT = config('RESULTS_SNAPSHOT_CACHE_TIMEOUT', default=3600, cast=int)
+# Seconds a student's performance trend stays cached
+RESULTS_TREND_CACHE_TIMEOUT = config('RESULTS_TREND_CACHE_TIMEOUT', default=3600, cast=int)
+# Refuse to publish cohorts with missing scores, results, attendance or comments
+RESULTS_REQUIRE_COMPLETE = config('RESULTS_REQUIRE_COMPLETE', default=False, cast=bool)
+# Seconds before a worker checks whether another one changed the grading schemes
+RESULTS_GRADING_RECHECK_SECONDS = config('RESULTS_GRADING_RECHECK_SECONDS', default=5, cast=int)
+
 # ==============================================================================
 # SUPPRESS WARNINGS
 # ==============================================================================
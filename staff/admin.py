@@ -17,6 +17,7 @@ class StaffAdmin(admin.ModelAdmin):
         'position_title', 'is_active', 'is_on_leave',
         'employment_date', 'basic_salary'
     ]
+    list_select_related = ['user']
     
     list_filter = [
         'department', 'employment_type', 'is_active',
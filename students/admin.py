@@ -15,6 +15,7 @@ class StudentAdmin(admin.ModelAdmin):
         'admission_number', 'get_full_name', 'class_level', 'stream', 
         'fee_status', 'balance_due', 'is_active', 'is_graduated'
     ]
+    list_select_related = ['user', 'class_level']
     
     list_filter = [
         'class_level', 'stream', 'fee_status', 'student_category',
@@ -117,6 +118,10 @@ class StudentEnrollmentAdmin(admin.ModelAdmin):
         'enrollment_number', 'student_name', 'class_obj', 
         'session', 'term', 'status', 'enrollment_date'
     ]
+    list_select_related = [
+        'student__user', 'class_obj__session', 'class_obj__term',
+        'session', 'term__session'
+    ]
     
     list_filter = [
         'session', 'term', 'class_obj', 'status',
@@ -163,6 +168,7 @@ class StudentEnrollmentAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related(
-            'student', 'student__user', 'class_obj', 'session', 'term',
+            'student', 'student__user', 'class_obj', 'class_obj__session',
+            'class_obj__term', 'session', 'term', 'term__session',
             'enrolled_by', 'approved_by'
     )
\ No newline at end of file